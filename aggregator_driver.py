@@ -7,8 +7,7 @@ iGraph docs:
 """
 import argparse
 import sys
-from metrics_aggregator.standard import per_issue as standard_issue, per_period as standard_period
-from metrics_aggregator.improved import per_issue as improved_issue, per_period as improved_period
+from metrics_aggregator import batch, dry_run, progress, validation
 from metrics_aggregator.utils import file_io_utils as file_io
 
 TAB = " " * 4
@@ -16,49 +15,46 @@ TAB = " " * 4
 
 def main():
     """Top-level access point for gathering social metrics data."""
-    cfg: dict = get_user_cfg()
-    issue_data: dict = file_io.read_jsonfile_into_dict(cfg["issue_data"])
+    args = get_cli_args()
+    cfg: dict = get_user_cfg(args.json_cfg)
 
-    try:
-        method = cfg["processing_method"]
+    # a single repository is run as a batch of one, keeping its run-wide
+    # keys such as "workers" and "progress"
+    if "batch" not in cfg:
+        cfg = {**cfg, "batch": [cfg]}
 
-    except KeyError:
-        print("Configuration requires processing method!")
-        sys.exit()
+    if args.progress:
+        cfg["progress"] = args.progress
 
-    if method == "old":
-        metrics: dict = {
-            "per_issue": standard_issue.gather_all_issue_comm_metrics(issue_data),
-            "per_period": standard_period.gather_all_period_comm_metrics(issue_data),
-        }
+    if args.dry_run:
+        sys.exit(0 if dry_run.dry_run_batch(cfg) else 1)
 
-    else:
-        metrics: dict = {
-            "per_issue": improved_issue.gather_all_issue_comm_metrics(issue_data),
-            "per_period": improved_period.gather_all_period_comm_metrics(issue_data),
-        }
+    try:
+        batch.gather_batch_metrics(cfg, args.resume)
 
-    file_io.write_dict_to_jsonfile(metrics, cfg["out_path"])
+    except validation.ConfigError as e:
+        dry_run.print_config_problems(e.problems)
+        sys.exit(1)
 
 
-def get_user_cfg() -> dict:
+def get_user_cfg(cfg_path: str) -> dict:
     """
-    Get path to and read from configuration file.
+    Read from configuration file.
 
+    :param cfg_path: path to configuration file
+    :type cfg_path: str
     :return: dict of configuration values
     :rtype: dict
     """
-    cfg_path = get_cli_args()
-
     return file_io.read_jsonfile_into_dict(cfg_path)
 
 
-def get_cli_args() -> str:
+def get_cli_args() -> argparse.Namespace:
     """
     Get initializing arguments from CLI.
 
-    :return: path to file with arguments to program
-    :rtype: str
+    :return: path to file with arguments to program and run options
+    :rtype: argparse.Namespace
     """
     # establish positional argument capability
     arg_parser = argparse.ArgumentParser(
@@ -70,7 +66,25 @@ def get_cli_args() -> str:
         help="Path to JSON configuration file",
     )
 
-    return arg_parser.parse_args().json_cfg
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip work checkpointed by an earlier, interrupted run",
+    )
+
+    arg_parser.add_argument(
+        "--progress",
+        choices=progress.MODES,
+        help="How to report progress, in place of the configuration's \"progress\" key",
+    )
+
+    arg_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate the configuration and predict the cost of each period, without computing any metrics",
+    )
+
+    return arg_parser.parse_args()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""Measure ingestion and the metric backends on some repositories' issue data."""
+
+import argparse
+import gc
+import math
+import time
+import tracemalloc
+from metrics_aggregator import ingest
+from metrics_aggregator.improved import per_period
+from metrics_aggregator.utils import file_io_utils as file_io
+
+TAB = " " * 4
+
+
+def main():
+    """Benchmark the ingestion of every given repository and report the results."""
+    args = get_cli_args()
+    results: dict = {}
+
+    print(f"{TAB}{'repository':<40} {'issues':>8} {'raw MiB':>10} {'records MiB':>12} {'saved':>7} {'ingest s':>9}")
+
+    for in_path in args.issue_data:
+        result: dict = benchmark_ingestion(in_path)
+        results[in_path] = result
+
+        print(
+            f"{TAB}{in_path[-40:]:<40} {result['issues']:>8} {result['raw_bytes'] / 2**20:>10.1f} "
+            f"{result['records_bytes'] / 2**20:>12.1f} {1 - result['records_bytes'] / result['raw_bytes']:>7.1%} "
+            f"{result['ingest_seconds']:>9.2f}"
+        )
+
+    if args.metric_backends:
+        backend_columns: str = " ".join(f"{backend + ' s':>10}" for backend in per_period.METRIC_BACKENDS)
+        print(f"\n{TAB}{'repository':<40} {'periods':>8} {backend_columns} {'max diff':>10}")
+
+        for in_path in args.issue_data:
+            result: dict = benchmark_metric_backends(in_path, args.graph_semantics)
+            results[in_path]["metric_backends"] = result
+
+            print(
+                f"{TAB}{in_path[-40:]:<40} {result['periods']:>8} "
+                + " ".join(f"{result['seconds'][backend]:>10.2f}" for backend in per_period.METRIC_BACKENDS)
+                + f" {result['max_difference']:>10.1e}"
+            )
+
+    if args.out_path:
+        file_io.write_dict_to_jsonfile(results, args.out_path)
+
+
+def benchmark_ingestion(in_path: str) -> dict:
+    """
+    Measure the memory held by raw issue data and by its ingested records.
+
+    Sizes are what tracemalloc sees allocated once the data is loaded, so
+    they include every dict, string and array the data is made of.
+
+    Args:
+        in_path (str): path to extractor output.
+
+    Returns:
+        dict: {"issues", "raw_bytes", "records_bytes", "ingest_seconds"}
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        base: int = tracemalloc.get_traced_memory()[0]
+        issue_data: dict = file_io.read_jsonfile_into_dict(in_path)
+        raw_bytes: int = tracemalloc.get_traced_memory()[0] - base
+
+        start: float = time.perf_counter()
+        records: dict = ingest.project_issue_data(issue_data, drop_bodies=True)
+        ingest_seconds: float = time.perf_counter() - start
+
+        num_issues: int = len(issue_data)
+        del issue_data
+        gc.collect()
+        records_bytes: int = tracemalloc.get_traced_memory()[0] - base
+
+    finally:
+        tracemalloc.stop()
+
+    del records
+
+    return {
+        "issues": num_issues,
+        "raw_bytes": raw_bytes,
+        "records_bytes": records_bytes,
+        "ingest_seconds": ingest_seconds,
+    }
+
+
+def benchmark_metric_backends(in_path: str, semantics: str = "directed") -> dict:
+    """
+    Time the structural hole metrics of every period under each backend.
+
+    Each backend computes the "igraph" and "networkx" groups of the same
+    period graphs, so the times include building whatever each backend
+    builds from the graph, e.g. the NetworkX copy or the sparse adjacency.
+
+    Args:
+        in_path (str): path to extractor output.
+        semantics (str): one of per_period.GRAPH_SEMANTICS.
+
+    Returns:
+        dict: {"periods", "seconds": {backend: total seconds},
+        "max_difference": largest relative difference of a value from the
+        first backend's}
+    """
+    records: dict = ingest.project_issue_data(file_io.read_jsonfile_into_dict(in_path), drop_bodies=True)
+    graphs: list = [
+        per_period.make_igraph_period_network_matrix(records["posters"], issue_nums)
+        for issue_nums in per_period.create_partitioned_issue_dict(records).values()
+    ]
+    seconds: dict = dict.fromkeys(per_period.METRIC_BACKENDS, 0.0)
+    values: dict = {}
+
+    for backend in per_period.METRIC_BACKENDS:
+        start: float = time.perf_counter()
+        values[backend] = [
+            per_period.get_node_metric_group(graph, group, semantics=semantics, backend=backend)
+            for graph in graphs
+            for group in ("igraph", "networkx")
+        ]
+        seconds[backend] = time.perf_counter() - start
+
+    expected: list = values[per_period.METRIC_BACKENDS[0]]
+    max_difference: float = 0.0
+
+    for backend in per_period.METRIC_BACKENDS[1:]:
+        for expected_metrics, metrics in zip(expected, values[backend]):
+            for metric_name, metric_values in expected_metrics.items():
+                for exp, val in zip(metric_values, metrics[metric_name]):
+                    if not (math.isnan(exp) and math.isnan(val)):
+                        max_difference = max(max_difference, abs(exp - val) / max(abs(exp), 1e-12))
+
+    return {"periods": len(graphs), "seconds": seconds, "max_difference": max_difference}
+
+
+def get_cli_args() -> argparse.Namespace:
+    """
+    Get initializing arguments from CLI.
+
+    Returns:
+        argparse.Namespace: paths to the issue data and to write results to,
+        and whether and how to compare the metric backends
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the memory of raw extractor data with that of its ingested records.",
+    )
+
+    arg_parser.add_argument(
+        "--metric_backends",
+        action="store_true",
+        help="Also time the structural hole metrics of every period under each metric backend",
+    )
+
+    arg_parser.add_argument(
+        "--graph_semantics",
+        choices=per_period.GRAPH_SEMANTICS,
+        default="directed",
+        help="Graph the backends compute the structural hole metrics on",
+    )
+
+    arg_parser.add_argument(
+        "issue_data",
+        nargs="+",
+        help="Paths to extractor output to benchmark",
+    )
+
+    arg_parser.add_argument(
+        "--out_path",
+        help="Path to also write the results to as JSON",
+    )
+
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
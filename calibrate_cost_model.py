@@ -0,0 +1,58 @@
+"""Fit the period cost model against timings of a repository's periods."""
+
+import argparse
+from metrics_aggregator import cost_model, ingest
+from metrics_aggregator.improved import per_period
+from metrics_aggregator.utils import file_io_utils as file_io
+
+TAB = " " * 4
+
+
+def main():
+    """Profile every non-empty period of a repository and fit the cost model."""
+    args = get_cli_args()
+    records: dict = ingest.project_issue_data(file_io.read_jsonfile_into_dict(args.issue_data), drop_bodies=True)
+    issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+    profiles: list = []
+
+    for period, issue_nums in issue_buckets.items():
+        if not issue_nums:
+            continue
+
+        profile: dict = per_period.profile_period_metrics(records["posters"], issue_nums)
+        profiles.append(profile)
+
+        total: float = sum(profile["seconds"].values())
+        print(f"{TAB}{period}: {len(issue_nums)} issues, {total:.2f}s")
+
+    coefficients: dict = cost_model.calibrate(profiles)
+
+    file_io.write_dict_to_jsonfile(coefficients, args.out_path)
+
+
+def get_cli_args() -> argparse.Namespace:
+    """
+    Get initializing arguments from CLI.
+
+    Returns:
+        argparse.Namespace: paths to the issue data and to write the fit to
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Calibrate the period cost model on extractor data.",
+    )
+
+    arg_parser.add_argument(
+        "issue_data",
+        help="Path to extractor output to profile",
+    )
+
+    arg_parser.add_argument(
+        "out_path",
+        help="Path to write fitted coefficients to, for the cost_model config key",
+    )
+
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
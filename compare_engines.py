@@ -0,0 +1,155 @@
+"""Run two engine configurations on the same input and compare their metrics."""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from metrics_aggregator import batch, equivalence
+from metrics_aggregator.utils import file_io_utils as file_io
+
+TAB = " " * 4
+
+
+def main():
+    """Run both configurations, report per-metric errors and exit non-zero on mismatches."""
+    args = get_cli_args()
+    outputs: list = []
+    seconds: list = []
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for index, cfg_path in enumerate((args.expected_cfg, args.actual_cfg)):
+            cfg: dict = file_io.read_jsonfile_into_dict(cfg_path)
+            out_path: str = os.path.join(out_dir, f"engine{index}.json")
+
+            print(f"{TAB}running {cfg_path}...")
+            seconds.append(run_engine(cfg, args.issue_data, out_path))
+            outputs.append(file_io.read_jsonfile_into_dict(out_path))
+
+    report: dict = equivalence.compare_outputs(*outputs, args.rel_tol, args.abs_tol)
+    report["seconds"] = seconds
+    report["timing_ratio"] = seconds[1] / seconds[0] if seconds[0] else float("inf")
+
+    print_report(report)
+
+    if args.out_path:
+        file_io.write_dict_to_jsonfile(report, args.out_path)
+
+    sys.exit(0 if equivalence.is_equivalent(report, args.strict) else 1)
+
+
+def run_engine(cfg: dict, issue_data: str | None, out_path: str) -> float:
+    """
+    Compute the metrics of one engine configuration.
+
+    Args:
+        cfg (dict): configuration of a single repository, as for
+            aggregator_driver.py.
+        issue_data (str | None): path to extractor output, in place of
+            the configuration's own.
+        out_path (str): path to write the metrics to.
+
+    Returns:
+        float: wall time of the run in seconds
+    """
+    job: dict = {**cfg, "out_path": out_path, "keep_checkpoints": False}
+    job.pop("checkpoint_dir", None)
+
+    if issue_data:
+        job["issue_data"] = issue_data
+
+    start: float = time.perf_counter()
+    batch.gather_batch_metrics({"batch": [job]})
+
+    return time.perf_counter() - start
+
+
+def print_report(report: dict) -> None:
+    """
+    Print the per-metric errors, unmatched metrics and timing of a comparison.
+
+    Args:
+        report (dict): output of equivalence.compare_outputs(), with
+            "seconds" and "timing_ratio" added.
+    """
+    print(f"\n{TAB}{'metric':<45} {'compared':>9} {'mismatch':>9} {'nan':>5} {'inf':>5} {'max abs':>10} {'max rel':>10}")
+
+    for name, stats in sorted(report["metrics"].items()):
+        print(
+            f"{TAB}{name:<45} {stats['compared']:>9} {stats['mismatches']:>9} {stats['nan_mismatches']:>5} "
+            f"{stats['inf_mismatches']:>5} {stats['max_abs_error']:>10.3g} {stats['max_rel_error']:>10.3g}"
+        )
+
+    if report["unmatched"]:
+        print(f"\n{TAB}only in one output:")
+
+        for name, count in sorted(report["unmatched"].items()):
+            print(f"{TAB*2}{name}: {count}")
+
+    if report["examples"]:
+        print(f"\n{TAB}first mismatches:")
+
+        for location, expected, actual in report["examples"]:
+            print(f"{TAB*2}{location}: {expected!r} != {actual!r}")
+
+    print(f"\n{TAB}periods: {report['periods'][0]} vs {report['periods'][1]}")
+    print(f"{TAB}time: {report['seconds'][0]:.2f}s vs {report['seconds'][1]:.2f}s, ratio {report['timing_ratio']:.3f}")
+
+
+def get_cli_args() -> argparse.Namespace:
+    """
+    Get initializing arguments from CLI.
+
+    Returns:
+        argparse.Namespace: paths to both configurations and comparison
+        options
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Check that two engine configurations produce the same metrics.",
+    )
+
+    arg_parser.add_argument(
+        "expected_cfg",
+        help="Path to the configuration of the reference engine",
+    )
+
+    arg_parser.add_argument(
+        "actual_cfg",
+        help="Path to the configuration of the engine under test",
+    )
+
+    arg_parser.add_argument(
+        "--issue_data",
+        help="Path to extractor output to run both engines on, in place of their own",
+    )
+
+    arg_parser.add_argument(
+        "--rel_tol",
+        type=float,
+        default=equivalence.REL_TOL,
+        help="Relative tolerance of a number",
+    )
+
+    arg_parser.add_argument(
+        "--abs_tol",
+        type=float,
+        default=equivalence.ABS_TOL,
+        help="Absolute tolerance of a number",
+    )
+
+    arg_parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Also fail on metrics that only one engine writes",
+    )
+
+    arg_parser.add_argument(
+        "--out_path",
+        help="Path to also write the report to as JSON",
+    )
+
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,21 @@ import math
 import networkx
 
 
-def global_hierarchy(graph):
+def global_hierarchy(graph, nodes=None):
     """
     Get a list of hierarchies (a node-level metric) for all nodes in a graph.
 
     Args:
         graph ():
+        nodes (iterable): nodes to get hierarchies for; all nodes if None.
 
     Returns:
         list: hierarchy for every node in a graph.
     """
-    return {node: hierarchy(graph, node) for node in graph.nodes}
+    if nodes is None:
+        nodes = graph.nodes
+
+    return {node: hierarchy(graph, node) for node in nodes}
 
 
 def hierarchy(graph, node):
@@ -1,6 +1,28 @@
 """TODO."""
 import metrics_aggregator.utils
+import metrics_aggregator.budgets
+import metrics_aggregator.cost_model
+import metrics_aggregator.progress
+import metrics_aggregator.scheduler
+import metrics_aggregator.userids
+import metrics_aggregator.ingest
+import metrics_aggregator.participant_filter
+import metrics_aggregator.dedup
+import metrics_aggregator.stream
 import metrics_aggregator.standard.per_issue
 import metrics_aggregator.standard.per_period
 import metrics_aggregator.improved.per_issue
+import metrics_aggregator.improved.sparse_metrics
 import metrics_aggregator.improved.per_period
+import metrics_aggregator.improved.cumulative
+import metrics_aggregator.improved.decay
+import metrics_aggregator.improved.graph_store
+import metrics_aggregator.compact_output
+import metrics_aggregator.checkpoint
+import metrics_aggregator.validation
+import metrics_aggregator.developers
+import metrics_aggregator.equivalence
+import metrics_aggregator.job_output
+import metrics_aggregator.feed
+import metrics_aggregator.batch
+import metrics_aggregator.dry_run
@@ -0,0 +1,357 @@
+"""
+Aggregate metrics for many repositories through one shared scheduler.
+
+Per-issue shards and period tasks of every job using the improved
+processing method run on one process pool, interleaved by estimated cost.
+Each finished shard and period is checkpointed, see checkpoint.py, and the
+output of a job is assembled from its checkpoints, see job_output.py. Jobs
+using the "old" method run one after another on their own thread pools.
+"""
+
+import functools
+import os
+import queue
+from metrics_aggregator import checkpoint, cost_model, dedup, feed, ingest, job_output, participant_filter, progress, scheduler, validation
+from metrics_aggregator.improved import cumulative, decay, graph_store, per_issue as improved_issue, per_period as improved_period
+from metrics_aggregator.standard import per_issue as standard_issue, per_period as standard_period
+from metrics_aggregator.utils import file_io_utils as file_io
+from metrics_aggregator.utils import record_file_utils as record_file
+
+TAB = " " * 4
+
+def gather_batch_metrics(cfg: dict, resume: bool = False) -> None:
+    """
+    Produce metrics for every repository listed in a batch configuration.
+
+    Notes:
+        A batch configuration has a "batch" key holding a list of job
+        configurations, each with its own "issue_data" and "out_path".
+        All other top-level keys are defaults shared by every job. The
+        options of a job are listed in the README; see validation.py for
+        how they are checked and feed.py for jobs with "stream_input".
+
+    Args:
+        cfg (dict): batch configuration.
+        resume (bool): skip shards and periods checkpointed by an earlier
+            run of the same configuration.
+
+    Raises:
+        validation.ConfigError: with every problem
+            validation.get_config_problems() finds, before any input is
+            read.
+    """
+    jobs: list = validation.get_batch_jobs(cfg)
+    problems: list = validation.get_config_problems(cfg, jobs)
+
+    if problems:
+        raise validation.ConfigError(problems)
+
+    workers: int = cfg.get("workers", scheduler.WORKERS)
+    memory_budget: int | None = improved_period.get_memory_budget(cfg)
+    progress_mode: str = progress.get_progress_mode(cfg)
+    coefficients: dict = cost_model.read_coefficients(cfg.get("cost_model"))
+    repos: dict = {}
+    shard_tasks: list = []
+    tasks: list = []
+    work: dict = {}
+    incoming: queue.Queue = queue.Queue()
+    streams: dict = {}
+    memo: dict = dedup.make_period_memo(cfg.get("memo_dir"))
+
+    for job in jobs:
+        if job["processing_method"] == "old":
+            gather_standard_job_metrics(job, progress_mode)
+            continue
+
+        name: str = job["name"]
+        period_mode: str = validation.get_period_mode(job)
+        ckpt_dir: str = checkpoint.get_checkpoint_dir(job)
+        fingerprint: str = checkpoint.get_job_fingerprint(job)
+
+        if resume and checkpoint.read_fingerprint(ckpt_dir) not in (None, fingerprint):
+            progress.log(progress_mode, f"\n{TAB}{name}: options changed since the checkpoints, starting over...")
+
+        checkpoint.init_checkpoint_dir(ckpt_dir, resume, fingerprint)
+
+        if job.get("graph_in_dir"):
+            repos[name] = get_stored_graph_repo(job, ckpt_dir, resume, coefficients, progress_mode)
+            continue
+
+        if validation.get_stream_input(job):
+            progress.log(progress_mode, f"\n{TAB}{name}: streaming issues into temporal periods...")
+            streams[name] = feed.start_job_stream(job, ckpt_dir, resume, coefficients, incoming)
+            continue
+
+        progress.log(progress_mode, f"\n{TAB}{name}: partitioning issues into temporal periods...")
+
+        raw_issue_data: dict = file_io.read_jsonfile_into_dict(job["issue_data"])
+        duplicates: int = dedup.drop_duplicate_issues(raw_issue_data) if job.get("dedup_issues") else 0
+        records: dict = ingest.project_issue_data(raw_issue_data, drop_bodies=True)
+
+        # only the records are held for the run
+        del raw_issue_data
+        filter_cfg: dict | None = participant_filter.get_filter_config(job)
+        filter_stats: dict = participant_filter.filter_records(records, filter_cfg)
+        issue_data: dict = records["posters"]
+
+        if period_mode == "decay":
+            issue_buckets: dict = decay.create_snapshot_issue_dict(records, decay.get_decay_config(job))
+
+        else:
+            issue_buckets = improved_period.create_partitioned_issue_dict(records)
+
+        shards: list = checkpoint.get_issue_shards(issue_data, job.get("shard_size", checkpoint.SHARD_SIZE))
+
+        pending_buckets: dict = get_pending_buckets(job, issue_buckets, ckpt_dir, resume)
+
+        progress.log(progress_mode, f"{TAB*2}- {len(issue_data.keys())} keys")
+        progress.log(
+            progress_mode, f"{TAB*2}- {len(issue_buckets.keys())} buckets, {len(pending_buckets)} to compute"
+        )
+
+        if job.get("dedup_issues"):
+            progress.log(progress_mode, f"{TAB*2}- {duplicates} duplicate issues dropped")
+
+        if filter_cfg is not None:
+            progress.log(progress_mode, f"{TAB*2}- {participant_filter.format_filter_stats(filter_stats)}")
+
+        shard_tasks += improved_issue.make_issue_shard_tasks(name, records, shards, ckpt_dir, resume, coefficients)
+
+        repos[name] = {
+            "job": job,
+            "issue_data": issue_data,
+            "buckets": issue_buckets,
+            "pending": pending_buckets,
+            "costs": improved_period.estimate_period_costs(issue_data, pending_buckets, coefficients),
+            "ckpt_dir": ckpt_dir,
+            "num_shards": len(shards),
+            "userids": records["userids"],
+        }
+
+        if period_mode == "cumulative":
+            repos[name]["cumulative"] = cumulative.get_cumulative_edges(issue_data, issue_buckets)
+            repos[name]["costs"] = cumulative.estimate_cumulative_costs(
+                issue_data, issue_buckets, repos[name]["cumulative"], coefficients
+            )
+
+        elif period_mode == "decay":
+            repos[name]["snapshots"] = {
+                snapshot: edges
+                for snapshot, edges in decay.get_snapshot_edges(records, issue_buckets, decay.get_decay_config(job))
+                if snapshot in pending_buckets
+            }
+            repos[name]["costs"] = decay.estimate_snapshot_costs(
+                issue_data, pending_buckets, repos[name]["snapshots"], coefficients
+            )
+
+    # periods are split against the cost of the whole batch, not of their
+    # own repository
+    split_cost: float = improved_period.get_split_cost([repo["costs"] for repo in repos.values()], workers)
+    max_chunks: int = workers if cfg.get("intra_period_parallelism") else 1
+
+    for name, repo in repos.items():
+        options: dict = improved_period.get_period_options(repo["job"])
+        pending: dict = repo["pending"]
+        on_period = functools.partial(
+            job_output.write_period, repo["ckpt_dir"], repo["userids"], repo["job"].get("graph_out_dir")
+        )
+
+        if repo["job"].get("graph_in_dir"):
+            # stored graph tasks restore their own userids
+            on_period = functools.partial(checkpoint.write_period, repo["ckpt_dir"])
+
+        if validation.get_memoize_periods(repo["job"]):
+            # identical periods are checkpointed by the one computed; an
+            # exported graph does not change a period's metrics
+            metric_options: dict = {key: val for key, val in options.items() if key != "export_graph"}
+            pending = dedup.claim_periods(
+                memo, repo["ckpt_dir"], repo["userids"], repo["issue_data"], pending, metric_options
+            )
+            on_period = functools.partial(dedup.share_period, memo, repo["ckpt_dir"], repo["userids"])
+
+        work.update(improved_period.get_period_work(name, {period: repo["costs"][period] for period in pending}))
+
+        if repo["job"].get("graph_in_dir"):
+            tasks += graph_store.make_stored_graph_tasks(
+                name,
+                repo["job"]["graph_in_dir"],
+                repo["pending"],
+                repo["costs"],
+                on_period,
+                options,
+            )
+            continue
+
+        if validation.get_period_mode(repo["job"]) == "cumulative":
+            tasks += cumulative.make_cumulative_tasks(
+                name,
+                repo["issue_data"],
+                repo["cumulative"],
+                repo["buckets"],
+                repo["pending"],
+                repo["costs"],
+                on_period,
+                options,
+            )
+            continue
+
+        if validation.get_period_mode(repo["job"]) == "decay":
+            tasks += decay.make_decay_tasks(
+                name,
+                repo["issue_data"],
+                repo["snapshots"],
+                repo["pending"],
+                repo["costs"],
+                on_period,
+                options,
+            )
+            continue
+
+        tasks += improved_period.make_period_tasks(
+            name,
+            repo["issue_data"],
+            pending,
+            repo["costs"],
+            split_cost,
+            on_period,
+            options,
+            max_chunks,
+        )
+
+    # periods waiting on an identical one, and those found in "memo_dir"
+    reused: int = sum(len(followers) for followers in memo["followers"].values()) + memo["stats"]["stored"]
+
+    if reused:
+        progress.log(progress_mode, f"\n{TAB}Reusing the metrics of {reused} periods identical to others")
+
+    streamed: str = f", and streaming {len(streams)} more" if streams else ""
+
+    # a batch of only "old" method jobs has already written its output
+    if repos or streams:
+        progress.log(
+            progress_mode,
+            f"\n{TAB}Calculating metrics for {len(repos)} repositories, {len(tasks + shard_tasks)} tasks{streamed}...",
+        )
+        scheduler.run_tasks(tasks + shard_tasks, workers, memory_budget, progress_mode, work, incoming, tuple(streams))
+
+    for state in streams.values():
+        feed.finish_job_stream(state, progress_mode)
+
+    for repo in repos.values():
+        job_output.write_job_output(repo["job"], repo["ckpt_dir"], repo["num_shards"], repo["buckets"], repo["pending"])
+
+
+def get_stored_graph_repo(
+    job: dict, ckpt_dir: str, resume: bool, coefficients: dict, progress_mode: str = "live"
+) -> dict:
+    """
+    Prepare a job that computes period metrics from stored graphs.
+
+    Args:
+        job (dict): job configuration with a "graph_in_dir".
+        ckpt_dir (str): path to checkpoint directory of the job.
+        resume (bool): skip periods checkpointed by an earlier run.
+        coefficients (dict): cost model coefficients.
+        progress_mode (str): one of progress.MODES.
+
+    Returns:
+        dict: repository entry of gather_batch_metrics()
+    """
+    graph_dir: str = job["graph_in_dir"]
+
+    progress.log(progress_mode, f"\n{TAB}{job['name']}: reading stored period graphs...")
+
+    issue_buckets: dict = graph_store.read_graph_index(graph_dir)
+    pending_buckets: dict = get_pending_buckets(job, issue_buckets, ckpt_dir, resume)
+
+    progress.log(progress_mode, f"{TAB*2}- {len(issue_buckets.keys())} buckets, {len(pending_buckets)} to compute")
+
+    return {
+        "job": job,
+        "issue_data": None,
+        "buckets": issue_buckets,
+        "pending": pending_buckets,
+        "costs": graph_store.estimate_stored_costs(graph_dir, pending_buckets, coefficients),
+        "ckpt_dir": ckpt_dir,
+        "num_shards": 0,
+        # stored graphs hold userids rather than interned ids, see
+        # graph_store.gather_stored_period_metrics()
+        "userids": [],
+    }
+
+
+def get_pending_buckets(job: dict, issue_buckets: dict, ckpt_dir: str, resume: bool) -> dict:
+    """
+    Get the periods of a job that still have to be computed.
+
+    The graph of a cumulative period or a decayed snapshot includes every
+    earlier period, so once one period has to be computed, so do all later
+    ones.
+
+    Args:
+        job (dict): job configuration.
+        issue_buckets (dict): {period str: list of issue nums}
+        ckpt_dir (str): path to checkpoint directory of the job.
+        resume (bool): skip periods checkpointed by an earlier run.
+
+    Returns:
+        dict: {period str: list of issue nums} of the periods to compute
+    """
+    with_developers: bool = bool(job.get("developer_out_path"))
+    pending_buckets: dict = {}
+
+    for period, issue_nums in issue_buckets.items():
+        if pending_buckets and validation.get_period_mode(job) != "period":
+            pending_buckets[period] = issue_nums
+
+        elif not (resume and checkpoint.has_period(ckpt_dir, period, issue_nums, with_developers)):
+            pending_buckets[period] = issue_nums
+
+    return pending_buckets
+
+
+def gather_standard_job_metrics(job: dict, progress_mode: str = "live") -> None:
+    """
+    Produce metrics for one job with the standard processing method.
+
+    A job with "lazy_issue_data" writes its issues to a record file next
+    to its output and reads each issue from it when it is needed, see
+    utils/record_file_utils.py, rather than holding every issue in memory.
+    The record file is removed once the job's metrics are written.
+
+    Args:
+        job (dict): job configuration.
+        progress_mode (str): one of progress.MODES.
+    """
+    if not job.get("lazy_issue_data"):
+        issue_data: dict = file_io.read_jsonfile_into_dict(job["issue_data"])
+        write_standard_job_metrics(issue_data, job["out_path"], progress_mode)
+        return
+
+    record_path: str = f"{job['out_path']}.records"
+
+    try:
+        with record_file.open_issue_data(job["issue_data"], record_path) as lazy_issue_data:
+            write_standard_job_metrics(lazy_issue_data, job["out_path"], progress_mode)
+
+    finally:
+        if os.path.exists(record_path):
+            os.remove(record_path)
+
+
+def write_standard_job_metrics(issue_data, out_path: str, progress_mode: str = "live") -> None:
+    """
+    Compute and write the per-issue and per-period metrics of the standard method.
+
+    Args:
+        issue_data (dict | record_file_utils.LazyIssueData): {issue num:
+            issue data} of a repository.
+        out_path (str): path to write the metrics to.
+        progress_mode (str): one of progress.MODES.
+    """
+    metrics: dict = {
+        "per_issue": standard_issue.gather_all_issue_comm_metrics(issue_data),
+        "per_period": standard_period.gather_all_period_comm_metrics(issue_data, progress_mode),
+    }
+
+    file_io.write_dict_to_jsonfile(metrics, out_path)
@@ -0,0 +1,185 @@
+"""
+Give the metrics of a period a time budget each.
+
+A period with a huge, dense graph, e.g. one a bot posted in thousands of
+issues, can keep exact betweenness or the NetworkX hierarchy running for
+hours. With a budget, a metric that runs over it is interrupted in the
+worker and either recomputed approximately or recorded as null, and the
+rest of the run goes on. Each such metric is noted under the period's
+"degraded" key:
+    {metric name: {"status": "approximate" or "null",
+                   "reason": why, "method": how it was approximated}}
+
+Budgets are enforced with a SIGALRM interval timer, which interrupts both
+Python code and igraph's C routines. Where there is no such timer, e.g. on
+Windows or outside of a process's main thread, metrics run unbudgeted.
+"""
+
+import signal
+import threading
+
+# metrics that can be given a budget; the budget of effective size also
+# covers efficiency, which is derived from it
+BUDGET_METRICS: tuple = ("betweenness", "closeness", "constraint", "effective_size", "hierarchy")
+
+# key the notes of degraded metrics are kept under
+DEGRADED_KEY: str = "degraded"
+
+
+class BudgetExceeded(Exception):
+    """Raised in a worker when a metric runs over its time budget."""
+
+
+def get_metric_budgets(cfg: dict) -> dict:
+    """
+    Get the time budget of every budgeted metric of a run.
+
+    Args:
+        cfg (dict): run or job configuration. "metric_budgets_s" is either
+            a number of seconds for every metric, or {metric name: seconds}
+            for some of BUDGET_METRICS.
+
+    Raises:
+        ValueError: if a metric is not one of BUDGET_METRICS, or a budget
+            is not a positive number.
+
+    Returns:
+        dict: {metric name: seconds} of the budgeted metrics
+    """
+    budgets = cfg.get("metric_budgets_s")
+
+    if budgets is None:
+        return {}
+
+    if not isinstance(budgets, dict):
+        budgets = dict.fromkeys(BUDGET_METRICS, budgets)
+
+    for metric_name, seconds in budgets.items():
+        if metric_name not in BUDGET_METRICS:
+            raise ValueError(f"Unknown budgeted metric {metric_name!r}, expected one of {', '.join(BUDGET_METRICS)}")
+
+        if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or not seconds > 0:
+            raise ValueError(f"Budget of {metric_name!r} must be a positive number of seconds, got {seconds!r}")
+
+    return dict(budgets)
+
+
+def can_interrupt() -> bool:
+    """
+    Check whether budgets can be enforced where this is called.
+
+    Returns:
+        bool: True if an interval timer can interrupt this thread
+    """
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def raise_budget_exceeded(signum, frame) -> None:
+    """
+    Interrupt a metric whose budget has run out.
+
+    Raises:
+        BudgetExceeded: always.
+    """
+    raise BudgetExceeded()
+
+
+def run_with_budget(seconds: float, func, args: tuple):
+    """
+    Run a function, interrupting it after some seconds.
+
+    Args:
+        seconds (float): time budget.
+        func (callable): function to run.
+        args (tuple): positional arguments for func.
+
+    Raises:
+        BudgetExceeded: if func runs for longer than seconds.
+
+    Returns:
+        result of func
+    """
+    handler = signal.signal(signal.SIGALRM, raise_budget_exceeded)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+    try:
+        return func(*args)
+
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
+
+
+def run_metric(metric_name: str, budgets: dict, degraded: dict, func, args: tuple, approximate=None, null=None):
+    """
+    Compute a metric within its budget, degrading it if it runs over.
+
+    Args:
+        metric_name (str): one of BUDGET_METRICS.
+        budgets (dict): output of get_metric_budgets().
+        degraded (dict): notes of degraded metrics; a note for this metric
+            is added to it if it runs over its budget.
+        func (callable): computes the metric exactly.
+        args (tuple): positional arguments for func and approximate.
+        approximate (callable): computes the metric approximately from
+            args, returning (value, description of the method). If None,
+            a metric that runs over its budget is null.
+        null: value of the metric if it is null.
+
+    Returns:
+        the value of func or approximate, or null
+    """
+    seconds: float | None = budgets.get(metric_name)
+
+    if seconds is None or not can_interrupt():
+        return func(*args)
+
+    try:
+        return run_with_budget(seconds, func, args)
+
+    except BudgetExceeded:
+        reason: str = f"exceeded {seconds:g}s budget"
+
+    if approximate is None:
+        degraded[metric_name] = {"status": "null", "reason": reason}
+        return null
+
+    value, method = approximate(*args)
+    degraded[metric_name] = {"status": "approximate", "reason": reason, "method": method}
+
+    return value
+
+
+def merge_degraded(degraded: dict, notes: dict) -> dict:
+    """
+    Add the notes of degraded metrics of one part of a period to another's.
+
+    A metric that is null in any part is null for the whole period.
+
+    Args:
+        degraded (dict): notes to add to, updated in place.
+        notes (dict): notes of another part of the same period.
+
+    Returns:
+        dict: degraded
+    """
+    for metric_name, note in notes.items():
+        if degraded.get(metric_name, {}).get("status") != "null":
+            degraded[metric_name] = note
+
+    return degraded
+
+
+def pop_degraded(metrics: dict, degraded: dict) -> dict:
+    """
+    Move the notes of degraded metrics out of the metrics of a part.
+
+    Args:
+        metrics (dict): metrics of one part of a period, updated in place.
+        degraded (dict): notes of the whole period, updated in place.
+
+    Returns:
+        dict: degraded
+    """
+    return merge_degraded(degraded, metrics.pop(DEGRADED_KEY, {}))
+
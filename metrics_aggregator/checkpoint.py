@@ -0,0 +1,369 @@
+"""
+Checkpoint finished work of a run so that it can be resumed.
+
+Layout of a checkpoint directory:
+    per_issue/<shard index>.json: {"keys": issue nums, "metrics": {...}}
+    per_period/<period>.json: {"period": period key, "metrics": {...}}
+        and, if developer output is on, "developers": {metric: [[userid,
+        value], ...]}, see userids.restore_period_userids()
+    fingerprint.json: {"fingerprint": digest of the job options the
+        checkpointed results depend on, see get_job_fingerprint()}
+
+Each file is written as soon as its shard or period finishes, and the
+final output is assembled from the files one at a time. A resumed run
+whose options differ from those of the checkpoints starts over, so that
+stale results are not mixed into its output.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from metrics_aggregator import compact_output
+from metrics_aggregator.utils import file_io_utils as file_io
+
+
+SHARD_SIZE: int = 1000
+
+# job options that change the checkpointed metrics, see get_job_fingerprint()
+RESULT_OPTIONS: tuple = (
+    "period_mode",
+    "half_life_weeks",
+    "snapshot_weeks",
+    "decay_threshold",
+    "graph_semantics",
+    "metric_backend",
+    "metric_budgets_s",
+    "participant_filter",
+    "dedup_issues",
+    "graph_in_dir",
+)
+
+
+def get_checkpoint_dir(cfg: dict) -> str:
+    """
+    Get the checkpoint directory of a job.
+
+    Args:
+        cfg (dict): job configuration; "checkpoint_dir" overrides the
+            default of "<out_path>.checkpoint".
+
+    Returns:
+        str: path to checkpoint directory
+    """
+    return cfg.get("checkpoint_dir") or f"{cfg['out_path']}.checkpoint"
+
+
+def get_job_fingerprint(job: dict) -> str:
+    """
+    Get a digest of the job options that checkpointed results depend on.
+
+    Options left out count the same as options given their default, so a
+    changed default is not caught; changing an option in the
+    configuration is.
+
+    Args:
+        job (dict): job configuration.
+
+    Returns:
+        str: hex digest of the job's RESULT_OPTIONS
+    """
+    options: dict = {key: job.get(key) for key in RESULT_OPTIONS}
+    text: str = json.dumps(options, sort_keys=True, default=str)
+
+    return hashlib.blake2b(text.encode("UTF-8"), digest_size=16).hexdigest()
+
+
+def get_fingerprint_path(ckpt_dir: str) -> str:
+    """
+    Get the path of a checkpoint directory's fingerprint.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+
+    Returns:
+        str: path to fingerprint file
+    """
+    return os.path.join(ckpt_dir, "fingerprint.json")
+
+
+def read_fingerprint(ckpt_dir: str) -> str | None:
+    """
+    Read the fingerprint of the run that wrote a checkpoint directory.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+
+    Returns:
+        str | None: fingerprint, or None if the directory has none
+    """
+    path: str = get_fingerprint_path(ckpt_dir)
+
+    if not os.path.isfile(path):
+        return None
+
+    return file_io.read_jsonfile_into_dict(path)["fingerprint"]
+
+
+def init_checkpoint_dir(ckpt_dir: str, resume: bool, fingerprint: str | None = None) -> None:
+    """
+    Prepare a checkpoint directory for a run.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        resume (bool): keep the checkpoints of an earlier run. If False,
+            checkpoints left by an earlier run are removed.
+        fingerprint (str | None): output of get_job_fingerprint() for the
+            run. Checkpoints written under another fingerprint are removed
+            even when resuming, as are those of a run that wrote none.
+    """
+    keep: bool = resume and read_fingerprint(ckpt_dir) == fingerprint
+
+    for section in ("per_issue", "per_period"):
+        section_dir = os.path.join(ckpt_dir, section)
+        os.makedirs(section_dir, exist_ok=True)
+
+        if keep:
+            continue
+
+        for file_name in os.listdir(section_dir):
+            if file_name.endswith(".json"):
+                os.remove(os.path.join(section_dir, file_name))
+
+    # written last, so that a run killed while clearing stale checkpoints clears them again
+    file_io.write_dict_to_jsonfile_atomically({"fingerprint": fingerprint}, get_fingerprint_path(ckpt_dir))
+
+
+def remove_checkpoint_dir(ckpt_dir: str) -> None:
+    """
+    Remove the checkpoints of a finished run.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+    """
+    for section in ("per_issue", "per_period"):
+        shutil.rmtree(os.path.join(ckpt_dir, section), ignore_errors=True)
+
+    if os.path.isfile(get_fingerprint_path(ckpt_dir)):
+        os.remove(get_fingerprint_path(ckpt_dir))
+
+    try:
+        os.rmdir(ckpt_dir)
+
+    except OSError:
+        # directory holds something we did not put there
+        pass
+
+
+def get_issue_shards(issue_data: dict, shard_size: int = SHARD_SIZE) -> list:
+    """
+    Split the issue nums of a repository into shards.
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+        shard_size (int): most issues per shard.
+
+    Returns:
+        list: lists of issue nums, in input order
+    """
+    issue_nums: list = list(issue_data.keys())
+
+    return [issue_nums[i : i + shard_size] for i in range(0, len(issue_nums), shard_size)]
+
+
+def get_issue_shard_path(ckpt_dir: str, index: int) -> str:
+    """
+    Get the path of a per-issue shard's checkpoint.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        index (int): index of the shard.
+
+    Returns:
+        str: path to checkpoint file
+    """
+    return os.path.join(ckpt_dir, "per_issue", f"{index}.json")
+
+
+def has_issue_shard(ckpt_dir: str, index: int, issue_nums: list) -> bool:
+    """
+    Check whether a per-issue shard was finished by an earlier run.
+
+    The shard only counts as finished if it holds the same issues, so a
+    changed input is recomputed rather than mixed with stale results.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        index (int): index of the shard.
+        issue_nums (list): issue nums of the shard.
+
+    Returns:
+        bool: True if the shard can be skipped
+    """
+    path = get_issue_shard_path(ckpt_dir, index)
+
+    if not os.path.isfile(path):
+        return False
+
+    return file_io.read_jsonfile_into_dict(path)["keys"] == issue_nums
+
+
+def write_issue_shard(ckpt_dir: str, index: int, issue_nums: list, metrics: dict) -> None:
+    """
+    Write the per-issue metrics of a finished shard.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        index (int): index of the shard.
+        issue_nums (list): issue nums of the shard.
+        metrics (dict): {issue num: metrics}
+    """
+    file_io.write_dict_to_jsonfile_atomically(
+        {"keys": issue_nums, "metrics": metrics}, get_issue_shard_path(ckpt_dir, index)
+    )
+
+
+def get_period_file_name(period: str) -> str:
+    """
+    Turn a period key into a name safe to use in a file path.
+
+    Args:
+        period (str): period key.
+
+    Returns:
+        str: file name without extension
+    """
+    return re.sub(r"[^0-9A-Za-z]+", "_", period)
+
+
+def get_period_path(ckpt_dir: str, period: str) -> str:
+    """
+    Get the path of a period's checkpoint.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        period (str): period key.
+
+    Returns:
+        str: path to checkpoint file
+    """
+    return os.path.join(ckpt_dir, "per_period", f"{get_period_file_name(period)}.json")
+
+
+def has_period(ckpt_dir: str, period: str, issue_nums: list, developers: bool = False) -> bool:
+    """
+    Check whether a period was finished by an earlier run.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        period (str): period key.
+        issue_nums (list): issue nums of the period.
+        developers (bool): only count the period as finished if its
+            developer metrics were checkpointed too.
+
+    Returns:
+        bool: True if the period can be skipped
+    """
+    path = get_period_path(ckpt_dir, period)
+
+    if not os.path.isfile(path):
+        return False
+
+    ckpt: dict = file_io.read_jsonfile_into_dict(path)
+
+    if developers and "developers" not in ckpt:
+        return False
+
+    return ckpt["period"] == period and ckpt["metrics"]["keys"] == issue_nums
+
+
+def write_period(ckpt_dir: str, period: str, metrics: dict) -> None:
+    """
+    Write the metrics of a finished period.
+
+    Developer metrics are kept apart from the period's metrics so that
+    they do not end up in the output.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        period (str): period key.
+        metrics (dict): metrics of the period, with an optional
+            "developers" key.
+    """
+    ckpt: dict = {"period": period, "metrics": metrics}
+
+    if "developers" in metrics:
+        ckpt["metrics"] = {key: val for key, val in metrics.items() if key != "developers"}
+        ckpt["developers"] = metrics["developers"]
+
+    file_io.write_dict_to_jsonfile_atomically(ckpt, get_period_path(ckpt_dir, period))
+
+
+def iter_issue_metrics(ckpt_dir: str, num_shards: int):
+    """
+    Read per-issue metrics back from their shards, one shard at a time.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        num_shards (int): number of shards.
+
+    Yields:
+        tuple: (issue num, metrics)
+    """
+    for index in range(num_shards):
+        yield from file_io.read_jsonfile_into_dict(get_issue_shard_path(ckpt_dir, index))["metrics"].items()
+
+
+def iter_period_metrics(ckpt_dir: str, periods):
+    """
+    Read period metrics back from their checkpoints, one at a time.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        periods (iterable): period keys, in output order.
+
+    Yields:
+        tuple: (period key, metrics)
+    """
+    for period in periods:
+        yield period, file_io.read_jsonfile_into_dict(get_period_path(ckpt_dir, period))["metrics"]
+
+
+def iter_period_developers(ckpt_dir: str, periods):
+    """
+    Read developer metrics back from period checkpoints, one at a time.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        periods (iterable): period keys.
+
+    Yields:
+        tuple: (period key, {metric name: {userid: value}})
+    """
+    for period in periods:
+        dev_metrics: dict = file_io.read_jsonfile_into_dict(get_period_path(ckpt_dir, period))["developers"]
+
+        yield period, {metric_name: dict(map(tuple, pairs)) for metric_name, pairs in dev_metrics.items()}
+
+
+def write_checkpoint_output(ckpt_dir: str, num_shards: int, periods, out_path: str, output_format: str = "full") -> None:
+    """
+    Assemble the final output of a run from its checkpoints.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory.
+        num_shards (int): number of per-issue shards.
+        periods (iterable): period keys, in output order.
+        out_path (str): path to write output to.
+        output_format (str): one of compact_output.OUTPUT_FORMATS.
+    """
+    issue_items = iter_issue_metrics(ckpt_dir, num_shards)
+    period_items = iter_period_metrics(ckpt_dir, periods)
+
+    if output_format == "compact":
+        sections: dict = compact_output.get_compact_sections(issue_items, period_items)
+        file_io.write_sections_to_jsonfile(sections, out_path, indent=None)
+        return
+
+    file_io.write_sections_to_jsonfile({"per_issue": issue_items, "per_period": period_items}, out_path)
@@ -0,0 +1,242 @@
+"""
+Write the output of a run with each metric name and userid given once.
+
+In the full output, every per-issue and per-period-issue entry repeats the
+names of its metrics, and every period repeats the userids of its
+participants. A job with "output_format" "compact" instead writes:
+
+    {
+        "schema": {"version": 1, "per_issue": [metric names],
+                   "per_period": [metric names],
+                   "per_period_issue": [metric names]},
+        "per_issue": {issue num: [values in schema order]},
+        "per_period": {period: [values in schema order]},
+        "userids": [userid of each participant index]
+    }
+
+A period's "per_period_issue" value is a list of rows in the order of its
+"keys", and its "degraded" value is null unless a metric of the period ran
+over its budget. Participants are indices into "userids", which closes the
+output so that it can be filled while periods are written.
+
+expand_compact_output() turns compact output back into the full format.
+"""
+
+import itertools
+from metrics_aggregator import budgets
+
+# formats of a job's output, see get_output_format()
+OUTPUT_FORMATS: tuple = ("full", "compact")
+
+# version of the compact schema, bumped whenever its layout changes
+SCHEMA_VERSION: int = 1
+
+
+def get_output_format(job: dict) -> str:
+    """
+    Get the format a job writes its output in.
+
+    Args:
+        job (dict): job configuration.
+
+    Raises:
+        ValueError: if "output_format" is not one of OUTPUT_FORMATS, or is
+            "compact" on a job using the "old" processing method.
+
+    Returns:
+        str: one of OUTPUT_FORMATS
+    """
+    output_format: str = job.get("output_format", "full")
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f'Unknown "output_format" {output_format!r}, expected one of {OUTPUT_FORMATS}')
+
+    if output_format == "compact" and job.get("processing_method") == "old":
+        raise ValueError('"output_format" "compact" needs the "improved" processing method')
+
+    return output_format
+
+
+def get_compact_sections(issue_items, period_items) -> dict:
+    """
+    Lay out the sections of compact output.
+
+    Only the first per-issue entry, and the periods up to the first one
+    with an issue, are read ahead to find the schema; the rest are
+    converted one at a time as the sections are written, see
+    file_io_utils.write_sections_to_jsonfile().
+
+    Args:
+        issue_items (iterable): (issue num, per-issue metrics) pairs.
+        period_items (iterable): (period, period metrics) pairs.
+
+    Returns:
+        dict: {section key: iterable of (key, value) pairs, or the list of
+            userids, filled as "per_period" is written}
+    """
+    issue_items = iter(issue_items)
+    first_issue: list = list(itertools.islice(issue_items, 1))
+    period_items = iter(period_items)
+    read_periods: list = []
+
+    for item in period_items:
+        read_periods.append(item)
+
+        if item[1].get("per_period_issue"):
+            break
+
+    last_period: dict = read_periods[-1][1] if read_periods else {}
+    schema: dict = get_schema(
+        first_issue[0][1] if first_issue else {},
+        read_periods[0][1] if read_periods else {},
+        next(iter(last_period["per_period_issue"].values())) if last_period.get("per_period_issue") else {},
+    )
+    userid_table: list = []
+
+    return {
+        "schema": schema.items(),
+        "per_issue": iter_issue_rows(schema, itertools.chain(first_issue, issue_items)),
+        "per_period": iter_period_rows(schema, itertools.chain(read_periods, period_items), userid_table),
+        "userids": userid_table,
+    }
+
+
+def get_schema(issue_metrics: dict, period_metrics: dict, period_issue_metrics: dict) -> dict:
+    """
+    Get the column names of each section from one entry of each.
+
+    Args:
+        issue_metrics (dict): metrics of an issue; empty if the job has no
+            per-issue metrics.
+        period_metrics (dict): metrics of a period.
+        period_issue_metrics (dict): metrics of an issue of a period.
+
+    Returns:
+        dict: the "schema" section of compact output
+    """
+    period_columns: list = [key for key in period_metrics if key != budgets.DEGRADED_KEY]
+
+    return {
+        "version": SCHEMA_VERSION,
+        "per_issue": list(issue_metrics),
+        "per_period": period_columns + [budgets.DEGRADED_KEY] if period_columns else [],
+        "per_period_issue": list(period_issue_metrics),
+    }
+
+
+def get_row(columns: list, metrics: dict) -> list:
+    """
+    Get the values of an entry in column order.
+
+    Args:
+        columns (list): column names of the entry's section.
+        metrics (dict): {metric name: value} of the entry.
+
+    Raises:
+        ValueError: if the entry has a metric the schema lacks.
+
+    Returns:
+        list: value of each column, null for a metric the entry lacks
+    """
+    unknown: set = set(metrics).difference(columns)
+
+    if unknown:
+        raise ValueError(f"Metrics {sorted(unknown)} are not in the compact schema {columns}")
+
+    return [metrics.get(column) for column in columns]
+
+
+def iter_issue_rows(schema: dict, issue_items):
+    """
+    Convert per-issue entries to rows.
+
+    Args:
+        schema (dict): output of get_schema().
+        issue_items (iterable): (issue num, per-issue metrics) pairs.
+
+    Yields:
+        tuple: (issue num, row)
+    """
+    for num, metrics in issue_items:
+        yield num, get_row(schema["per_issue"], metrics)
+
+
+def iter_period_rows(schema: dict, period_items, userid_table: list):
+    """
+    Convert period entries to rows, interning their participants.
+
+    Args:
+        schema (dict): output of get_schema().
+        period_items (iterable): (period, period metrics) pairs.
+        userid_table (list): userids interned so far, updated in place.
+
+    Yields:
+        tuple: (period, row)
+    """
+    userid_index: dict = {userid: index for index, userid in enumerate(userid_table)}
+
+    def intern(userid) -> int:
+        if userid not in userid_index:
+            userid_index[userid] = len(userid_table)
+            userid_table.append(userid)
+
+        return userid_index[userid]
+
+    for period, metrics in period_items:
+        metrics = dict(metrics)
+        issue_metrics: dict = metrics.get("per_period_issue", {})
+
+        if "per_period_issue" in metrics:
+            metrics["per_period_issue"] = [
+                get_row(
+                    schema["per_period_issue"],
+                    {**issue_metrics[num], "participants": [intern(userid) for userid in issue_metrics[num]["participants"]]},
+                )
+                for num in metrics["keys"]
+            ]
+
+        yield period, get_row(schema["per_period"], metrics)
+
+
+def expand_compact_output(data: dict) -> dict:
+    """
+    Turn compact output back into the full format.
+
+    Args:
+        data (dict): compact output, as read from its file.
+
+    Raises:
+        ValueError: if the schema is of another version.
+
+    Returns:
+        dict: {"per_issue": ..., "per_period": ...} as in full output
+    """
+    schema: dict = data["schema"]
+
+    if schema["version"] != SCHEMA_VERSION:
+        raise ValueError(f"Compact schema version {schema['version']} is not {SCHEMA_VERSION}")
+
+    userid_table: list = data["userids"]
+    per_period: dict = {}
+
+    for period, row in data["per_period"].items():
+        metrics: dict = dict(zip(schema["per_period"], row))
+
+        if metrics.get(budgets.DEGRADED_KEY) is None:
+            metrics.pop(budgets.DEGRADED_KEY, None)
+
+        if "per_period_issue" in metrics:
+            issue_metrics: dict = {}
+
+            for num, issue_row in zip(metrics["keys"], metrics["per_period_issue"]):
+                issue_metrics[num] = dict(zip(schema["per_period_issue"], issue_row))
+                issue_metrics[num]["participants"] = [userid_table[index] for index in issue_metrics[num]["participants"]]
+
+            metrics["per_period_issue"] = issue_metrics
+
+        per_period[period] = metrics
+
+    return {
+        "per_issue": {num: dict(zip(schema["per_issue"], row)) for num, row in data["per_issue"].items()},
+        "per_period": per_period,
+    }
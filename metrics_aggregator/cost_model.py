@@ -0,0 +1,303 @@
+"""
+Estimate the cost of computing period metrics before building any graphs.
+
+The model predicts the wall time of each metric group from cheap counts of
+a period's issues. Its coefficients are fit against timings gathered with
+improved.per_period.profile_period_metrics(), see calibrate().
+
+The default coefficients were fit on the synthetic inputs of the tests,
+see tests/test_cost_model.py, and predict their periods to within a factor
+of 2.5 on the machine that fit them. Timings differ between machines and
+data, so calibrate() on profiles of the repositories at hand for
+predictions in seconds.
+"""
+
+from metrics_aggregator.utils import file_io_utils as file_io
+
+
+# seconds per unit of work of each phase, fit with calibrate() on profiles of
+# the periods of the tests' synthetic inputs; "overhead" is the time the
+# scheduler takes per task and "per_issue" the time per post of
+# improved.per_issue.gather_all_issue_comm_metrics(), timed on the same inputs
+DEFAULT_COEFFICIENTS: dict = {
+    "overhead": 4e-4,
+    "build": 6e-7,
+    "period_issue": 2.5e-8,
+    "igraph": 3.5e-6,
+    "networkx": 2.4e-6,
+    "per_issue": 1.7e-6,
+}
+
+# bytes per edge, vertex and post of a period held by a worker, measured as
+# the growth in RSS of building the igraph graph and its NetworkX copy
+MEMORY_COEFFICIENTS: dict = {
+    "edge": 700,
+    "vertex": 2000,
+    "post": 500,
+}
+
+# bytes per issue and post of the records the main process holds for a
+# run, and per byte of extractor output loaded whole, measured with
+# tracemalloc as benchmark_suite.py does on synthetic inputs
+MAIN_MEMORY_COEFFICIENTS: dict = {
+    "record_issue": 180,
+    "record_post": 10,
+    "raw_byte": 5,
+}
+
+
+def get_period_features(issue_posters: dict, issue_nums: list) -> dict:
+    """
+    Count the quantities that drive the cost of a period.
+
+    Notes:
+        Each post in an issue gains an edge to every earlier post by a
+        different participant, so the number of edges can be counted
+        exactly without building the graph.
+
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the period,
+            see ingest.py.
+        issue_nums (list): issue nums in the period.
+
+    Returns:
+        dict: issue, comment, vertex and predicted edge counts, and sums
+        of powers of the estimated number of contacts of each vertex
+    """
+    num_comments: int = 0
+    num_edges: int = 0
+    contacts: dict = {}
+
+    for num in issue_nums:
+        posters: tuple = issue_posters[num]
+        post_counts: dict = {}
+        num_edges += count_issue_edges(posters, post_counts)
+        num_comments += max(len(posters) - 1, 0)
+
+        for userid in post_counts:
+            contacts[userid] = contacts.get(userid, 0) + len(post_counts) - 1
+
+    # a participant's contacts across issues overlap, so the sum of their
+    # per-issue contacts overestimates the degree of a vertex; the number
+    # of other vertices bounds it
+    max_degree: int = max(len(contacts) - 1, 0)
+    degrees: list = [min(degree, max_degree) for degree in contacts.values()]
+
+    return {
+        "issues": len(issue_nums),
+        "comments": num_comments,
+        "vertices": len(contacts),
+        "edges": num_edges,
+        "degree_squares": sum(degree**2 for degree in degrees),
+        "degree_cubes": sum(degree**3 for degree in degrees),
+    }
+
+
+def count_issue_edges(posters: tuple, post_counts: dict | None = None) -> int:
+    """
+    Count the edges of one issue conversation without building its graph.
+
+    Args:
+        posters (tuple): userid of the author of each post of the issue.
+        post_counts (dict | None): filled in place with {userid: number of
+            posts} of the issue, if given.
+
+    Returns:
+        int: number of edges, as made by per_period.get_issue_edges()
+    """
+    post_counts = {} if post_counts is None else post_counts
+    num_edges: int = 0
+
+    for i, userid in enumerate(posters, start=1):
+        post_counts[userid] = post_counts.get(userid, 0) + 1
+
+        num_edges += i - post_counts[userid]
+
+    return num_edges
+
+
+def get_phase_work(features: dict) -> dict:
+    """
+    Convert period features into units of work for each phase.
+
+    Notes:
+        - building the graph is linear in posts and edges
+        - betweenness and closeness run one traversal per vertex
+        - constraint walks each pair of a vertex's contacts
+        - the NetworkX structural hole metrics compute a local constraint
+          for each pair of a vertex's contacts, each of which walks the
+          contacts again, in pure Python
+
+    Args:
+        features (dict): output of get_period_features().
+
+    Returns:
+        dict: {phase: units of work}
+    """
+    posts: int = features["issues"] + features["comments"]
+    vertices: int = features["vertices"]
+    edges: int = features["edges"]
+
+    return {
+        "build": posts + edges,
+        "period_issue": vertices * (vertices + edges),
+        "igraph": edges + features["degree_squares"],
+        "networkx": edges + features["degree_cubes"],
+    }
+
+
+def estimate_phase_costs(features: dict, coefficients: dict | None = None) -> dict:
+    """
+    Predict the wall time of each metric group of a period.
+
+    The cost of building the graph and the per-task overhead are added to
+    every group because each split task rebuilds the graph.
+
+    Args:
+        features (dict): output of get_period_features().
+        coefficients (dict): seconds per unit of work; DEFAULT_COEFFICIENTS
+            if not given.
+
+    Returns:
+        dict: {metric group: predicted seconds}
+    """
+    coefficients = coefficients or DEFAULT_COEFFICIENTS
+    work: dict = get_phase_work(features)
+    setup: float = coefficients["overhead"] + coefficients["build"] * work["build"]
+
+    return {
+        phase: setup + coefficients[phase] * phase_work
+        for phase, phase_work in work.items()
+        if phase != "build"
+    }
+
+
+def estimate_period_memory(features: dict) -> int:
+    """
+    Predict the memory a worker needs to compute the metrics of a period.
+
+    Notes:
+        Dominated by the NetworkX copy of the graph, which keeps a dict for
+        every edge in both directions.
+
+    Args:
+        features (dict): output of get_period_features().
+
+    Returns:
+        int: predicted bytes
+    """
+    posts: int = features["issues"] + features["comments"]
+
+    return (
+        MEMORY_COEFFICIENTS["edge"] * features["edges"]
+        + MEMORY_COEFFICIENTS["vertex"] * features["vertices"]
+        + MEMORY_COEFFICIENTS["post"] * posts
+    )
+
+
+def estimate_records_memory(num_issues: int, num_posts: int) -> int:
+    """
+    Predict the memory the main process holds for the records of a job.
+
+    Args:
+        num_issues (int): issues of the job.
+        num_posts (int): issues and comments of the job.
+
+    Returns:
+        int: predicted bytes
+    """
+    return MAIN_MEMORY_COEFFICIENTS["record_issue"] * num_issues + MAIN_MEMORY_COEFFICIENTS["record_post"] * num_posts
+
+
+def estimate_raw_memory(num_bytes: int) -> int:
+    """
+    Predict the memory of extractor output loaded whole, before ingestion.
+
+    Args:
+        num_bytes (int): size of the extractor output file.
+
+    Returns:
+        int: predicted bytes
+    """
+    return MAIN_MEMORY_COEFFICIENTS["raw_byte"] * num_bytes
+
+
+def get_total_cost(phase_costs: dict) -> float:
+    """
+    Predict the cost of computing all metric groups of a period in one task.
+
+    Args:
+        phase_costs (dict): output of estimate_phase_costs(), each value of
+            which includes building the graph once.
+
+    Returns:
+        float: predicted seconds
+    """
+    setup: float = min(phase_costs.values())
+
+    return sum(phase_costs.values()) - setup * (len(phase_costs) - 1)
+
+
+def estimate_issue_shard_cost(shard_records: dict, coefficients: dict | None = None) -> float:
+    """
+    Predict the wall time of computing per-issue metrics for some issues.
+
+    Args:
+        shard_records (dict): {issue num: (word count, posters)}
+        coefficients (dict): seconds per unit of work.
+
+    Returns:
+        float: predicted seconds
+    """
+    coefficients = coefficients or DEFAULT_COEFFICIENTS
+    posts: int = sum(len(posters) for _, posters in shard_records.values())
+
+    return coefficients["overhead"] + coefficients["per_issue"] * posts
+
+
+def calibrate(profiles: list) -> dict:
+    """
+    Fit the coefficients of the model against measured period timings.
+
+    Each coefficient is the ratio of the total measured time of its phase
+    to the total predicted work of that phase, a least squares fit through
+    the origin weighted towards the large periods that matter most.
+
+    Args:
+        profiles (list): outputs of
+            improved.per_period.profile_period_metrics().
+
+    Returns:
+        dict: fitted coefficients; phases without any measured work keep
+        their default
+    """
+    coefficients: dict = dict(DEFAULT_COEFFICIENTS)
+    total_work: dict = {}
+    total_seconds: dict = {}
+
+    for profile in profiles:
+        for phase, phase_work in get_phase_work(profile["features"]).items():
+            total_work[phase] = total_work.get(phase, 0) + phase_work
+            total_seconds[phase] = total_seconds.get(phase, 0) + profile["seconds"][phase]
+
+    for phase, phase_work in total_work.items():
+        if phase_work > 0:
+            coefficients[phase] = total_seconds[phase] / phase_work
+
+    return coefficients
+
+
+def read_coefficients(in_path: str | None) -> dict:
+    """
+    Read calibrated coefficients, falling back to the defaults.
+
+    Args:
+        in_path (str | None): path to JSON output of calibrate().
+
+    Returns:
+        dict: coefficients of the model
+    """
+    if in_path is None:
+        return dict(DEFAULT_COEFFICIENTS)
+
+    return {**DEFAULT_COEFFICIENTS, **file_io.read_jsonfile_into_dict(in_path)}
@@ -0,0 +1,257 @@
+"""
+Drop duplicate issues, and compute the metrics of identical periods once.
+
+Extractor output merged from overlapping snapshots can hold the same issue
+under several keys. A job with "dedup_issues" keeps only the first issue
+of each content digest, before its issues are projected and partitioned,
+so a duplicate is neither counted in the per-issue metrics nor adds its
+replies to a period's graph twice.
+
+The metrics of a period only depend on the posters of its issues and on
+the options of its job, see get_period_digest(). Jobs with
+"memoize_periods" compute each distinct period once per run: the first
+period claimed with a digest is computed, and every later one, in the
+same repository or another of the batch, gets a copy of its metrics once
+it finishes. With a "memo_dir", finished periods are also kept there and
+reused by later runs, e.g. of the same input with another "out_path".
+"""
+
+import copy
+import hashlib
+import json
+import os
+from metrics_aggregator import checkpoint, userids
+from metrics_aggregator.utils import file_io_utils as file_io
+
+# bytes of a content digest
+DIGEST_SIZE: int = 16
+
+
+def get_digest(value) -> str:
+    """
+    Hash a JSON-serializable value, independently of its key order.
+
+    Args:
+        value: value to hash.
+
+    Returns:
+        str: hex digest
+    """
+    text: str = json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.blake2b(text.encode("UTF-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def drop_duplicate_issues(issue_data: dict, digests: set | None = None) -> int:
+    """
+    Drop issues whose content is the same as an earlier issue's.
+
+    Args:
+        issue_data (dict): {issue num: issue data} in input order, updated
+            in place.
+        digests (set | None): digests of the issues kept so far, updated in
+            place; for a repository read a batch at a time.
+
+    Returns:
+        int: number of issues dropped
+    """
+    digests = set() if digests is None else digests
+    duplicates: list = []
+
+    for num, issue in issue_data.items():
+        digest: str = get_digest(issue)
+
+        if digest in digests:
+            duplicates.append(num)
+
+        digests.add(digest)
+
+    for num in duplicates:
+        del issue_data[num]
+
+    return len(duplicates)
+
+
+def make_period_memo(memo_dir: str | None = None) -> dict:
+    """
+    Create the state that shares the metrics of identical periods in a run.
+
+    Args:
+        memo_dir (str | None): path to keep the metrics of finished periods
+            in, across runs; periods are only shared within a run if None.
+
+    Returns:
+        dict: memo state for the other functions of this module
+    """
+    if memo_dir:
+        os.makedirs(memo_dir, exist_ok=True)
+
+    return {
+        "dir": memo_dir,
+        # {digest: posters of the computed period's issues}
+        "leaders": {},
+        # {digest: list of (ckpt_dir, period, issue nums, posters)} waiting
+        # on the period computed for that digest
+        "followers": {},
+        # {(ckpt_dir, period): digest} of the periods being computed
+        "claimed": {},
+        "stats": {"computed": 0, "shared": 0, "stored": 0},
+    }
+
+
+def get_period_posters(userid_table: list, issue_posters: dict, issue_nums: list) -> list:
+    """
+    Get the posters of each issue of a period as userids.
+
+    Args:
+        userid_table (list): userid of each interned id.
+        issue_posters (dict): {issue num: interned posters}.
+        issue_nums (list): issue nums of the period.
+
+    Returns:
+        list: list of userids of each issue, in the order of issue_nums
+    """
+    return [[userids.get_userid(userid_table, userid) for userid in issue_posters[num]] for num in issue_nums]
+
+
+def get_period_digest(posters: list, options: dict) -> str:
+    """
+    Hash what the metrics of a period depend on.
+
+    Issue order only changes the order vertices are added in, so the
+    posters of each issue are hashed as a multiset. Userids that are not
+    strings, e.g. null for deleted accounts, are sorted by their JSON.
+
+    Args:
+        posters (list): output of get_period_posters().
+        options (dict): job options that change a period's metrics, e.g.
+            its graph semantics.
+
+    Returns:
+        str: hex digest
+    """
+    return get_digest({"posters": sorted(posters, key=json.dumps), "options": options})
+
+
+def claim_periods(
+    memo: dict, ckpt_dir: str, userid_table: list, issue_posters: dict, pending: dict, options: dict
+) -> dict:
+    """
+    Find which of a repository's pending periods need computing.
+
+    A period found in the memo's directory is checkpointed right away. A
+    period identical to one already claimed waits for that one's metrics,
+    see share_period().
+
+    Args:
+        memo (dict): output of make_period_memo(), updated in place.
+        ckpt_dir (str): path to checkpoint directory of the repository.
+        userid_table (list): userid of each interned id.
+        issue_posters (dict): {issue num: interned posters}.
+        pending (dict): {period str: issue nums} to compute.
+        options (dict): job options that change a period's metrics.
+
+    Returns:
+        dict: the periods of pending to compute
+    """
+    to_compute: dict = {}
+
+    for period, issue_nums in pending.items():
+        posters: list = get_period_posters(userid_table, issue_posters, issue_nums)
+        digest: str = get_period_digest(posters, options)
+
+        if digest in memo["leaders"]:
+            memo["followers"][digest].append((ckpt_dir, period, issue_nums, posters))
+            continue
+
+        memo_path: str | None = get_memo_path(memo, digest)
+
+        if memo_path is not None and os.path.isfile(memo_path):
+            entry: dict = file_io.read_jsonfile_into_dict(memo_path)
+            checkpoint.write_period(ckpt_dir, period, copy_period_metrics(entry, issue_nums, posters))
+            memo["stats"]["stored"] += 1
+            continue
+
+        memo["leaders"][digest] = posters
+        memo["followers"][digest] = []
+        memo["claimed"][(ckpt_dir, period)] = digest
+        memo["stats"]["computed"] += 1
+        to_compute[period] = issue_nums
+
+    return to_compute
+
+
+def share_period(memo: dict, ckpt_dir: str, userid_table: list, period: str, metrics: dict) -> None:
+    """
+    Checkpoint a computed period, and copy its metrics to identical periods.
+
+    Args:
+        memo (dict): output of make_period_memo(), updated in place.
+        ckpt_dir (str): path to checkpoint directory of the repository.
+        userid_table (list): userid of each interned id.
+        period (str): period key.
+        metrics (dict): metrics of the period, with interned userids.
+    """
+    metrics = userids.restore_period_userids(userid_table, metrics)
+    checkpoint.write_period(ckpt_dir, period, metrics)
+
+    digest: str = memo["claimed"].pop((ckpt_dir, period))
+    entry: dict = {"posters": memo["leaders"][digest], "metrics": metrics}
+    memo_path: str | None = get_memo_path(memo, digest)
+
+    if memo_path is not None:
+        file_io.write_dict_to_jsonfile_atomically(entry, memo_path)
+
+    for follower_dir, follower_period, issue_nums, posters in memo["followers"].pop(digest):
+        checkpoint.write_period(follower_dir, follower_period, copy_period_metrics(entry, issue_nums, posters))
+        memo["stats"]["shared"] += 1
+
+
+def copy_period_metrics(entry: dict, issue_nums: list, posters: list) -> dict:
+    """
+    Give an identical period the metrics of a computed one.
+
+    Issues are matched on their posters: two issues with the same posters
+    in an identical period have the same per-issue aggregates.
+
+    Args:
+        entry (dict): {"posters": output of get_period_posters(),
+            "metrics": metrics with userids restored} of the computed
+            period.
+        issue_nums (list): issue nums of the identical period.
+        posters (list): output of get_period_posters() for issue_nums.
+
+    Returns:
+        dict: metrics of the identical period
+    """
+    metrics: dict = copy.deepcopy(entry["metrics"])
+    metrics["keys"] = list(issue_nums)
+
+    if "per_period_issue" in metrics:
+        issue_metrics: dict = {
+            json.dumps(issue_posters): metrics["per_period_issue"][num]
+            for num, issue_posters in zip(entry["metrics"]["keys"], entry["posters"])
+        }
+        metrics["per_period_issue"] = {
+            num: copy.deepcopy(issue_metrics[json.dumps(issue_posters)])
+            for num, issue_posters in zip(issue_nums, posters)
+        }
+
+    return metrics
+
+
+def get_memo_path(memo: dict, digest: str) -> str | None:
+    """
+    Get the path the metrics of a period are kept at across runs.
+
+    Args:
+        memo (dict): output of make_period_memo().
+        digest (str): output of get_period_digest().
+
+    Returns:
+        str | None: path in the memo's directory, or None without one
+    """
+    if not memo["dir"]:
+        return None
+
+    return os.path.join(memo["dir"], f"{digest}.json")
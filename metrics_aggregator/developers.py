@@ -0,0 +1,138 @@
+"""
+Per-developer metric time series, stored as developers x periods matrices.
+
+A series file is an uncompressed NumPy .npz archive holding:
+    userids: developer of each row, as JSON where json_userids is set
+    json_userids: True for rows whose userid is not a string, see
+        userids.pack_userids()
+    periods: period key of each column, in ascending order
+    <metric>: float64 matrix of shape (developers, periods) for each of
+        NODE_METRICS; NaN where a developer took no part in a period
+
+Series are updated by adding or replacing columns, so periods that were
+already written are never recomputed or rewritten one value at a time.
+"""
+
+import os
+import numpy
+from metrics_aggregator import userids
+
+
+# node-level metrics kept for every developer of a period
+NODE_METRICS: tuple = (
+    "betweenness",
+    "closeness",
+    "constraint",
+    "effective_size",
+    "efficiency",
+    "hierarchy",
+)
+
+
+def init_series() -> dict:
+    """
+    Create an empty series.
+
+    Returns:
+        dict: {"userids": list, "periods": list, "metrics": {metric name:
+        numpy.ndarray of shape (developers, periods)}}
+    """
+    return {
+        "userids": [],
+        "periods": [],
+        "metrics": {metric_name: numpy.empty((0, 0)) for metric_name in NODE_METRICS},
+    }
+
+
+def read_series(in_path: str) -> dict:
+    """
+    Read a series file, or create an empty series if there is none.
+
+    Args:
+        in_path (str): path to series file.
+
+    Returns:
+        dict: series, see init_series()
+    """
+    if not os.path.isfile(in_path):
+        return init_series()
+
+    with numpy.load(in_path) as archive:
+        return {
+            "userids": userids.unpack_userids(archive["userids"], archive["json_userids"]),
+            "periods": archive["periods"].tolist(),
+            "metrics": {metric_name: archive[metric_name] for metric_name in NODE_METRICS},
+        }
+
+
+def write_series(series: dict, out_path: str) -> None:
+    """
+    Write a series file, replacing any earlier one only once complete.
+
+    Args:
+        series (dict): series, see init_series().
+        out_path (str): path to series file.
+    """
+    tmp_path: str = f"{out_path}.tmp"
+
+    with open(tmp_path, "wb") as fptr:
+        numpy.savez(
+            fptr,
+            **userids.pack_userids(series["userids"]),
+            periods=numpy.array(series["periods"], dtype=str),
+            **series["metrics"],
+        )
+
+    os.replace(tmp_path, out_path)
+
+
+def add_period_columns(series: dict, columns) -> dict:
+    """
+    Add the developer metrics of some periods to a series.
+
+    A period already in the series has its column replaced, e.g. the last
+    period of a repository that has gained issues since the series was
+    written. Other existing columns are copied over as a block. New
+    developers get rows of NaN for the periods before they appeared.
+
+    Args:
+        series (dict): series, see init_series().
+        columns (iterable): (period key, {metric name: {userid: value}})
+            for each period to add.
+
+    Returns:
+        dict: updated series
+    """
+    columns = dict(columns)
+
+    if not columns:
+        return series
+
+    row_userids: list = list(series["userids"])
+    rows: dict = {userid: row for row, userid in enumerate(row_userids)}
+
+    for dev_metrics in columns.values():
+        for userid in dev_metrics.get("betweenness", {}):
+            if userid not in rows:
+                rows[userid] = len(row_userids)
+                row_userids.append(userid)
+
+    periods: list = sorted(set(series["periods"]) | set(columns))
+    old_cols: list = [periods.index(period) for period in series["periods"]]
+    num_old_rows: int = len(series["userids"])
+    metrics: dict = {}
+
+    for metric_name in NODE_METRICS:
+        matrix = numpy.full((len(row_userids), len(periods)), numpy.nan)
+        matrix[:num_old_rows, old_cols] = series["metrics"][metric_name]
+
+        for period, dev_metrics in columns.items():
+            values: dict = dev_metrics.get(metric_name, {})
+            col: int = periods.index(period)
+
+            matrix[:, col] = numpy.nan
+            matrix[[rows[userid] for userid in values], col] = list(values.values())
+
+        metrics[metric_name] = matrix
+
+    return {"userids": row_userids, "periods": periods, "metrics": metrics}
@@ -0,0 +1,341 @@
+"""
+Check a batch configuration and predict the cost of its run, without running it.
+
+A dry run validates every job as gather_batch_metrics() would before any
+work, see validation.get_config_problems(). It then reads the input of each
+valid job a batch of issues at a time, see stream.py, so that no issue or
+comment body is held beyond its batch, and partitions its issues as the
+run would. The cost model predicts the edges, memory and seconds of every
+period from cheap counts of its issues, see cost_model.py; cumulative and
+decayed periods walk their edge lists, but no graph is built and no
+metric computed.
+
+The peak memory adds what the main process holds, the records of every job
+and the input of one job loaded whole, to that of the largest period tasks
+that may run at once. Jobs of the "old" processing method run in the main
+process and their run time is not estimated.
+"""
+
+import os
+import numpy
+from metrics_aggregator import checkpoint, cost_model, ingest, participant_filter, scheduler, stream, validation
+from metrics_aggregator.improved import cumulative, decay, graph_store, per_period
+from metrics_aggregator.utils import date_utils
+
+TAB = " " * 4
+
+
+def dry_run_batch(cfg: dict) -> bool:
+    """
+    Validate a batch configuration and print the predicted cost of its run.
+
+    Args:
+        cfg (dict): batch configuration.
+
+    Returns:
+        bool: True if the configuration is valid
+    """
+    jobs: list = validation.get_batch_jobs(cfg)
+    problems: list = validation.get_config_problems(cfg, jobs)
+
+    if problems:
+        print_config_problems(problems)
+        return False
+
+    coefficients: dict = cost_model.read_coefficients(cfg.get("cost_model"))
+    memory_budget: int | None = per_period.get_memory_budget(cfg)
+    workers: int = cfg.get("workers", scheduler.WORKERS)
+    task_seconds: list = []
+    task_memory: list = []
+    main_memory: list = []
+    not_estimated: int = 0
+
+    for job in jobs:
+        prediction: dict = predict_job(job, coefficients)
+        print_prediction(job["name"], prediction)
+        task_seconds += prediction["task_seconds"]
+        main_memory.append(prediction["main_memory"])
+
+        if prediction["costs"] is None:
+            not_estimated += 1
+            continue
+
+        task_memory += [costs["memory"] for costs in prediction["costs"].values()]
+
+    summary: dict = summarize_batch(task_seconds, task_memory, workers, memory_budget, main_memory)
+    skipped: str = f", not counting {not_estimated} \"old\" method jobs" if not_estimated else ""
+
+    print(
+        f"\n{TAB}Dry run of {len(jobs)} jobs: {summary['seconds']:.1f} s of work, about "
+        f"{summary['wall_seconds']:.1f} s on {workers} workers{skipped}, peak memory "
+        f"{to_mib(summary['peak_memory']):.1f} MiB, {to_mib(summary['main_memory']):.1f} MiB of it in the main process"
+    )
+
+    return True
+
+
+def print_config_problems(problems: list) -> None:
+    """
+    Print what makes a batch configuration invalid.
+
+    Args:
+        problems (list): output of validation.get_config_problems().
+    """
+    print("\nInvalid configuration:")
+
+    for problem in problems:
+        print(f"{TAB}- {problem}")
+
+
+def scan_issue_data(job: dict) -> dict:
+    """
+    Read a job's extractor output a batch at a time, keeping only its records.
+
+    Args:
+        job (dict): job configuration with an "issue_data".
+
+    Returns:
+        dict: {"records": the output of ingest.project_issue_data() for the
+        whole input, after the job's duplicate issues and participant
+        filter, "duplicates": number of duplicate issues dropped}
+    """
+    state: dict = stream.make_stream(
+        participant_filter.get_filter_config(job), dedup_issues=bool(job.get("dedup_issues"))
+    )
+    closed_at: list = []
+
+    for issue_batch in stream.iter_issue_batches(job["issue_data"]):
+        issue_nums: list = stream.add_issue_batch(state, issue_batch)
+        closed_at.append(date_utils.get_closed_at_epochs({num: issue_batch[num] for num in issue_nums}))
+
+    records: dict = {
+        **state["records"],
+        "closed_at": numpy.concatenate(closed_at) if closed_at else numpy.empty(0, dtype=numpy.int64),
+    }
+
+    return {"records": records, "duplicates": state["duplicates"]}
+
+
+def predict_job(job: dict, coefficients: dict) -> dict:
+    """
+    Partition a job's issues and predict the cost of each of its periods.
+
+    Args:
+        job (dict): valid job configuration.
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        dict: {"counts": issue, comment, date and duplicate counts of the
+        input, or None for stored graphs, "buckets": {period str: list of
+        issue nums}, "costs": same layout as
+        per_period.estimate_period_costs(), or None for jobs of the "old"
+        processing method, which are not estimated, "task_seconds":
+        predicted seconds of each period and per-issue shard,
+        "main_memory": {"records": bytes the main process holds for the
+        run, "raw": bytes while the input is loaded whole}}
+    """
+    if job.get("graph_in_dir"):
+        buckets: dict = graph_store.read_graph_index(job["graph_in_dir"])
+        costs: dict = graph_store.estimate_stored_costs(job["graph_in_dir"], buckets, coefficients)
+
+        return {
+            "counts": None,
+            "buckets": buckets,
+            "costs": costs,
+            "task_seconds": get_task_seconds(costs),
+            "main_memory": {"records": 0, "raw": 0},
+        }
+
+    scan: dict = scan_issue_data(job)
+    records: dict = scan["records"]
+    issue_posters: dict = records["posters"]
+    period_mode: str = validation.get_period_mode(job)
+
+    if period_mode == "decay":
+        buckets = decay.create_snapshot_issue_dict(records, decay.get_decay_config(job))
+
+    else:
+        buckets = per_period.create_partitioned_issue_dict(records)
+
+    counts: dict = {
+        "issues": len(issue_posters),
+        "comments": sum(max(len(posters) - 1, 0) for posters in issue_posters.values()),
+        "first_closed_at": format_epoch(records["closed_at"].min()) if len(records["closed_at"]) else None,
+        "last_closed_at": format_epoch(records["closed_at"].max()) if len(records["closed_at"]) else None,
+        "duplicates": scan["duplicates"],
+    }
+
+    raw_memory: int = cost_model.estimate_raw_memory(os.path.getsize(job["issue_data"]))
+
+    # the "old" method keeps its input, read an issue at a time if lazy, and
+    # no records
+    if job["processing_method"] == "old":
+        return {
+            "counts": counts,
+            "buckets": buckets,
+            "costs": None,
+            "task_seconds": [],
+            "main_memory": {"records": 0, "raw": 0 if job.get("lazy_issue_data") else raw_memory},
+        }
+
+    # streamed input is read a batch at a time
+    main_memory: dict = {
+        "records": cost_model.estimate_records_memory(counts["issues"], counts["issues"] + counts["comments"]),
+        "raw": 0 if validation.get_stream_input(job) else raw_memory,
+    }
+
+    if period_mode == "cumulative":
+        costs = cumulative.estimate_cumulative_costs(
+            issue_posters, buckets, cumulative.get_cumulative_edges(issue_posters, buckets), coefficients
+        )
+
+    elif period_mode == "decay":
+        costs = {}
+
+        # one snapshot's edges at a time
+        for snapshot, edges in decay.get_snapshot_edges(records, buckets, decay.get_decay_config(job)):
+            costs.update(
+                decay.estimate_snapshot_costs(issue_posters, {snapshot: buckets[snapshot]}, {snapshot: edges}, coefficients)
+            )
+
+    else:
+        costs = per_period.estimate_period_costs(issue_posters, buckets, coefficients)
+
+    shard_seconds: list = [
+        cost_model.estimate_issue_shard_cost(ingest.get_issue_records(records, issue_nums), coefficients)
+        for issue_nums in checkpoint.get_issue_shards(issue_posters, job.get("shard_size", checkpoint.SHARD_SIZE))
+    ]
+
+    return {
+        "counts": counts,
+        "buckets": buckets,
+        "costs": costs,
+        "task_seconds": get_task_seconds(costs) + shard_seconds,
+        "main_memory": main_memory,
+    }
+
+
+def get_task_seconds(costs: dict) -> list:
+    """
+    Get the predicted seconds of each period, computed in one task.
+
+    Args:
+        costs (dict): output of per_period.estimate_period_costs().
+
+    Returns:
+        list: predicted seconds of each period
+    """
+    return [cost_model.get_total_cost(period_costs["seconds"]) for period_costs in costs.values()]
+
+
+def summarize_batch(
+    task_seconds: list, task_memory: list, workers: int, memory_budget: int | None, main_memory: list = ()
+) -> dict:
+    """
+    Predict the length and memory peak of a run from those of its tasks.
+
+    Args:
+        task_seconds (list): predicted seconds of each task of the run.
+        task_memory (list): predicted bytes of each period task.
+        workers (int): number of worker processes.
+        memory_budget (int | None): bytes the tasks in flight may use, see
+            per_period.get_memory_budget().
+        main_memory (list): "main_memory" of the predict_job() output of
+            each job. Records are held for the whole run, but the input of
+            only one job is loaded whole at a time.
+
+    Returns:
+        dict: {"seconds": total seconds of work, "wall_seconds": lower
+        bound on the run's length, "main_memory": bytes held by the main
+        process, "peak_memory": those and the bytes of the largest tasks
+        that may run at once}
+    """
+    seconds: float = sum(task_seconds)
+    largest: list = sorted(task_memory, reverse=True)[:workers]
+    peak_memory: int = sum(largest)
+
+    if memory_budget is not None:
+        # a task larger than the whole budget still runs, on its own
+        peak_memory = min(peak_memory, max(memory_budget, largest[0] if largest else 0))
+
+    main_bytes: int = sum(job["records"] for job in main_memory) + max((job["raw"] for job in main_memory), default=0)
+
+    return {
+        "seconds": seconds,
+        "wall_seconds": max(seconds / workers, max(task_seconds, default=0)),
+        "main_memory": main_bytes,
+        "peak_memory": main_bytes + peak_memory,
+    }
+
+
+def print_prediction(name: str, prediction: dict) -> None:
+    """
+    Print the input counts and per-period predictions of a job.
+
+    Args:
+        name (str): name of the job.
+        prediction (dict): output of predict_job().
+    """
+    counts: dict | None = prediction["counts"]
+    sizes: list = sorted(len(issue_nums) for issue_nums in prediction["buckets"].values())
+
+    print(f"\n{TAB}{name}:")
+
+    if counts is not None:
+        print(f"{TAB*2}- {counts['issues']} issues, {counts['comments']} comments")
+        print(f"{TAB*2}- closed from {counts['first_closed_at']} to {counts['last_closed_at']}")
+
+        if counts["duplicates"]:
+            print(f"{TAB*2}- {counts['duplicates']} duplicate issues dropped")
+
+    if sizes:
+        print(f"{TAB*2}- {len(sizes)} buckets of {sizes[0]} to {sizes[-1]} issues, median {sizes[len(sizes) // 2]}")
+
+    if prediction["costs"] is None:
+        print(f"{TAB*2}- run time not estimated for the \"old\" processing method")
+        print(f"{TAB*2}- {to_mib(prediction['main_memory']['raw']):.1f} MiB to load its input")
+        return
+
+    if not prediction["costs"]:
+        return
+
+    print(f"{TAB*2}{'period':<22}{'issues':>8}{'edges':>12}{'memory MiB':>12}{'seconds':>10}")
+
+    for period, costs in prediction["costs"].items():
+        print(
+            f"{TAB*2}{period:<22}{costs['features']['issues']:>8}{costs['features']['edges']:>12}"
+            f"{to_mib(costs['memory']):>12.1f}{cost_model.get_total_cost(costs['seconds']):>10.2f}"
+        )
+
+    largest: int = max(costs["memory"] for costs in prediction["costs"].values())
+
+    print(
+        f"{TAB*2}- {sum(prediction['task_seconds']):.1f} s of work, "
+        f"{to_mib(largest):.1f} MiB for the largest period"
+    )
+
+
+def format_epoch(seconds) -> str:
+    """
+    Format epoch seconds like the periods of a run are keyed.
+
+    Args:
+        seconds: seconds since the epoch.
+
+    Returns:
+        str: date string in date_utils.ISO_FMT
+    """
+    return date_utils.format_date(date_utils.from_epoch(int(seconds)), date_utils.ISO_FMT)
+
+
+def to_mib(num_bytes: int) -> float:
+    """
+    Convert bytes to MiB.
+
+    Args:
+        num_bytes (int): number of bytes.
+
+    Returns:
+        float: number of MiB
+    """
+    return num_bytes / 2**20
@@ -0,0 +1,281 @@
+"""
+Compare the metrics written by two engines, value by value.
+
+Any engine that computes metrics faster has to give the same numbers as
+the engines it replaces. Two outputs are walked side by side, and every
+number is compared within a tolerance. NaN only matches NaN, and an
+infinity only matches the same infinity. Errors are gathered per metric:
+the value of "betweenness_avg" in every period counts toward one
+"per_period/betweenness_avg" entry, wherever its period and issue keys
+differ.
+
+Engines may write period keys in different formats, so when the period
+keys of two outputs differ, periods are paired in date order.
+"""
+
+import math
+from metrics_aggregator.utils import date_utils
+
+REL_TOL: float = 1e-9
+ABS_TOL: float = 1e-12
+
+# keys whose values are keyed by issue num or period rather than by metric
+ID_LEVELS: tuple = ("per_issue", "per_period", "per_period_issue")
+
+# lists of ids whose order carries no meaning
+UNORDERED_KEYS: tuple = ("keys", "participants")
+
+# number of mismatching values kept as examples in a report
+MAX_EXAMPLES: int = 20
+
+
+def compare_outputs(expected: dict, actual: dict, rel_tol: float = REL_TOL, abs_tol: float = ABS_TOL) -> dict:
+    """
+    Compare the output of one engine against that of another.
+
+    Args:
+        expected (dict): output of the reference engine, with "per_issue"
+            and "per_period" keys.
+        actual (dict): output of the engine under test.
+        rel_tol (float): relative tolerance, as in math.isclose().
+        abs_tol (float): absolute tolerance, as in math.isclose().
+
+    Returns:
+        dict: {"metrics": {metric: stats, see get_metric_stats()},
+        "unmatched": {metric: number of values only one output has},
+        "examples": list of (location, expected, actual) of the first
+        mismatches, "periods": [expected count, actual count]}
+    """
+    report: dict = {
+        "metrics": {},
+        "unmatched": {},
+        "examples": [],
+        "periods": [len(expected.get("per_period", {})), len(actual.get("per_period", {}))],
+    }
+    tols: tuple = (rel_tol, abs_tol)
+
+    compare_keyed(expected.get("per_issue", {}), actual.get("per_issue", {}), ("per_issue",), "per_issue", report, tols)
+
+    exp_periods: dict = expected.get("per_period", {})
+    act_periods: dict = actual.get("per_period", {})
+
+    for exp_key, act_key in align_periods(list(exp_periods), list(act_periods)):
+        if exp_key is None or act_key is None:
+            count_unmatched(report, ("per_period",))
+            continue
+
+        location: str = f"per_period/{exp_key if exp_key == act_key else f'{exp_key}|{act_key}'}"
+        compare_values(exp_periods[exp_key], act_periods[act_key], ("per_period",), location, report, tols)
+
+    return report
+
+
+def align_periods(expected: list, actual: list) -> list:
+    """
+    Pair the period keys of two outputs.
+
+    Args:
+        expected (list): period keys of the reference output.
+        actual (list): period keys of the output under test.
+
+    Returns:
+        list: (expected key, actual key) pairs, with None in place of a
+        period that the other output lacks
+    """
+    if set(expected) == set(actual):
+        return [(key, key) for key in expected]
+
+    expected = sorted(expected, key=parse_period_key)
+    actual = sorted(actual, key=parse_period_key)
+    pairs: list = list(zip(expected, actual))
+
+    pairs += [(key, None) for key in expected[len(actual) :]]
+    pairs += [(None, key) for key in actual[len(expected) :]]
+
+    return pairs
+
+
+def parse_period_key(key: str):
+    """
+    Parse a period key written in any timestamp format.
+
+    Args:
+        key (str): period key.
+
+    Returns:
+        datetime.datetime: start of the period
+    """
+    return date_utils.get_parser(date_utils.detect_format(key))(key)
+
+
+def compare_keyed(expected: dict, actual: dict, path: tuple, location: str, report: dict, tols: tuple) -> None:
+    """
+    Compare two dicts keyed by issue num or period.
+
+    Args:
+        expected (dict): {id: value} of the reference output.
+        actual (dict): {id: value} of the output under test.
+        path (tuple): metric path of the dicts' values.
+        location (str): location of the dicts in their output.
+        report (dict): report to add to, see compare_outputs().
+        tols (tuple): (relative, absolute) tolerance.
+    """
+    for key in expected.keys() | actual.keys():
+        if key not in expected or key not in actual:
+            count_unmatched(report, path)
+            continue
+
+        compare_values(expected[key], actual[key], path, f"{location}/{key}", report, tols)
+
+
+def compare_values(expected, actual, path: tuple, location: str, report: dict, tols: tuple) -> None:
+    """
+    Compare two values of the same metric, recursing into dicts and lists.
+
+    Args:
+        expected: value of the reference output.
+        actual: value of the output under test.
+        path (tuple): names of the keys leading to the value, without
+            issue nums and periods.
+        location (str): location of the value in its output.
+        report (dict): report to add to, see compare_outputs().
+        tols (tuple): (relative, absolute) tolerance.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected.keys() | actual.keys():
+            if key not in expected or key not in actual:
+                count_unmatched(report, (*path, key))
+
+            elif key in ID_LEVELS:
+                compare_keyed(expected[key], actual[key], (*path, key), f"{location}/{key}", report, tols)
+
+            else:
+                compare_values(expected[key], actual[key], (*path, key), f"{location}/{key}", report, tols)
+
+        return
+
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        if path[-1] in UNORDERED_KEYS:
+            expected, actual = sorted(expected, key=str), sorted(actual, key=str)
+
+        for index, (exp_val, act_val) in enumerate(zip(expected, actual)):
+            compare_values(exp_val, act_val, path, f"{location}[{index}]", report, tols)
+
+        return
+
+    stats: dict = report["metrics"].setdefault("/".join(path), get_metric_stats())
+    kind, abs_error, rel_error = compare_leaves(expected, actual, *tols)
+    stats["compared"] += 1
+    stats["max_abs_error"] = max(stats["max_abs_error"], abs_error)
+    stats["max_rel_error"] = max(stats["max_rel_error"], rel_error)
+
+    if kind is None:
+        return
+
+    stats["mismatches"] += 1
+
+    if kind in ("nan", "inf"):
+        stats[f"{kind}_mismatches"] += 1
+
+    if len(report["examples"]) < MAX_EXAMPLES:
+        report["examples"].append((location, expected, actual))
+
+
+def compare_leaves(expected, actual, rel_tol: float, abs_tol: float) -> tuple:
+    """
+    Compare two values that are not dicts or lists.
+
+    Null is taken for NaN when compared to a number, since JSON has no NaN.
+
+    Args:
+        expected: value of the reference output.
+        actual: value of the output under test.
+        rel_tol (float): relative tolerance, as in math.isclose().
+        abs_tol (float): absolute tolerance, as in math.isclose().
+
+    Returns:
+        tuple: (None if the values match, else "nan" or "inf" for a NaN or
+        infinity against another value, or "value"; absolute error;
+        relative error). Errors are 0 where they are not defined.
+    """
+    exp_is_number: bool = is_number(expected) or (expected is None and is_number(actual))
+    act_is_number: bool = is_number(actual) or (actual is None and is_number(expected))
+
+    if not (exp_is_number and act_is_number):
+        return (None if expected == actual else "value"), 0.0, 0.0
+
+    expected = math.nan if expected is None else float(expected)
+    actual = math.nan if actual is None else float(actual)
+
+    if math.isnan(expected) or math.isnan(actual):
+        return (None if math.isnan(expected) and math.isnan(actual) else "nan"), 0.0, 0.0
+
+    if math.isinf(expected) or math.isinf(actual):
+        return (None if expected == actual else "inf"), 0.0, 0.0
+
+    abs_error: float = abs(expected - actual)
+    rel_error: float = abs_error / max(abs(expected), abs(actual)) if abs_error else 0.0
+    kind = None if math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol) else "value"
+
+    return kind, abs_error, rel_error
+
+
+def is_number(value) -> bool:
+    """
+    Check whether a value is an int or float, but not a bool.
+
+    Args:
+        value: any value.
+
+    Returns:
+        bool: True for numbers
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def get_metric_stats() -> dict:
+    """
+    Create empty comparison stats for one metric.
+
+    Returns:
+        dict: {"compared", "mismatches", "nan_mismatches", "inf_mismatches",
+        "max_abs_error", "max_rel_error"}
+    """
+    return {
+        "compared": 0,
+        "mismatches": 0,
+        "nan_mismatches": 0,
+        "inf_mismatches": 0,
+        "max_abs_error": 0.0,
+        "max_rel_error": 0.0,
+    }
+
+
+def count_unmatched(report: dict, path: tuple) -> None:
+    """
+    Count a value that only one of the outputs has.
+
+    Args:
+        report (dict): report to add to, see compare_outputs().
+        path (tuple): metric path of the value.
+    """
+    name: str = "/".join(path)
+    report["unmatched"][name] = report["unmatched"].get(name, 0) + 1
+
+
+def is_equivalent(report: dict, strict: bool = False) -> bool:
+    """
+    Decide whether a comparison passes.
+
+    Args:
+        report (dict): output of compare_outputs().
+        strict (bool): also fail on values only one output has, e.g.
+            metrics that only one engine computes.
+
+    Returns:
+        bool: True if every compared value matched
+    """
+    if any(stats["mismatches"] for stats in report["metrics"].values()):
+        return False
+
+    return not (strict and report["unmatched"])
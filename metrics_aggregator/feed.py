@@ -0,0 +1,271 @@
+"""
+Hand out the tasks of streamed jobs while their input is still being read.
+
+A job with "stream_input" reads its issues on a thread of its own, see
+stream.py. Its per-issue shards and periods go to the scheduler as soon
+as they have all of their issues, and the thread writes the job's output
+once all of its tasks have finished, while the rest of the run goes on.
+"""
+
+import functools
+import math
+import queue
+import threading
+from metrics_aggregator import checkpoint, job_output, participant_filter, progress, stream
+from metrics_aggregator.improved import per_issue, per_period
+
+TAB = " " * 4
+
+
+def start_job_stream(job: dict, ckpt_dir: str, resume: bool, coefficients: dict, incoming: queue.Queue) -> dict:
+    """
+    Start reading a job's issues, and handing out its tasks, on a thread.
+
+    Args:
+        job (dict): job configuration with "stream_input".
+        ckpt_dir (str): path to checkpoint directory of the job.
+        resume (bool): skip shards and periods checkpointed by an earlier
+            run.
+        coefficients (dict): cost model coefficients.
+        incoming (queue.Queue): queue the job's tasks are put on, see
+            scheduler.run_tasks().
+
+    Returns:
+        dict: state of the job's stream, for finish_job_stream()
+    """
+    feed: dict = {
+        "job": job,
+        "ckpt_dir": ckpt_dir,
+        "stream": stream.make_stream(participant_filter.get_filter_config(job), dedup_issues=job.get("dedup_issues")),
+        "num_shards": 0,
+        # latest hand-out of each period, the periods computed by this run,
+        # and the shards and hand-outs whose results have not come back
+        "generations": {},
+        "computed": set(),
+        "outstanding": set(),
+        "done": threading.Condition(),
+        "error": None,
+    }
+
+    feed["thread"] = threading.Thread(
+        target=feed_job_stream, args=(feed, resume, coefficients, incoming), daemon=True
+    )
+    feed["thread"].start()
+
+    return feed
+
+
+def feed_job_stream(feed: dict, resume: bool, coefficients: dict, incoming: queue.Queue) -> None:
+    """
+    Read a job's issues and hand out its tasks, then write its output.
+
+    Runs on the job's own thread. A full shard of issues is handed out at
+    once, and each period as soon as an issue closed after it is read.
+    Periods are not split, since the cost of the whole run is not known
+    when they are handed out.
+
+    Args:
+        feed (dict): output of start_job_stream(); an error is kept under
+            its "error" key.
+        resume (bool): skip shards and periods checkpointed by an earlier
+            run.
+        coefficients (dict): cost model coefficients.
+        incoming (queue.Queue): queue the job's tasks are put on.
+    """
+    job: dict = feed["job"]
+    state: dict = feed["stream"]
+    shard_size: int = job.get("shard_size", checkpoint.SHARD_SIZE)
+    shard: list = []
+
+    try:
+        try:
+            for issue_batch in stream.iter_issue_batches(job["issue_data"]):
+                shard += stream.add_issue_batch(state, issue_batch)
+                tasks: list = []
+
+                while len(shard) >= shard_size:
+                    tasks += make_stream_shard_tasks(feed, shard[:shard_size], resume, coefficients)
+                    shard = shard[shard_size:]
+
+                hand_out_stream_tasks(feed, incoming, tasks, stream.pop_ready_periods(state), resume, coefficients)
+
+            tasks = make_stream_shard_tasks(feed, shard, resume, coefficients) if shard else []
+            hand_out_stream_tasks(feed, incoming, tasks, stream.pop_ready_periods(state, final=True), resume, coefficients)
+
+        finally:
+            incoming.put((job["name"], None, None))
+
+        with feed["done"]:
+            feed["done"].wait_for(lambda: not feed["outstanding"])
+
+        write_stream_output(feed)
+
+    # SystemExit included: file_io exits on unreadable input
+    except BaseException as e:
+        feed["error"] = e
+
+
+def make_stream_shard_tasks(feed: dict, issue_nums: list, resume: bool, coefficients: dict) -> list:
+    """
+    Create the task of the next shard of a streamed job.
+
+    Args:
+        feed (dict): output of start_job_stream().
+        issue_nums (list): issue nums of the shard.
+        resume (bool): skip the shard if an earlier run checkpointed it.
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks(), empty if resumed
+    """
+    index: int = feed["num_shards"]
+    feed["num_shards"] += 1
+
+    tasks: list = per_issue.make_issue_shard_tasks(
+        feed["job"]["name"], feed["stream"]["records"], [issue_nums], feed["ckpt_dir"], resume, coefficients, index
+    )
+
+    for task in tasks:
+        key: tuple = ("per_issue", index)
+        task["on_result"] = functools.partial(finish_stream_result, feed, key, task["on_result"])
+
+        with feed["done"]:
+            feed["outstanding"].add(key)
+
+    return tasks
+
+
+def hand_out_stream_tasks(
+    feed: dict, incoming: queue.Queue, tasks: list, periods: list, resume: bool, coefficients: dict
+) -> None:
+    """
+    Put the tasks of a streamed job's ready shards and periods on the queue.
+
+    Args:
+        feed (dict): output of start_job_stream().
+        incoming (queue.Queue): queue the job's tasks are put on.
+        tasks (list): tasks of the job's ready shards.
+        periods (list): output of stream.pop_ready_periods().
+        resume (bool): skip periods checkpointed by an earlier run.
+        coefficients (dict): cost model coefficients.
+    """
+    job: dict = feed["job"]
+    issue_posters: dict = feed["stream"]["records"]["posters"]
+    options: dict = per_period.get_period_options(job)
+    pending: dict = {}
+
+    for period in periods:
+        # later issues are added to the stream's own list
+        issue_nums: list = list(feed["stream"]["buckets"][period])
+
+        if resume and checkpoint.has_period(feed["ckpt_dir"], period, issue_nums, options["developers"]):
+            continue
+
+        pending[period] = issue_nums
+
+    costs: dict = per_period.estimate_period_costs(issue_posters, pending, coefficients)
+
+    for period, issue_nums in pending.items():
+        generation: int = feed["generations"].get(period, -1) + 1
+        feed["generations"][period] = generation
+        feed["computed"].add(period)
+
+        with feed["done"]:
+            feed["outstanding"].add((period, generation))
+
+        tasks += per_period.make_period_tasks(
+            job["name"],
+            issue_posters,
+            {period: issue_nums},
+            costs,
+            math.inf,
+            functools.partial(finish_stream_period, feed, generation),
+            options,
+        )
+
+    if tasks:
+        incoming.put((job["name"], tasks, per_period.get_period_work(job["name"], costs)))
+
+
+def finish_stream_result(feed: dict, key: tuple, on_result, result) -> None:
+    """
+    Handle the result of a streamed job's task, then note it has come back.
+
+    Args:
+        feed (dict): output of start_job_stream().
+        key (tuple): key of the task under the feed's "outstanding".
+        on_result (callable): called with the result.
+        result: result of the task.
+    """
+    on_result(result)
+
+    with feed["done"]:
+        feed["outstanding"].discard(key)
+        feed["done"].notify_all()
+
+
+def finish_stream_period(feed: dict, generation: int, period: str, metrics: dict) -> None:
+    """
+    Checkpoint a streamed period, unless it has been handed out again since.
+
+    Args:
+        feed (dict): output of start_job_stream().
+        generation (int): hand-out of the period the metrics are from.
+        period (str): period key.
+        metrics (dict): metrics of the period, with interned userids.
+    """
+
+    def write(metrics: dict) -> None:
+        if feed["generations"][period] == generation:
+            job_output.write_period(
+                feed["ckpt_dir"], feed["stream"]["records"]["userids"], feed["job"].get("graph_out_dir"), period, metrics
+            )
+
+    finish_stream_result(feed, (period, generation), write, metrics)
+
+
+def write_stream_output(feed: dict) -> None:
+    """
+    Write the output of a streamed job whose tasks have all finished.
+
+    Args:
+        feed (dict): output of start_job_stream().
+    """
+    job_output.write_job_output(
+        feed["job"], feed["ckpt_dir"], feed["num_shards"], feed["stream"]["buckets"], feed["computed"]
+    )
+
+
+def finish_job_stream(feed: dict, progress_mode: str = "live") -> None:
+    """
+    Wait for a streamed job's output, and report how its input was read.
+
+    Args:
+        feed (dict): output of start_job_stream().
+        progress_mode (str): one of progress.MODES.
+
+    Raises:
+        BaseException: whatever stopped the job's thread.
+    """
+    feed["thread"].join()
+
+    if feed["error"] is not None:
+        raise feed["error"]
+
+    state: dict = feed["stream"]
+    filter_stats: dict = state["filter_stats"]
+
+    progress.log(progress_mode, f"\n{TAB}{feed['job']['name']}: streamed")
+    progress.log(progress_mode, f"{TAB*2}- {len(state['records']['posters'])} keys")
+    progress.log(progress_mode, f"{TAB*2}- {len(state['buckets'])} buckets, {len(feed['computed'])} computed")
+
+    if state["reordered"]:
+        progress.log(
+            progress_mode, f"{TAB*2}- {state['reordered']} issues out of order, their periods were computed again"
+        )
+
+    if state["digests"] is not None:
+        progress.log(progress_mode, f"{TAB*2}- {state['duplicates']} duplicate issues dropped")
+
+    if state["filter"] is not None:
+        progress.log(progress_mode, f"{TAB*2}- {participant_filter.format_filter_stats(filter_stats)}")
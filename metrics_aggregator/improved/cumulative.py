@@ -0,0 +1,413 @@
+"""
+Cumulative period networks: the graph of everything up to each period.
+
+The edges of each bucket are appended to one growing edge list as a
+delta, so the graph of a period is a prefix of that list and is never
+rebuilt issue by issue. Betweenness, closeness and constraint depend on
+the whole graph and are recomputed on each period's merged graph.
+
+The NetworkX structural hole metrics of a vertex only depend on the edges
+within two steps of it: effective size and hierarchy on the mutual
+weights between the vertex, its neighbors and their neighbors, and
+efficiency and hierarchy also on its degree. They are carried from one
+period to the next and only recomputed for the vertices near the
+period's new edges.
+"""
+
+import functools
+import igraph
+import networkx
+import numpy
+from metrics_aggregator import __hierarchy as hierarchy
+from metrics_aggregator import budgets, cost_model, progress, scheduler
+from metrics_aggregator.improved import per_period
+
+# metric groups recomputed on the merged graph of every period
+RECOMPUTED_GROUPS: tuple = ("period_issue", "igraph")
+
+# node-level metrics updated incrementally, in output order
+INCREMENTAL_METRICS: tuple = ("effective_size", "efficiency", "hierarchy")
+
+
+def get_cumulative_edges(issue_posters: dict, issue_buckets: dict) -> dict:
+    """
+    Build the growing edge list of a repository, one bucket at a time.
+
+    Args:
+        issue_posters (dict): {issue num: posters}, see ingest.py.
+        issue_buckets (dict): {period str: list of issue nums}, in order.
+
+    Returns:
+        dict: {"userids": interned userid of each vertex, "edges": int32
+        array of shape (edges, 2), "sizes": {period str: (number of
+        vertices, number of edges) of the period's cumulative graph}}
+    """
+    vertices: dict = {}
+    edges: list = []
+    sizes: dict = {}
+
+    for period, issue_nums in issue_buckets.items():
+        for num in issue_nums:
+            edges += per_period.get_issue_edges(issue_posters[num], vertices)
+
+        sizes[period] = (len(vertices), len(edges))
+
+    return {
+        "userids": list(vertices),
+        "edges": numpy.array(edges, dtype=numpy.int32).reshape(-1, 2),
+        "sizes": sizes,
+    }
+
+
+def make_cumulative_graph(userids: list, edges) -> igraph.Graph:
+    """
+    Build the graph of a prefix of the growing edge list.
+
+    Args:
+        userids (list): interned userid of each vertex of the prefix.
+        edges (numpy.ndarray): edges of the prefix.
+
+    Returns:
+        igraph.Graph: graph in the same form as
+        per_period.make_igraph_period_network_matrix()
+    """
+    graph = igraph.Graph(n=len(userids), edges=edges.tolist(), directed=True)
+    graph["userids"] = userids
+
+    return graph
+
+
+def estimate_cumulative_costs(issue_posters: dict, issue_buckets: dict, cumulative: dict, coefficients: dict) -> dict:
+    """
+    Predict the cost of the recomputed metric groups of every period.
+
+    Args:
+        issue_posters (dict): {issue num: posters} of all issues in a
+            repository.
+        issue_buckets (dict): {period str: list of issue nums}, in order.
+        cumulative (dict): output of get_cumulative_edges().
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        dict: same layout as per_period.estimate_period_costs(), for the
+        cumulative graph of each period
+    """
+    period_costs: dict = {}
+    num_issues: int = 0
+    num_comments: int = 0
+
+    for period, issue_nums in issue_buckets.items():
+        num_vertices, num_edges = cumulative["sizes"][period]
+        num_issues += len(issue_nums)
+        num_comments += sum(len(issue_posters[num]) - 1 for num in issue_nums)
+
+        degrees = numpy.bincount(cumulative["edges"][:num_edges].ravel(), minlength=num_vertices)
+        degrees = numpy.minimum(degrees, max(num_vertices - 1, 0)).astype(numpy.float64)
+
+        features: dict = {
+            "issues": num_issues,
+            "comments": num_comments,
+            "vertices": num_vertices,
+            "edges": num_edges,
+            "degree_squares": float((degrees**2).sum()),
+            "degree_cubes": float((degrees**3).sum()),
+        }
+
+        period_costs[period] = {
+            "seconds": cost_model.estimate_phase_costs(features, coefficients),
+            "memory": cost_model.estimate_period_memory(features),
+            "features": features,
+        }
+
+    return period_costs
+
+
+def make_cumulative_tasks(
+    repo: str,
+    issue_posters: dict,
+    cumulative: dict,
+    issue_buckets: dict,
+    pending: dict,
+    period_costs: dict,
+    on_period,
+    options: dict | None = None,
+) -> list:
+    """
+    Create the scheduler tasks for the cumulative periods of a repository.
+
+    Each pending period gets one task for its recomputed groups. One more
+    task walks every period in order and updates the NetworkX metrics;
+    its results are merged into each period as it finishes.
+
+    Args:
+        repo (str): name of the repository the periods belong to.
+        issue_posters (dict): {issue num: posters}, see ingest.py.
+        cumulative (dict): output of get_cumulative_edges().
+        issue_buckets (dict): {period str: list of issue nums} of all
+            periods, in order.
+        pending (dict): the periods of issue_buckets to compute.
+        period_costs (dict): output of estimate_cumulative_costs().
+        on_period (callable): called with (period str, dict of metrics) as
+            soon as both tasks of a period have finished.
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None. Metric budgets and the
+            backend only apply to the recomputed groups; the incremental
+            metrics are not budgeted and always come from NetworkX. Graphs
+            are not exported.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks()
+    """
+    if not pending:
+        return []
+
+    options = options or per_period.PERIOD_OPTIONS
+
+    collectors: dict = {}
+    tasks: list = []
+
+    for period, issue_nums in pending.items():
+        num_vertices, num_edges = cumulative["sizes"][period]
+        collectors[period] = make_part_collector(period, issue_nums, on_period, options["developers"])
+        seconds: dict = period_costs[period]["seconds"]
+
+        tasks.append(
+            scheduler.make_task(
+                repo,
+                period,
+                "recomputed",
+                sum(seconds[group] for group in RECOMPUTED_GROUPS),
+                gather_cumulative_period_metrics,
+                (
+                    {num: issue_posters[num] for num in issue_nums},
+                    issue_nums,
+                    cumulative["userids"][:num_vertices],
+                    cumulative["edges"][:num_edges],
+                    options,
+                ),
+                functools.partial(collectors[period], "recomputed"),
+                period_costs[period]["memory"],
+            )
+        )
+
+    def collect_incremental(result: dict) -> None:
+        for period, collector in collectors.items():
+            collector("incremental", result[period])
+
+    # most vertices are only recomputed in the periods they gain edges in,
+    # so the whole walk costs about as much as one full pass over the last
+    # period's graph
+    last_period: str = list(issue_buckets)[-1]
+
+    tasks.append(
+        scheduler.make_task(
+            repo,
+            "cumulative",
+            "incremental",
+            period_costs[last_period]["seconds"]["networkx"],
+            gather_incremental_networkx_metrics,
+            (
+                cumulative["userids"],
+                cumulative["edges"],
+                cumulative["sizes"],
+                list(pending),
+                options["developers"],
+                options["semantics"],
+            ),
+            collect_incremental,
+            period_costs[last_period]["memory"],
+        )
+    )
+
+    return tasks
+
+
+def make_part_collector(period: str, issue_nums: list, on_period, developers: bool):
+    """
+    Merge the two parts of a cumulative period once both have finished.
+
+    Args:
+        period (str): period key.
+        issue_nums (list): issue nums in the period.
+        on_period (callable): called with (period str, dict of metrics).
+        developers (bool): keep the node-level metrics of every developer.
+
+    Returns:
+        callable: called with (part name, result of the part)
+    """
+    parts: dict = {}
+
+    def collect_part(part: str, result: dict) -> None:
+        parts[part] = result
+
+        if len(parts) < 2:
+            return
+
+        res: dict = {"keys": issue_nums}
+        dev_metrics: dict = {}
+
+        for part_name in ("recomputed", "incremental"):
+            part_metrics: dict = dict(parts[part_name])
+            dev_metrics |= part_metrics.pop("developers", {})
+            res |= part_metrics
+
+        if developers:
+            res["developers"] = dev_metrics
+
+        parts.clear()
+        on_period(period, res)
+
+    return collect_part
+
+
+def gather_cumulative_period_metrics(
+    issue_posters: dict,
+    issue_nums: list,
+    userids: list,
+    edges,
+    options: dict | None = None,
+) -> dict:
+    """
+    Gather the recomputed metric groups of one cumulative period.
+
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        userids (list): interned userid of each vertex of the period's
+            cumulative graph.
+        edges (numpy.ndarray): edges of the period's cumulative graph.
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None.
+
+    Returns:
+        dict: period-issue and igraph metrics of the period
+    """
+    options = options or per_period.PERIOD_OPTIONS
+    graph: igraph.Graph = make_cumulative_graph(userids, edges)
+    res: dict = {}
+    dev_metrics: dict = {}
+    degraded: dict = {}
+
+    progress.report_phase("cumulative metrics")
+
+    for group in RECOMPUTED_GROUPS:
+        group_metrics: dict = per_period.get_metric_group(graph, issue_posters, issue_nums, group, options)
+        dev_metrics |= group_metrics.pop("developers", {})
+        budgets.pop_degraded(group_metrics, degraded)
+        res |= group_metrics
+
+    if degraded:
+        res[budgets.DEGRADED_KEY] = degraded
+
+    if options["developers"]:
+        res["developers"] = dev_metrics
+
+    return res
+
+
+def gather_incremental_networkx_metrics(
+    userids: list, edges, sizes: dict, periods: list, developers: bool = False, semantics: str = "directed"
+) -> dict:
+    """
+    Walk the cumulative periods in order, updating the NetworkX metrics.
+
+    Notes:
+        NetworkX weighs edges by whether they exist in either direction,
+        so an edge repeating an existing source and target only changes
+        the degree of its endpoints. An edge with a new source and target
+        also changes the metrics of every neighbor of its endpoints.
+
+    Args:
+        userids (list): interned userid of each vertex of the last period.
+        edges (numpy.ndarray): growing edge list of the repository.
+        sizes (dict): {period str: (vertices, edges)} of every period, in
+            order.
+        periods (list): periods to return metrics for.
+        developers (bool): keep the node-level metrics of every developer.
+        semantics (str): one of per_period.GRAPH_SEMANTICS, see
+            per_period.get_graph_semantics().
+
+    Returns:
+        dict: {period str: NetworkX metrics of the period}
+    """
+    # an undirected graph keeps one edge per pair, as in
+    # per_period.get_structural_graph()
+    nx_graph = networkx.MultiDiGraph() if semantics == "directed" else networkx.Graph()
+    node_metrics: dict = {metric_name: {} for metric_name in INCREMENTAL_METRICS}
+    num_vertices: int = 0
+    num_edges: int = 0
+    res: dict = {}
+
+    for period, (period_vertices, period_edges) in sizes.items():
+        stale: set = set(range(num_vertices, period_vertices))
+        new_pairs: list = []
+
+        nx_graph.add_nodes_from(range(num_vertices, period_vertices))
+
+        for source, target in edges[num_edges:period_edges].tolist():
+            if not nx_graph.has_edge(source, target):
+                new_pairs.append((source, target))
+
+            nx_graph.add_edge(source, target)
+            stale.update((source, target))
+
+        for pair in new_pairs:
+            for vertex in pair:
+                stale.update(networkx.all_neighbors(nx_graph, vertex))
+
+        num_vertices, num_edges = period_vertices, period_edges
+
+        if stale:
+            update_node_metrics(nx_graph, sorted(stale), node_metrics)
+
+        if period not in periods:
+            continue
+
+        res[period] = aggregate_node_metrics(node_metrics, userids[:num_vertices], developers)
+
+    return res
+
+
+def update_node_metrics(nx_graph, nodes: list, node_metrics: dict) -> None:
+    """
+    Recompute the NetworkX metrics of some nodes on the merged graph.
+
+    Args:
+        nx_graph (networkx.MultiDiGraph): cumulative graph so far.
+        nodes (list): nodes to recompute.
+        node_metrics (dict): {metric name: {node: value}}, updated in place.
+    """
+    node_eff_sz: dict = networkx.effective_size(nx_graph, nodes)
+
+    node_metrics["effective_size"].update(node_eff_sz)
+    node_metrics["efficiency"].update(per_period.global_efficiency(nx_graph, node_eff_sz))
+    node_metrics["hierarchy"].update(hierarchy.global_hierarchy(nx_graph, nodes))
+
+
+def aggregate_node_metrics(node_metrics: dict, userids: list, developers: bool) -> dict:
+    """
+    Aggregate the NetworkX metrics of every vertex of a period.
+
+    Args:
+        node_metrics (dict): {metric name: {node: value}}
+        userids (list): interned userid of each vertex of the period.
+        developers (bool): keep the node-level metrics of every developer.
+
+    Returns:
+        dict: same metrics as per_period.get_metric_group() for the
+        "networkx" group
+    """
+    aggregates: dict = {}
+    dev_metrics: dict = {}
+
+    for metric_name in INCREMENTAL_METRICS:
+        values: list = [node_metrics[metric_name][node] for node in range(len(userids))]
+        aggregates |= per_period.aggregate_node_metric(values, metric_name)
+
+        if developers:
+            dev_metrics[metric_name] = dict(zip(userids, values))
+
+    if developers:
+        aggregates["developers"] = dev_metrics
+
+    return aggregates
@@ -0,0 +1,361 @@
+"""
+Decayed period networks: snapshots of a graph whose edges fade with age.
+
+Rather than dropping every interaction at the end of a period, each edge
+of an issue conversation is weighted by 2 ** -(age / half life), where its
+age is the time from the issue's "closed_at" to the end of the snapshot.
+Snapshots are taken at a fixed cadence. The weights of one snapshot are
+carried into the next with a single multiply by the decay of one step,
+the next step's edges are added, and pairs whose weight has fallen below
+a threshold are pruned, so the graph of a snapshot stays bounded by the
+recent activity of the repository rather than by its whole history.
+
+Each snapshot graph has one edge per ordered pair of participants, with
+its decayed weight in a "weight" attribute. Constraint is weighted by it;
+betweenness, closeness and the NetworkX metrics see the surviving pairs.
+"""
+
+import datetime
+import functools
+import igraph
+import numpy
+from metrics_aggregator import cost_model, progress, scheduler
+from metrics_aggregator.improved import per_period
+from metrics_aggregator.utils import date_utils
+
+# defaults of the "decay" job options
+DEFAULT_HALF_LIFE_WEEKS: float = 12
+DEFAULT_SNAPSHOT_WEEKS: float = 12
+DEFAULT_THRESHOLD: float = 0.05
+
+# source vertices are shifted by this much to pack a pair into one int64
+PAIR_SHIFT: int = 32
+
+
+def get_decay_config(job: dict) -> dict:
+    """
+    Read the decay options of a job.
+
+    Args:
+        job (dict): job configuration, with optional "half_life_weeks",
+            "snapshot_weeks" and "decay_threshold" keys.
+
+    Raises:
+        ValueError: if an option is out of range.
+
+    Returns:
+        dict: {"half_life": seconds, "snapshot": datetime.timedelta,
+        "threshold": float}
+    """
+    half_life_weeks: float = float(job.get("half_life_weeks", DEFAULT_HALF_LIFE_WEEKS))
+    snapshot_weeks: float = float(job.get("snapshot_weeks", DEFAULT_SNAPSHOT_WEEKS))
+    threshold: float = float(job.get("decay_threshold", DEFAULT_THRESHOLD))
+
+    if half_life_weeks <= 0 or snapshot_weeks <= 0:
+        raise ValueError('"half_life_weeks" and "snapshot_weeks" must be positive')
+
+    if not 0 <= threshold < 1:
+        raise ValueError('"decay_threshold" must be in [0, 1)')
+
+    return {
+        "half_life": datetime.timedelta(weeks=half_life_weeks).total_seconds(),
+        "snapshot": datetime.timedelta(weeks=snapshot_weeks),
+        "threshold": threshold,
+    }
+
+
+def create_snapshot_issue_dict(records: dict, decay_cfg: dict) -> dict:
+    """
+    Partition issues into the steps between consecutive snapshots.
+
+    Args:
+        records (dict): issue records of a repository, see
+            ingest.project_issue_data().
+        decay_cfg (dict): output of get_decay_config().
+
+    Returns:
+        dict: {snapshot date string: list of issue nums closed since the
+        previous snapshot}, keyed like create_partitioned_issue_dict()
+    """
+    return per_period.create_partitioned_issue_dict(records, decay_cfg["snapshot"])
+
+
+def age_edges(pairs, weights, factor: float, new_pairs, new_weights, threshold: float) -> tuple:
+    """
+    Step decayed edge weights forward by one snapshot.
+
+    Args:
+        pairs (numpy.ndarray): sorted int64 packed pairs of the previous
+            snapshot, see pack_pairs().
+        weights (numpy.ndarray): float64 weight of each pair.
+        factor (float): decay of one step, 2 ** -(step / half life).
+        new_pairs (numpy.ndarray): int64 packed pair of each new edge,
+            repeats allowed.
+        new_weights (numpy.ndarray): float64 weight of each new edge.
+        threshold (float): pairs lighter than this are pruned.
+
+    Returns:
+        tuple: (sorted unique pairs, summed weights) of the new snapshot
+    """
+    pairs, inverse = numpy.unique(numpy.concatenate((pairs, new_pairs)), return_inverse=True)
+    weights = numpy.bincount(
+        inverse.ravel(), weights=numpy.concatenate((weights * factor, new_weights)), minlength=len(pairs)
+    )
+    keep = weights >= threshold
+
+    return pairs[keep], weights[keep]
+
+
+def pack_pairs(edges):
+    """
+    Pack (source, target) vertex pairs into single int64 keys.
+
+    Args:
+        edges (numpy.ndarray): int64 array of shape (edges, 2).
+
+    Returns:
+        numpy.ndarray: int64 key of each pair, ordered by source then target
+    """
+    return (edges[:, 0] << PAIR_SHIFT) | edges[:, 1]
+
+
+def unpack_pairs(pairs):
+    """
+    Unpack int64 keys from pack_pairs() into vertex pairs.
+
+    Args:
+        pairs (numpy.ndarray): int64 packed pairs.
+
+    Returns:
+        numpy.ndarray: int64 array of shape (pairs, 2)
+    """
+    return numpy.stack((pairs >> PAIR_SHIFT, pairs & ((1 << PAIR_SHIFT) - 1)), axis=1)
+
+
+def get_snapshot_edges(records: dict, snapshot_buckets: dict, decay_cfg: dict):
+    """
+    Walk the snapshots of a repository in order, aging its edges.
+
+    Args:
+        records (dict): issue records of a repository, see
+            ingest.project_issue_data().
+        snapshot_buckets (dict): output of create_snapshot_issue_dict().
+        decay_cfg (dict): output of get_decay_config().
+
+    Yields:
+        tuple: (snapshot date string, {"userids": interned userid of each
+        vertex, "edges": int32 array of shape (edges, 2), "weights":
+        float64 weight of each edge})
+    """
+    step: float = decay_cfg["snapshot"].total_seconds()
+    factor: float = 2 ** -(step / decay_cfg["half_life"])
+    issue_posters: dict = records["posters"]
+    closed_at: dict = dict(zip(issue_posters, records["closed_at"].tolist()))
+
+    vertices: dict = {}
+    pairs = numpy.empty(0, dtype=numpy.int64)
+    weights = numpy.empty(0, dtype=numpy.float64)
+
+    for snapshot, issue_nums in snapshot_buckets.items():
+        end: int = date_utils.to_epoch(datetime.datetime.strptime(snapshot, date_utils.ISO_FMT))
+        edges: list = []
+        ages: list = []
+        participants: set = set()
+
+        for num in issue_nums:
+            issue_edges: list = per_period.get_issue_edges(issue_posters[num], vertices)
+            participants.update(get_issue_vertices(issue_posters[num], vertices))
+            edges += issue_edges
+            ages += [end - closed_at[num]] * len(issue_edges)
+
+        pairs, weights = age_edges(
+            pairs,
+            weights,
+            factor,
+            pack_pairs(numpy.array(edges, dtype=numpy.int64).reshape(-1, 2)),
+            numpy.exp2(-numpy.array(ages, dtype=numpy.float64) / decay_cfg["half_life"]),
+            decay_cfg["threshold"],
+        )
+
+        yield snapshot, make_snapshot(list(vertices), pairs, weights, participants)
+
+
+def get_issue_vertices(posters: tuple, vertices: dict) -> list:
+    """
+    Get the vertex of every participant of an issue.
+
+    Args:
+        posters (tuple): userid of the author of each post of the issue.
+        vertices (dict): {userid: vertex index} including the issue's
+            participants, see per_period.get_issue_edges().
+
+    Returns:
+        list: vertex indices
+    """
+    return [vertices[userid] for userid in posters]
+
+
+def make_snapshot(userids: list, pairs, weights, participants: set) -> dict:
+    """
+    Renumber the surviving edges of a snapshot onto its own vertices.
+
+    The vertices of a snapshot are the endpoints of its surviving edges and
+    the participants of its own issues, in order of first appearance in
+    the repository.
+
+    Args:
+        userids (list): interned userid of each repository-wide vertex.
+        pairs (numpy.ndarray): packed pairs of the surviving edges.
+        weights (numpy.ndarray): weight of each pair.
+        participants (set): repository-wide vertices of the snapshot's
+            issues.
+
+    Returns:
+        dict: {"userids": list, "edges": numpy.ndarray, "weights":
+        numpy.ndarray}
+    """
+    edges = unpack_pairs(pairs)
+    snapshot_vertices = numpy.union1d(edges.ravel(), numpy.fromiter(participants, dtype=numpy.int64))
+
+    return {
+        "userids": [userids[vertex] for vertex in snapshot_vertices.tolist()],
+        "edges": numpy.searchsorted(snapshot_vertices, edges).astype(numpy.int32),
+        "weights": weights,
+    }
+
+
+def make_snapshot_graph(snapshot: dict) -> igraph.Graph:
+    """
+    Build the graph of a snapshot.
+
+    Args:
+        snapshot (dict): output of make_snapshot().
+
+    Returns:
+        igraph.Graph: graph in the same form as
+        per_period.make_igraph_period_network_matrix(), with one edge per
+        pair and a "weight" edge attribute
+    """
+    graph = igraph.Graph(
+        n=len(snapshot["userids"]),
+        edges=snapshot["edges"].tolist(),
+        directed=True,
+        edge_attrs={"weight": snapshot["weights"].tolist()},
+    )
+    graph["userids"] = snapshot["userids"]
+
+    return graph
+
+
+def estimate_snapshot_costs(issue_posters: dict, snapshot_buckets: dict, snapshots: dict, coefficients: dict) -> dict:
+    """
+    Predict the cost of computing the metrics of every snapshot.
+
+    Args:
+        issue_posters (dict): {issue num: posters} of all issues in a
+            repository.
+        snapshot_buckets (dict): output of create_snapshot_issue_dict().
+        snapshots (dict): {snapshot date string: output of make_snapshot()}
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        dict: same layout as per_period.estimate_period_costs()
+    """
+    snapshot_costs: dict = {}
+
+    for snapshot, issue_nums in snapshot_buckets.items():
+        num_vertices: int = len(snapshots[snapshot]["userids"])
+        edges = snapshots[snapshot]["edges"]
+        degrees = numpy.bincount(edges.ravel(), minlength=num_vertices).astype(numpy.float64)
+
+        features: dict = {
+            "issues": len(issue_nums),
+            "comments": sum(len(issue_posters[num]) - 1 for num in issue_nums),
+            "vertices": num_vertices,
+            "edges": len(edges),
+            "degree_squares": float((degrees**2).sum()),
+            "degree_cubes": float((degrees**3).sum()),
+        }
+
+        snapshot_costs[snapshot] = {
+            "seconds": cost_model.estimate_phase_costs(features, coefficients),
+            "memory": cost_model.estimate_period_memory(features),
+            "features": features,
+        }
+
+    return snapshot_costs
+
+
+def make_decay_tasks(
+    repo: str,
+    issue_posters: dict,
+    snapshots: dict,
+    pending: dict,
+    snapshot_costs: dict,
+    on_period,
+    options: dict | None = None,
+) -> list:
+    """
+    Create one scheduler task per pending snapshot of a repository.
+
+    Args:
+        repo (str): name of the repository the snapshots belong to.
+        issue_posters (dict): {issue num: posters}, see ingest.py.
+        snapshots (dict): {snapshot date string: output of make_snapshot()}
+        pending (dict): {snapshot date string: list of issue nums} of the
+            snapshots to compute.
+        snapshot_costs (dict): output of estimate_snapshot_costs().
+        on_period (callable): called with (snapshot str, dict of metrics)
+            as soon as a snapshot's task has finished.
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None. Graphs are not exported.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks()
+    """
+    return [
+        scheduler.make_task(
+            repo,
+            snapshot,
+            "all",
+            cost_model.get_total_cost(snapshot_costs[snapshot]["seconds"]),
+            gather_snapshot_metrics,
+            ({num: issue_posters[num] for num in issue_nums}, issue_nums, snapshots[snapshot], options),
+            functools.partial(on_period, snapshot),
+            snapshot_costs[snapshot]["memory"],
+        )
+        for snapshot, issue_nums in pending.items()
+    ]
+
+
+def gather_snapshot_metrics(
+    issue_posters: dict,
+    issue_nums: list,
+    snapshot: dict,
+    options: dict | None = None,
+) -> dict:
+    """
+    Gather all communication metrics for one decayed snapshot.
+
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the
+            snapshot's own issues.
+        issue_nums (list): issue nums closed since the previous snapshot.
+        snapshot (dict): output of make_snapshot().
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None.
+
+    Returns:
+        dict: dict of metrics for the snapshot, in the same form as a period
+    """
+    options = options or per_period.PERIOD_OPTIONS
+    graph: igraph.Graph = make_snapshot_graph(snapshot)
+
+    progress.report_phase("decayed metrics")
+
+    parts: dict = {
+        group: per_period.get_metric_group(graph, issue_posters, issue_nums, group, options)
+        for group in per_period.METRIC_GROUPS
+    }
+
+    return per_period.merge_period_parts(parts, issue_posters, issue_nums, options["developers"])
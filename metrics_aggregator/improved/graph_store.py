@@ -0,0 +1,258 @@
+"""
+Store period graphs as compact binary edge lists and compute metrics from them.
+
+A graph directory holds one uncompressed NumPy .npz archive per period:
+    period: period key
+    keys: issue nums of the period
+    userids: userid of each vertex, as JSON where json_userids is set
+    json_userids: True for vertices whose userid is not a string, e.g. null
+        for deleted accounts, see userids.pack_userids()
+    edges: int32 array of shape (edges, 2) of vertex pairs
+    participants: int32 vertices of each issue's participants, one issue
+        after another
+    offsets: int64 start of each issue's participants, plus one end offset
+
+Everything the period metrics need is in the archive, so a later run can
+compute them without reading extractor output or rebuilding graphs from
+issue data, e.g. to try out a new metric on the graphs of an earlier run.
+"""
+
+import functools
+import os
+import igraph
+import numpy
+from metrics_aggregator import checkpoint, cost_model, progress, scheduler, userids
+from metrics_aggregator.improved import per_period
+
+
+def get_period_graph_path(graph_dir: str, period: str) -> str:
+    """
+    Get the path of a period's stored graph.
+
+    Args:
+        graph_dir (str): path to graph directory.
+        period (str): period key.
+
+    Returns:
+        str: path to graph file
+    """
+    return os.path.join(graph_dir, f"{checkpoint.get_period_file_name(period)}.npz")
+
+
+def write_period_graph(graph_dir: str, userid_table: list, period: str, issue_nums: list, export: dict) -> None:
+    """
+    Write the graph of a period, replacing any earlier one only once complete.
+
+    Args:
+        graph_dir (str): path to graph directory.
+        userid_table (list): userid of each interned id.
+        period (str): period key.
+        issue_nums (list): issue nums of the period.
+        export (dict): output of per_period.export_period_graph().
+    """
+    vseq: list = [userids.get_userid(userid_table, userid) for userid in export["vertices"]]
+    out_path: str = get_period_graph_path(graph_dir, period)
+    tmp_path: str = f"{out_path}.tmp"
+
+    os.makedirs(graph_dir, exist_ok=True)
+
+    with open(tmp_path, "wb") as fptr:
+        numpy.savez(
+            fptr,
+            period=numpy.array(period),
+            keys=numpy.array(issue_nums, dtype=str),
+            **userids.pack_userids(vseq),
+            edges=export["edges"],
+            participants=export["participants"],
+            offsets=export["offsets"],
+        )
+
+    os.replace(tmp_path, out_path)
+
+
+def read_period_graph(in_path: str) -> dict:
+    """
+    Read a stored period graph.
+
+    Args:
+        in_path (str): path to graph file.
+
+    Returns:
+        dict: {"period", "keys", "userids", "edges", "participants",
+        "offsets"}, with userids of the type they had in the input
+    """
+    with numpy.load(in_path) as archive:
+        return {
+            "period": str(archive["period"]),
+            "keys": archive["keys"].tolist(),
+            "userids": userids.unpack_userids(archive["userids"], archive["json_userids"]),
+            "edges": archive["edges"],
+            "participants": archive["participants"],
+            "offsets": archive["offsets"],
+        }
+
+
+def read_graph_index(graph_dir: str) -> dict:
+    """
+    List the stored period graphs of a graph directory.
+
+    Args:
+        graph_dir (str): path to graph directory.
+
+    Returns:
+        dict: {period key: list of issue nums}, in period order
+    """
+    index: dict = {}
+
+    for file_name in os.listdir(graph_dir):
+        if not file_name.endswith(".npz"):
+            continue
+
+        with numpy.load(os.path.join(graph_dir, file_name)) as archive:
+            index[str(archive["period"])] = archive["keys"].tolist()
+
+    return dict(sorted(index.items()))
+
+
+def make_stored_graph(stored: dict) -> tuple:
+    """
+    Rebuild a period's graph, and the issue posters its metrics need.
+
+    Each vertex's index stands in for its interned id, so that the stored
+    userids are the table to restore them with.
+
+    Args:
+        stored (dict): output of read_period_graph().
+
+    Returns:
+        tuple: (igraph.Graph in the same form as
+        per_period.make_igraph_period_network_matrix(), {issue num: tuple
+        of the vertex of each participant of each issue})
+    """
+    vseq: list = list(range(len(stored["userids"])))
+    graph = igraph.Graph(n=len(vseq), edges=stored["edges"].tolist(), directed=True)
+    graph["userids"] = vseq
+
+    offsets: list = stored["offsets"].tolist()
+    participants: list = stored["participants"].tolist()
+    issue_posters: dict = {
+        num: tuple(vseq[vertex] for vertex in participants[offsets[index] : offsets[index + 1]])
+        for index, num in enumerate(stored["keys"])
+    }
+
+    return graph, issue_posters
+
+
+def estimate_stored_costs(graph_dir: str, pending: dict, coefficients: dict) -> dict:
+    """
+    Predict the cost of computing the metrics of stored period graphs.
+
+    The number of comments of a period is not stored, so the number of
+    issue participants stands in for it.
+
+    Args:
+        graph_dir (str): path to graph directory.
+        pending (dict): {period key: list of issue nums} to compute.
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        dict: same layout as per_period.estimate_period_costs()
+    """
+    period_costs: dict = {}
+
+    for period, issue_nums in pending.items():
+        with numpy.load(get_period_graph_path(graph_dir, period)) as archive:
+            num_vertices: int = len(archive["userids"])
+            edges = archive["edges"]
+            num_participants: int = len(archive["participants"])
+
+        degrees = numpy.bincount(edges.ravel(), minlength=num_vertices)
+        degrees = numpy.minimum(degrees, max(num_vertices - 1, 0)).astype(numpy.float64)
+
+        features: dict = {
+            "issues": len(issue_nums),
+            "comments": num_participants,
+            "vertices": num_vertices,
+            "edges": len(edges),
+            "degree_squares": float((degrees**2).sum()),
+            "degree_cubes": float((degrees**3).sum()),
+        }
+
+        period_costs[period] = {
+            "seconds": cost_model.estimate_phase_costs(features, coefficients),
+            "memory": cost_model.estimate_period_memory(features),
+            "features": features,
+        }
+
+    return period_costs
+
+
+def make_stored_graph_tasks(
+    repo: str,
+    graph_dir: str,
+    pending: dict,
+    period_costs: dict,
+    on_period,
+    options: dict | None = None,
+) -> list:
+    """
+    Create one scheduler task per stored period graph.
+
+    Workers read their period's graph themselves, so only its path is sent.
+
+    Args:
+        repo (str): name of the repository the periods belong to.
+        graph_dir (str): path to graph directory.
+        pending (dict): {period key: list of issue nums} to compute.
+        period_costs (dict): output of estimate_stored_costs().
+        on_period (callable): called with (period str, dict of metrics) as
+            soon as a period's task has finished.
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None. Graphs are not exported again.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks()
+    """
+    return [
+        scheduler.make_task(
+            repo,
+            period,
+            "all",
+            cost_model.get_total_cost(period_costs[period]["seconds"]),
+            gather_stored_period_metrics,
+            (get_period_graph_path(graph_dir, period), options),
+            functools.partial(on_period, period),
+            period_costs[period]["memory"],
+        )
+        for period in pending
+    ]
+
+
+def gather_stored_period_metrics(in_path: str, options: dict | None = None) -> dict:
+    """
+    Gather all communication metrics for one stored period graph.
+
+    Args:
+        in_path (str): path to graph file.
+        options (dict | None): output of per_period.get_period_options();
+            per_period.PERIOD_OPTIONS if None.
+
+    Returns:
+        dict: dict of metrics for period, as from
+        per_period.gather_single_period_comm_metrics(), with userids
+        restored, see userids.restore_period_userids()
+    """
+    options = options or per_period.PERIOD_OPTIONS
+    stored: dict = read_period_graph(in_path)
+    graph, issue_posters = make_stored_graph(stored)
+
+    progress.report_phase("stored graph metrics")
+
+    parts: dict = {
+        group: per_period.get_metric_group(graph, issue_posters, stored["keys"], group, options)
+        for group in per_period.METRIC_GROUPS
+    }
+
+    return userids.restore_period_userids(
+        stored["userids"], per_period.merge_period_parts(parts, issue_posters, stored["keys"], options["developers"])
+    )
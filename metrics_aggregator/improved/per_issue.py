@@ -1,40 +1,47 @@
 """TODO."""
+import functools
+import math
 import igraph
+import numpy
+from metrics_aggregator import checkpoint, cost_model, ingest, scheduler, userids
 
 
-def gather_all_issue_comm_metrics(issue_data: dict) -> dict:
+def gather_all_issue_comm_metrics(issue_records: dict, non_users: frozenset = frozenset()) -> dict:
     """
     Gather per-issue metrics from repo data.
 
     Args:
-        issue_data (dict): dictionary of {issue_num: issue_data} key pairs.
+        issue_records (dict): {issue num: (word count, posters)}, see
+            ingest.get_issue_records().
+        non_users (frozenset): interned ids of userids that are not
+            strings, which do not count as discussants, see
+            userids.get_non_string_ids().
 
     Returns:
         dict of dicts: {issue_num: {issue_metrics}}
 
     """
     per_issue_metrics: dict = {}
+    all_network_props: list = get_bulk_network_props([posters for _, posters in issue_records.values()])
 
-    for issue, data in issue_data.items():
-        comm_context = get_comm_context(data)
-        network_props = get_comm_network_props(data)
+    for (issue, (wordiness, posters)), network_props in zip(issue_records.items(), all_network_props):
+        comm_context = get_comm_context(posters, wordiness, non_users)
 
         per_issue_metrics[issue] = {**comm_context, **network_props}
 
     return per_issue_metrics
 
 
-def get_comm_context(data: dict) -> dict:
+def get_comm_context(posters: tuple, wordiness: int, non_users: frozenset = frozenset()) -> dict:
     return {
-        "num_comments": len(list(data["comments"])),
-        "num_discussants": len(get_unique_discussants(data)),
-        "wordiness": get_issue_wordiness(data),
+        "num_comments": max(len(posters) - 1, 0),
+        "num_discussants": len(get_unique_discussants(posters, non_users)),
+        "wordiness": wordiness,
     }
 
 
-def get_comm_network_props(data: dict) -> dict:
-    graph = igraph.Graph(directed=True)
-    graph = make_igraph_issue_network_matrix(data, graph)
+def get_comm_network_props(posters: tuple) -> dict:
+    graph = make_igraph_issue_network_matrix(posters)
 
     return {
         "edges": graph.ecount(),
@@ -44,99 +51,163 @@ def get_comm_network_props(data: dict) -> dict:
     }
 
 
-def make_igraph_issue_network_matrix(cur_issue: dict, graph: igraph.Graph) -> igraph.Graph:
+def get_bulk_network_props(all_posters: list) -> list:
     """
-    Create an adjacency matrix for participants in one issue conversation.
+    Get the network properties of many issue conversations at once.
 
     Notes:
-        This functionality requires:
-            - userid
-            - issue comments
-                - userid
+        Each post gains an edge to every earlier post by someone else, so
+        an issue's graph has an edge from u to w exactly when u's last post
+        comes after w's first post. From u, one step therefore reaches
+        every participant whose first post comes before u's last post, and
+        each further step reaches every participant whose first post comes
+        before the latest last post of those reached so far. The
+        eccentricity of u is the number of steps that reach someone new,
+        and the diameter of an issue is the largest eccentricity of its
+        participants.
+
+        Participants of every issue are laid out one issue after another,
+        by first post, so each step is one binary search and one lookup
+        of a running maximum for all participants of all issues together.
+        Steps never reach into another issue, since an earlier issue's
+        last posts all come before the current issue's first post. The
+        number of steps is the largest diameter of any issue, and no
+        graph is built.
 
     Args:
-        cur_issue (dict):
-        cur_graph (igraph.Graph):
+        all_posters (list): posters of each issue, see
+            make_igraph_issue_network_matrix().
 
     Returns:
-        igraph.Graph: graph object update with nodes and edges from the
-        conversation that transpired in the given issue parameter
+        list: {"edges", "vertices", "density", "diameter"} of each issue,
+        the same as get_comm_network_props()
     """
-    # TODO: can use sets?
-    issue_nodes: list = []
-    edges: list = []
-
-    # idempotently add the original poster of the issue
-    cur_vertex, graph = idempotent_add(cur_issue["userid"], graph)
-    issue_nodes.append(cur_vertex)
-
-    for _, comment in cur_issue["comments"].items():
-        # idempotently add each commenter
-        cur_vertex, graph = idempotent_add(comment["userid"], graph)
-        issue_nodes.append(cur_vertex)
-
-        edges.extend(
-            (cur_vertex, present_vertex)
-            for present_vertex in issue_nodes
-            if cur_vertex["name"] != present_vertex["name"]
-        )
-
-    graph.add_edges(edges)
-
-    return graph
-
-
-def idempotent_add(userid, graph):
+    first_posts: list = []
+    last_posts: list = []
+    vertex_starts: list = []
+    edge_counts: list = []
+    position: int = 0
+
+    for posters in all_posters:
+        vertex_starts.append(len(first_posts))
+        vertices: dict = {}
+        post_counts: dict = {}
+        num_edges: int = 0
+
+        for i, userid in enumerate(posters, start=1):
+            if userid not in vertices:
+                vertices[userid] = len(first_posts)
+                first_posts.append(position)
+                last_posts.append(position)
+
+            last_posts[vertices[userid]] = position
+            post_counts[userid] = post_counts.get(userid, 0) + 1
+            num_edges += i - post_counts[userid]
+            position += 1
+
+        edge_counts.append(num_edges)
+
+    first = numpy.array(first_posts, dtype=numpy.int64)
+    reach = numpy.array(last_posts, dtype=numpy.int64)
+    sizes = numpy.diff(numpy.array(vertex_starts + [len(first_posts)], dtype=numpy.int64))
+    issue_start = numpy.repeat(numpy.array(vertex_starts, dtype=numpy.int64), sizes)
+    latest_last = numpy.maximum.accumulate(reach) if len(reach) else reach
+    eccentricity = numpy.zeros(len(first), dtype=numpy.int64)
+    reached_before = numpy.zeros(len(first), dtype=numpy.int64)
+
+    while True:
+        num_before = numpy.searchsorted(first, reach)
+
+        # participants other than u itself with a first post before reach
+        reached = num_before - issue_start - (first < reach)
+        eccentricity += reached > reached_before
+
+        next_reach = numpy.maximum(reach, numpy.where(num_before > 0, latest_last[num_before - 1], 0))
+
+        if numpy.array_equal(next_reach, reach):
+            break
+
+        reach, reached_before = next_reach, reached
+
+    diameters: list = [math.nan] * len(sizes)
+    nonempty = numpy.flatnonzero(sizes)
+
+    if len(nonempty):
+        issue_diameters = numpy.maximum.reduceat(eccentricity, numpy.array(vertex_starts, dtype=numpy.int64)[nonempty])
+
+        for index, diameter in zip(nonempty.tolist(), issue_diameters.tolist()):
+            diameters[index] = diameter
+
+    return [
+        {
+            "edges": num_edges,
+            "vertices": num_vertices,
+            "density": num_edges / (num_vertices * (num_vertices - 1)) if num_vertices > 1 else math.nan,
+            "diameter": diameter,
+        }
+        for num_edges, num_vertices, diameter in zip(edge_counts, sizes.tolist(), diameters)
+    ]
+
+
+def make_igraph_issue_network_matrix(posters: tuple) -> igraph.Graph:
     """
-    TODO: update name, finish docstring.
+    Create an adjacency matrix for participants in one issue conversation.
 
     Args:
-        userid ():
-        graph ():
+        posters (tuple): userid of the author of each post of one issue,
+            interned or not, starting with the issue itself.
 
     Returns:
-        vertex_obj:
-        graph:
+        igraph.Graph: graph with nodes and edges from the conversation that
+        transpired in the given issue parameter
     """
-    try:
-        vertex_obj = graph.vs.find(name=userid)
-
-    except ValueError:
-        vertex_obj = graph.add_vertex(name=userid)
+    vertices: dict = {}
+    issue_nodes: list = []
+    edges: list = []
 
-    return vertex_obj, graph
+    for userid in posters:
+        cur_vertex: int = vertices.setdefault(userid, len(vertices))
+        edges.extend((cur_vertex, present_vertex) for present_vertex in issue_nodes if cur_vertex != present_vertex)
+        issue_nodes.append(cur_vertex)
 
+    return igraph.Graph(n=len(vertices), edges=edges, directed=True)
 
 
-def get_unique_discussants(issue_dict: dict) -> list:
+def get_unique_discussants(posters: tuple, non_users: frozenset = frozenset()) -> list:
     """
     Create set of discussants in a dictionary of comments on an issue.
 
     TODO:
-    :param issuecmmnt_dict:
-    :type issuecmmnt_dict: dict
+    :param posters: userid of the author of each post of an issue
+    :type posters: tuple
+    :param non_users: interned ids that are not discussants
+    :type non_users: frozenset
     :return:
     :rtype:
     """
-    discussant_list = get_discussants_list(issue_dict)
+    discussant_list = get_discussants_list(posters, non_users)
 
     discussants_set = list(dict.fromkeys(discussant_list))
 
     return discussants_set
 
 
-def get_discussants_list(issue_dict: dict) -> list[str]:
+def get_discussants_list(posters: tuple, non_users: frozenset = frozenset()) -> list:
     """
     TODO.
 
-    :param issue_dict:
-    :type issue_dict: dict
+    :param posters: userid of the author of each post of an issue
+    :type posters: tuple
+    :param non_users: interned ids that are not discussants
+    :type non_users: frozenset
     :return: list of discussants in issue, including original poster
     :rtype: list
     """
-    id_list = [issue_dict["userid"]]
+    id_list = list(posters[:1])
 
-    id_list += [comment["userid"] for comment in issue_dict["comments"].values() if isinstance(comment["userid"], str)]
+    # as in the standard engine, only commenters with a string userid are
+    # discussants: not null, e.g. a deleted account, nor a numeric id
+    id_list += [userid for userid in posters[1:] if userid is not None and userid not in non_users]
 
     return id_list
 
@@ -165,3 +236,49 @@ def get_issue_wordiness(issue_dict: dict) -> int:
         sum_wc += len(split_body)
 
     return sum_wc
+
+
+def make_issue_shard_tasks(
+    name: str, records: dict, shards: list, ckpt_dir: str, resume: bool, coefficients: dict, first_index: int = 0
+) -> list:
+    """
+    Create one scheduler task per unfinished shard of per-issue metrics.
+
+    Args:
+        name (str): name of the repository.
+        records (dict): issue records of the repository, see
+            ingest.project_issue_data().
+        shards (list): output of checkpoint.get_issue_shards().
+        ckpt_dir (str): path to checkpoint directory of the repository.
+        resume (bool): skip shards checkpointed by an earlier run.
+        coefficients (dict): cost model coefficients.
+        first_index (int): index of the first of shards, when a
+            repository's shards are made a few at a time.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks()
+    """
+    tasks: list = []
+
+    for index, issue_nums in enumerate(shards, start=first_index):
+        if resume and checkpoint.has_issue_shard(ckpt_dir, index, issue_nums):
+            continue
+
+        shard_records: dict = ingest.get_issue_records(records, issue_nums)
+        non_users: frozenset = userids.get_non_string_ids(
+            records["userids"], (userid for _, posters in shard_records.values() for userid in posters)
+        )
+
+        tasks.append(
+            scheduler.make_task(
+                name,
+                "per_issue",
+                index,
+                cost_model.estimate_issue_shard_cost(shard_records, coefficients),
+                gather_all_issue_comm_metrics,
+                (shard_records, non_users),
+                functools.partial(checkpoint.write_issue_shard, ckpt_dir, index, issue_nums),
+            )
+        )
+
+    return tasks
@@ -1,63 +1,417 @@
 """Tools for gathering metrics about the communicators in a repo's issues."""
 
-from concurrent import futures
-from datetime import datetime, timedelta
+import datetime
+import functools
 import math
+import random
+import time
 import igraph
 import networkx
+import numpy
+from metrics_aggregator import __betweenness as brandes
 from metrics_aggregator import __hierarchy as hierarchy
+from metrics_aggregator import budgets, cost_model, progress, scheduler
+from metrics_aggregator.improved import sparse_metrics
+from metrics_aggregator.utils import date_utils
 
 
 TAB = " " * 4
 
+# groups of metrics that can be computed independently of each other
+METRIC_GROUPS: tuple = ("period_issue", "igraph", "networkx")
 
-def gather_all_period_comm_metrics(issue_data: dict) -> dict:
+# sources sampled to approximate betweenness once its budget runs out
+APPROX_SOURCES: int = 64
+APPROX_SEED: int = 0
+
+# hops closeness is limited to once its budget runs out
+APPROX_CUTOFF: int = 2
+
+# graphs the structural hole metrics run on, see get_graph_semantics()
+GRAPH_SEMANTICS: tuple = ("directed", "undirected")
+
+# implementations of the structural hole metrics, see get_metric_backend()
+METRIC_BACKENDS: tuple = ("igraph", "sparse")
+
+# options of the period tasks of a job, see get_period_options()
+PERIOD_OPTIONS: dict = {
+    "developers": False,
+    "export_graph": False,
+    "metric_budgets": None,
+    "semantics": "directed",
+    "backend": "igraph",
+}
+
+
+def get_memory_budget(cfg: dict) -> int | None:
+    """
+    Get the most memory the tasks in flight may use at once.
+
+    Args:
+        cfg (dict): run configuration; "memory_budget_mb" sets the budget.
+
+    Returns:
+        int | None: budget in bytes, or None if unbounded
+    """
+    if cfg.get("memory_budget_mb") is None:
+        return None
+
+    return int(cfg["memory_budget_mb"] * 2**20)
+
+
+def get_graph_semantics(cfg: dict) -> str:
+    """
+    Get the graph the structural hole metrics of a run are computed on.
+
+    Notes:
+        "directed": the period's directed graph, with an edge for every
+        reply. igraph's constraint sums the replies between a pair in both
+        directions, while NetworkX weighs a pair by whether it replied in
+        either direction and counts every reply toward a vertex's degree.
+
+        "undirected": one undirected edge per pair, weighted by all of its
+        replies. Constraint is the same as on the directed graph up to
+        rounding. Effective size, efficiency and hierarchy see each pair
+        once, so a vertex's degree is its number of contacts, and they run
+        on a much smaller graph.
+
+        Betweenness and closeness always use the directed graph.
+
+    Args:
+        cfg (dict): run or job configuration; "graph_semantics" is one of
+            GRAPH_SEMANTICS.
+
+    Raises:
+        ValueError: if "graph_semantics" is not one of GRAPH_SEMANTICS.
+
+    Returns:
+        str: one of GRAPH_SEMANTICS
+    """
+    semantics: str = cfg.get("graph_semantics", "directed")
+
+    if semantics not in GRAPH_SEMANTICS:
+        raise ValueError(f'Unknown "graph_semantics" {semantics!r}, expected one of {GRAPH_SEMANTICS}')
+
+    return semantics
+
+
+def get_metric_backend(cfg: dict) -> str:
     """
-    Create a dictionary of metrics for all issues in a dictionary of issues.
+    Get the implementation of the structural hole metrics of a run.
 
     Notes:
-        This functionality requires:
-            - issue number
-            - closure date
-            - userid
-            - issue comments
-                - userid
-                - comment body
+        "igraph": constraint from igraph, and effective size, efficiency
+        and hierarchy from NetworkX, on a copy of the graph converted to
+        NetworkX.
+
+        "sparse": all four from the graph's sparse adjacency, see
+        sparse_metrics.py. Values are the same up to rounding, and the
+        NetworkX metrics run tens of times faster.
+
+        Betweenness and closeness always come from igraph, and the
+        incremental NetworkX walk of cumulative periods always from
+        NetworkX.
 
     Args:
-        issue_data (dict): dict of data about all issues of interest in a
-        repository's history.
+        cfg (dict): run or job configuration; "metric_backend" is one of
+            METRIC_BACKENDS.
+
+    Raises:
+        ValueError: if "metric_backend" is not one of METRIC_BACKENDS.
 
     Returns:
-        dict: {period str: dict of metrics from graph of "conversation" for
-                period key}
+        str: one of METRIC_BACKENDS
     """
-    res: dict = {}
-    workers: int = 10
+    backend: str = cfg.get("metric_backend", "igraph")
+
+    if backend not in METRIC_BACKENDS:
+        raise ValueError(f'Unknown "metric_backend" {backend!r}, expected one of {METRIC_BACKENDS}')
+
+    return backend
+
+
+def get_period_options(job: dict) -> dict:
+    """
+    Get the options the period tasks of a job are computed with.
+
+    Args:
+        job (dict): job configuration.
+
+    Raises:
+        ValueError: if "metric_budgets_s", "graph_semantics" or
+            "metric_backend" is invalid.
+
+    Returns:
+        dict: PERIOD_OPTIONS of the job: "developers" to also return the
+        node-level metrics of every developer under a "developers" key,
+        "export_graph" to also return the graph under a "graph" key, see
+        export_period_graph(), "metric_budgets" from
+        budgets.get_metric_budgets(), "semantics" from
+        get_graph_semantics() and "backend" from get_metric_backend()
+    """
+    return {
+        "developers": bool(job.get("developer_out_path")),
+        "export_graph": bool(job.get("graph_out_dir")),
+        "metric_budgets": budgets.get_metric_budgets(job),
+        "semantics": get_graph_semantics(job),
+        "backend": get_metric_backend(job),
+    }
 
-    print(f"\n{TAB}Partitioning issues into temporal periods...")
-    issue_buckets: dict = create_partitioned_issue_dict(issue_data)
-    print(f"{TAB*2}- {len(issue_data.keys())} keys")
-    print(f"{TAB*2}- {len(issue_buckets.keys())} buckets\n")
 
-    with futures.ProcessPoolExecutor(max_workers=workers) as executor:
-        for period, issue_nums in issue_buckets.items():
-            print(f"{TAB}Launching #{period}: {len(issue_nums)} issues...")
-            res |= {
-                period: executor.submit(
+def estimate_period_costs(issue_posters: dict, issue_buckets: dict, coefficients: dict) -> dict:
+    """
+    Predict the cost of every metric group of every period.
+
+    Args:
+        issue_posters (dict): {issue num: posters} of all issues in a
+            repository, see ingest.py.
+        issue_buckets (dict): {period str: list of issue nums}
+        coefficients (dict): cost model coefficients.
+
+    Returns:
+        dict: {period str: {"seconds": {metric group: predicted seconds},
+                            "memory": predicted bytes of a task,
+                            "features": cost model features of the period}}
+    """
+    period_costs: dict = {}
+
+    for period, issue_nums in issue_buckets.items():
+        features: dict = cost_model.get_period_features(issue_posters, issue_nums)
+
+        period_costs[period] = {
+            "seconds": cost_model.estimate_phase_costs(features, coefficients),
+            "memory": cost_model.estimate_period_memory(features),
+            "features": features,
+        }
+
+    return period_costs
+
+
+def get_period_work(repo: str, period_costs: dict) -> dict:
+    """
+    Get the size of every period of a repository, for progress reporting.
+
+    Args:
+        repo (str): name of the repository.
+        period_costs (dict): output of estimate_period_costs(), or of an
+            estimate with the same layout.
+
+    Returns:
+        dict: {(repo, period): {"issues": int, "edges": int}}
+    """
+    return {
+        (repo, period): {"issues": costs["features"]["issues"], "edges": costs["features"]["edges"]}
+        for period, costs in period_costs.items()
+    }
+
+
+def get_split_cost(all_period_costs: list, workers: int) -> float:
+    """
+    Get the cost above which a period is split into one task per group.
+
+    A period that costs more than an even share of the whole run would
+    otherwise keep one worker busy after all others have finished.
+
+    Args:
+        all_period_costs (list): outputs of estimate_period_costs() for
+            every repository sharing the process pool.
+        workers (int): number of worker processes.
+
+    Returns:
+        float: predicted seconds
+    """
+    total_cost: float = sum(
+        cost_model.get_total_cost(costs["seconds"])
+        for period_costs in all_period_costs
+        for costs in period_costs.values()
+    )
+
+    return total_cost / workers
+
+
+def make_period_tasks(
+    repo: str,
+    issue_posters: dict,
+    issue_buckets: dict,
+    period_costs: dict,
+    split_cost: float,
+    on_period,
+    options: dict | None = None,
+    max_chunks: int = 1,
+) -> list:
+    """
+    Create the scheduler tasks for all periods of a repository.
+
+    Each task only carries the issues of its own period so that workers do
+    not receive a copy of the whole repository. Periods predicted to cost
+    more than split_cost get one task per metric group so that their
+    betweenness and NetworkX metrics run on separate workers. With
+    max_chunks above 1, a group that still costs more than split_cost is
+    further split across its vertices into up to max_chunks tasks.
+
+    Args:
+        repo (str): name of the repository the periods belong to.
+        issue_posters (dict): {issue num: posters} of all issues in a
+            repository, see ingest.py.
+        issue_buckets (dict): {period str: list of issue nums} of the
+            periods to compute.
+        period_costs (dict): output of estimate_period_costs().
+        split_cost (float): output of get_split_cost().
+        on_period (callable): called with (period str, dict of metrics) as
+            soon as all tasks of a period have finished.
+        options (dict | None): output of get_period_options();
+            PERIOD_OPTIONS if None. Each task applies the metric budgets to
+            the metrics it computes.
+        max_chunks (int): most tasks one metric group may be split into.
+
+    Returns:
+        list: task dicts for scheduler.run_tasks()
+    """
+    options = options or PERIOD_OPTIONS
+    tasks: list = []
+
+    for period, issue_nums in issue_buckets.items():
+        period_data: dict = {num: issue_posters[num] for num in issue_nums}
+        total_cost: float = cost_model.get_total_cost(period_costs[period]["seconds"])
+        memory: int = period_costs[period]["memory"]
+
+        if total_cost <= split_cost:
+            tasks.append(
+                scheduler.make_task(
+                    repo,
+                    period,
+                    "all",
+                    total_cost,
                     gather_single_period_comm_metrics,
-                    issue_data,
-                    issue_nums,
-                    period
+                    (period_data, issue_nums, options),
+                    functools.partial(on_period, period),
+                    memory,
                 )
-            }
+            )
+            continue
+
+        period_tasks: list = []
+
+        for group in METRIC_GROUPS:
+            group_cost: float = period_costs[period]["seconds"][group]
+            num_chunks: int = min(max_chunks, math.ceil(group_cost / split_cost))
+
+            if num_chunks <= 1:
+                period_tasks.append(
+                    scheduler.make_task(
+                        repo,
+                        period,
+                        group,
+                        group_cost,
+                        gather_period_metric_group,
+                        (period_data, issue_nums, group, options),
+                        memory=memory,
+                    )
+                )
+                continue
+
+            period_tasks += [
+                scheduler.make_task(
+                    repo,
+                    period,
+                    (group, chunk, num_chunks),
+                    group_cost / num_chunks,
+                    gather_period_metric_chunk,
+                    (period_data, issue_nums, group, chunk, num_chunks, options),
+                    memory=memory,
+                )
+                for chunk in range(num_chunks)
+            ]
 
-        res = {period: f.result() for (period, f) in res.items()}
+        tasks += add_part_collector(period_tasks, period_data, issue_nums, on_period, options["developers"])
+
+    return tasks
+
+
+def add_part_collector(
+    period_tasks: list, period_data: dict, issue_nums: list, on_period, developers: bool = False
+) -> list:
+    """
+    Merge the results of a split period's tasks once all of them finish.
+
+    Args:
+        period_tasks (list): tasks of one period, one per group or chunk.
+        period_data (dict): {issue num: posters} for the period.
+        issue_nums (list): issue nums in the period.
+        on_period (callable): called with (period str, dict of metrics).
+        developers (bool): keep the node-level metrics of every developer.
+
+    Returns:
+        list: the tasks, with their on_result callbacks set
+    """
+    parts: dict = {}
+
+    def collect_part(part, result) -> None:
+        parts[part] = result
+
+        if len(parts) < len(period_tasks):
+            return
+
+        on_period(period_tasks[0]["period"], merge_period_parts(parts, period_data, issue_nums, developers))
+        parts.clear()
+
+    for task in period_tasks:
+        task["on_result"] = functools.partial(collect_part, task["part"])
+
+    return period_tasks
+
+
+def merge_period_parts(parts: dict, issue_posters: dict, issue_nums: list, developers: bool = False) -> dict:
+    """
+    Merge the results of a period split by metric group, or into chunks of
+    a group, back together.
+
+    Args:
+        parts (dict): {task part: result} for every task of the period.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        developers (bool): keep the node-level metrics of every developer.
+
+    Returns:
+        dict: dict of metrics for period
+    """
+    res: dict = {"keys": issue_nums}
+    dev_metrics: dict = {}
+    degraded: dict = {}
+    chunks: dict = {}
+
+    for part, result in parts.items():
+        if isinstance(part, tuple):
+            group, chunk, _ = part
+            chunks.setdefault(group, {})[chunk] = result
+
+        if "graph" in result:
+            res["graph"] = result["graph"]
+
+    for group in METRIC_GROUPS:
+        if group in parts:
+            group_metrics: dict = dict(parts[group])
+
+        else:
+            group_metrics = aggregate_metric_chunks(
+                [chunks[group][chunk] for chunk in sorted(chunks[group])], group, issue_posters, issue_nums, developers
+            )
+
+        dev_metrics |= group_metrics.pop("developers", {})
+        budgets.pop_degraded(group_metrics, degraded)
+        group_metrics.pop("graph", None)
+        res |= group_metrics
+
+    if degraded:
+        res[budgets.DEGRADED_KEY] = degraded
+
+    if developers:
+        res["developers"] = dev_metrics
 
     return res
 
 
-def create_partitioned_issue_dict(issue_data: dict) -> dict:
+def create_partitioned_issue_dict(records: dict, interval: datetime.timedelta = date_utils.PERIOD_INTERVAL) -> dict:
     """
     Partition all input issues into a dictionary of time frames.
     Each key is a string of a date and each val is a list of issue numbers
@@ -69,130 +423,642 @@ def create_partitioned_issue_dict(issue_data: dict) -> dict:
         is April 1st, the issue closed on March 1st belongs in the April 1st
         key.
     Args:
-        issue_data (dict): dictionary of data mined about the issues in a
-        repository's history.
+        records (dict): issue records of a repository, see
+        ingest.project_issue_data().
+        interval (datetime.timedelta): length of a period.
     Returns:
         dict: {date string: python list of issue nums}
     """
+    issue_nums: list = list(records["posters"])
 
-    TIME_FMT = "%Y-%m-%dT%H:%M:%SZ"
+    if not issue_nums:
+        return {}
 
-    def datetime_to_github_time_str(date: datetime) -> str:
-        return datetime.strftime(date, TIME_FMT)
+    start_date: datetime.datetime = date_utils.from_epoch(int(records["closed_at"][0]))
 
-    def github_time_str_to_datetime(date: str) -> datetime:
-        return datetime.strptime(date, TIME_FMT)
+    return date_utils.partition_epochs(issue_nums, records["closed_at"], start_date, date_utils.ISO_FMT, interval)
 
-    def get_start_date(issue_data: dict) -> datetime:
-        """
-        TODO.
-        Args:
-            issue_data (dict):
-        Returns:
-            datetime.datetime:
-        """
-        first_item_val = list(issue_data.values())[0]
-        start_date: str = first_item_val["closed_at"].split(",")[0]
 
-        return github_time_str_to_datetime(start_date)
+def gather_single_period_comm_metrics(issue_posters: dict, issue_nums: list, options: dict | None = None):
+    """
+    Gather all communication metrics for one temporal period.
 
-    def init_issue_interval_dict_keys(issues: dict) -> dict:
-        interval: timedelta = timedelta(weeks=12, days=0)
-        issue_interval_data: dict = {}
-        start_date: datetime = get_start_date(issues)
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        options (dict | None): output of get_period_options();
+            PERIOD_OPTIONS if None.
+    """
+    options = options or PERIOD_OPTIONS
+    cur_bucket_graph: igraph.Graph = make_igraph_period_network_matrix(issue_posters, issue_nums)
+    parts: dict = {}
 
-        while start_date < datetime.now():
-            next_interval_start = start_date + interval
-            interval_date_str = datetime_to_github_time_str(next_interval_start)
-            issue_interval_data[interval_date_str] = []
-            start_date = next_interval_start
+    progress.report_phase("period-issue metrics")
 
-        return issue_interval_data
+    parts["period_issue"] = get_metric_group(cur_bucket_graph, issue_posters, issue_nums, "period_issue", options)
+
+    # fast, doesn't need print statement
+    parts["igraph"] = get_metric_group(cur_bucket_graph, issue_posters, issue_nums, "igraph", options)
 
-    issue_interval_data = init_issue_interval_dict_keys(issue_data)
-    date_key_list = list(issue_interval_data.keys())
+    progress.report_phase("networkx metrics")
 
-    for key, val in issue_data.items():
-        cur_date = github_time_str_to_datetime(val["closed_at"])
+    parts["networkx"] = get_metric_group(cur_bucket_graph, issue_posters, issue_nums, "networkx", options)
 
-        # NOTE: could use binary search if performance became an issue
-        i = 0
-        while cur_date > github_time_str_to_datetime(date_key_list[i]):
-            i += 1
+    res: dict = merge_period_parts(parts, issue_posters, issue_nums, options["developers"])
 
-        issue_interval_data[date_key_list[i]].append(key)
+    if options["export_graph"]:
+        res["graph"] = export_period_graph(cur_bucket_graph, issue_posters, issue_nums)
 
-    return issue_interval_data
+    return res
 
 
-def gather_single_period_comm_metrics(issue_data: dict, issue_nums: list, period_name):
+def gather_period_metric_group(issue_posters: dict, issue_nums: list, group: str, options: dict | None = None) -> dict:
     """
-    Gather all communication metrics for one temporal period.
+    Gather one group of communication metrics for one temporal period.
+
+    Used to spread the work of a very large period across several workers.
+    Every group rebuilds the period's graph, which is cheap next to the
+    metrics themselves.
 
     Args:
-        period ():
-        issue_nums ():
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        group (str): one of METRIC_GROUPS.
+        options (dict | None): output of get_period_options();
+            PERIOD_OPTIONS if None. Only the "period_issue" group exports
+            the graph.
+
+    Returns:
+        dict: metrics of the given group
     """
-    keys: dict = {"keys": issue_nums}
+    options = options or PERIOD_OPTIONS
+    cur_bucket_graph: igraph.Graph = make_igraph_period_network_matrix(issue_posters, issue_nums)
 
-    cur_bucket_graph: igraph.Graph = make_igraph_period_network_matrix(issue_data, issue_nums)
+    progress.report_phase(f"{group} metrics")
 
-    print(f"{TAB*2} #{period_name}: getting period-issue metrics...\n")
+    res: dict = get_metric_group(cur_bucket_graph, issue_posters, issue_nums, group, options)
 
-    period_issue_metrics: dict = get_period_issue_metrics(cur_bucket_graph, issue_data, issue_nums)
+    if options["export_graph"] and group == "period_issue":
+        res["graph"] = export_period_graph(cur_bucket_graph, issue_posters, issue_nums)
 
-    # fast, doesn't need print statement
-    igraph_metrics = get_igraph_graph_metrics(cur_bucket_graph)
+    return res
 
-    print(f"{TAB*2} #{period_name}: getting networkx metrics...\n")
 
-    networkx_metrics = get_networkx_graph_metrics(cur_bucket_graph)
+def gather_period_metric_chunk(
+    issue_posters: dict,
+    issue_nums: list,
+    group: str,
+    chunk: int,
+    num_chunks: int,
+    options: dict | None = None,
+) -> dict:
+    """
+    Gather the node-level metrics of one group for a slice of a period's vertices.
 
-    print(f"{TAB*2} #{period_name}: done\n")
+    Used to spread a single very large period across several workers. The
+    chunks of a group are combined with combine_metric_chunks().
 
-    return {
-        **keys,
-        **period_issue_metrics,
-        **igraph_metrics,
-        **networkx_metrics,
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        group (str): one of METRIC_GROUPS.
+        chunk (int): index of this chunk.
+        num_chunks (int): number of chunks the group is split into.
+        options (dict | None): output of get_period_options();
+            PERIOD_OPTIONS if None. Only the first chunk of the
+            "period_issue" group exports the graph.
+
+    Returns:
+        dict: {"vseq": userid of each vertex, "metrics": output of
+        get_metric_chunk()}
+    """
+    options = options or PERIOD_OPTIONS
+    cur_bucket_graph: igraph.Graph = make_igraph_period_network_matrix(issue_posters, issue_nums)
+
+    progress.report_phase(f"{group} metrics, chunk {chunk + 1}/{num_chunks}")
+
+    res: dict = {
+        "vseq": get_vseq(cur_bucket_graph),
+        "metrics": get_metric_chunk(
+            cur_bucket_graph, group, chunk, num_chunks, options["metric_budgets"], options["semantics"], options["backend"]
+        ),
     }
 
+    if options["export_graph"] and group == "period_issue" and chunk == 0:
+        res["graph"] = export_period_graph(cur_bucket_graph, issue_posters, issue_nums)
+
+    return res
+
 
-def get_period_issue_metrics(graph: igraph.Graph, issue_data, issue_nums) -> dict:
+def get_metric_chunk(
+    graph: igraph.Graph,
+    group: str,
+    chunk: int,
+    num_chunks: int,
+    metric_budgets: dict | None = None,
+    semantics: str = "directed",
+    backend: str = "igraph",
+) -> dict:
     """
-    TODO.
+    Compute the node-level metrics of one group for a slice of the vertices.
+
+    Vertices are dealt out to chunks in turn so that the high-degree
+    vertices, which appear early, are spread across chunks. Betweenness is
+    partitioned by source vertex instead: each chunk returns the partial
+    betweenness of every vertex over the paths starting at its vertices.
 
     Args:
-        issue_data ():
-        issue_nums ():
-        graph:
+        graph (igraph.Graph): graph of the period.
+        group (str): one of METRIC_GROUPS.
+        chunk (int): index of this chunk.
+        num_chunks (int): number of chunks the group is split into.
+        metric_budgets (dict | None): output of
+            budgets.get_metric_budgets(); each budget applies to this chunk.
+        semantics (str): one of GRAPH_SEMANTICS, see get_graph_semantics().
+        backend (str): one of METRIC_BACKENDS, see get_metric_backend().
 
     Returns:
-        todo.
+        dict: {metric name: {vertex index: value}}, or a list of values for
+        every vertex for partial sums, with the notes of metrics that ran
+        over their budget under budgets.DEGRADED_KEY
+    """
+    vertices: list = list(range(chunk, graph.vcount(), num_chunks))
+
+    if group != "networkx" or backend == "sparse":
+        node_metrics: dict = get_node_metric_group(graph, group, metric_budgets, vertices, semantics, backend)
 
+        return {
+            metric_name: values if metric_name in (budgets.DEGRADED_KEY, "betweenness") else dict(zip(vertices, values))
+            for metric_name, values in node_metrics.items()
+        }
+
+    degraded: dict = {}
+    res: dict = get_networkx_node_metrics(
+        get_structural_graph(graph, semantics).to_networkx(), vertices, metric_budgets, degraded
+    )
+
+    if degraded:
+        res[budgets.DEGRADED_KEY] = degraded
+
+    return res
+
+
+def combine_metric_chunks(chunks: list) -> dict:
+    """
+    Combine the chunks of one metric group into values for every vertex.
+
+    Args:
+        chunks (list): outputs of gather_period_metric_chunk() for every
+            chunk of one group of one period.
+
+    Returns:
+        dict: {metric name: list of values in vertex order}, with the notes
+        of metrics that ran over their budget in any chunk under
+        budgets.DEGRADED_KEY
     """
-    def create_dev_role_metric_dict(graph: igraph.Graph) -> dict:
+    num_vertices: int = len(chunks[0]["vseq"])
+    combined: dict = {}
+    degraded: dict = {}
+
+    for chunk in chunks:
+        metrics: dict = dict(chunk["metrics"])
+        budgets.pop_degraded(metrics, degraded)
+
+        for metric_name, values in metrics.items():
+            if isinstance(values, list):
+                partial_sum: list = combined.setdefault(metric_name, [0] * num_vertices)
+                combined[metric_name] = [total + val for total, val in zip(partial_sum, values)]
+
+            else:
+                combined.setdefault(metric_name, {}).update(values)
+
+    combined = {
+        metric_name: values if isinstance(values, list) else [values[vertex] for vertex in range(num_vertices)]
+        for metric_name, values in combined.items()
+    }
+
+    if degraded:
+        combined[budgets.DEGRADED_KEY] = degraded
+
+    return combined
+
+
+def aggregate_metric_chunks(
+    chunks: list, group: str, issue_posters: dict, issue_nums: list, developers: bool = False
+) -> dict:
+    """
+    Produce the metrics of one group of a period from its chunks.
+
+    Args:
+        chunks (list): outputs of gather_period_metric_chunk() for every
+            chunk of one group of one period.
+        group (str): one of METRIC_GROUPS.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        developers (bool): keep the node-level metrics of every developer.
+
+    Returns:
+        dict: same metrics as get_metric_group()
+    """
+    return aggregate_node_metric_group(
+        chunks[0]["vseq"], combine_metric_chunks(chunks), group, issue_posters, issue_nums, developers
+    )
+
+
+def aggregate_node_metric_group(
+    vseq: list, node_metrics: dict, group: str, issue_posters: dict, issue_nums: list, developers: bool = False
+) -> dict:
+    """
+    Produce the metrics of one group of a period from its node-level metrics.
+
+    Args:
+        vseq (list): userid of each vertex of the period's graph.
+        node_metrics (dict): {metric name: list of values in vertex order},
+            with optional notes of degraded metrics under
+            budgets.DEGRADED_KEY.
+        group (str): one of METRIC_GROUPS.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        developers (bool): keep the node-level metrics under a "developers"
+            key, as {metric name: {userid: value}}.
+
+    Returns:
+        dict: metrics of the given group; those of null metrics are None
+    """
+    aggregates: dict = {}
+    node_metrics = dict(node_metrics)
+    degraded: dict = node_metrics.pop(budgets.DEGRADED_KEY, {})
+
+    if group == "period_issue":
+        aggregates = aggregate_period_issue_metrics(
+            vseq,
+            node_metrics["betweenness"],
+            node_metrics["closeness"],
+            issue_posters,
+            issue_nums,
+        )
+
+    else:
+        for metric_name, values in node_metrics.items():
+            aggregates |= aggregate_node_metric(values, metric_name)
+
+    for metric_name, note in degraded.items():
+        if note["status"] == "null":
+            null_aggregates(aggregates, metric_name)
+
+    if degraded:
+        aggregates[budgets.DEGRADED_KEY] = degraded
+
+    if developers:
+        aggregates["developers"] = {
+            metric_name: dict(zip(vseq, values)) for metric_name, values in node_metrics.items()
+        }
+
+    return aggregates
+
+
+def null_aggregates(aggregates: dict, metric_name: str) -> None:
+    """
+    Set the aggregates of a null metric to None, for a period and its issues.
+
+    Args:
+        aggregates (dict): metrics of one group of a period, updated in
+            place.
+        metric_name (str): name of the null metric.
+    """
+    for metrics in (aggregates, *aggregates.get("per_period_issue", {}).values()):
+        for suffix in ("avg", "max", "sum"):
+            if f"{metric_name}_{suffix}" in metrics:
+                metrics[f"{metric_name}_{suffix}"] = None
+
+
+def get_metric_group(
+    graph: igraph.Graph,
+    issue_posters: dict,
+    issue_nums: list,
+    group: str,
+    options: dict | None = None,
+) -> dict:
+    """
+    Compute one group of metrics from the graph of a period.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+        group (str): one of METRIC_GROUPS.
+        options (dict | None): output of get_period_options();
+            PERIOD_OPTIONS if None.
+
+    Returns:
+        dict: metrics of the given group, with the notes of metrics that
+        ran over their budget under budgets.DEGRADED_KEY
+    """
+    options = options or PERIOD_OPTIONS
+
+    return aggregate_node_metric_group(
+        get_vseq(graph),
+        get_node_metric_group(
+            graph, group, options["metric_budgets"], semantics=options["semantics"], backend=options["backend"]
+        ),
+        group,
+        issue_posters,
+        issue_nums,
+        options["developers"],
+    )
+
+
+def get_node_metric_group(
+    graph: igraph.Graph,
+    group: str,
+    metric_budgets: dict | None = None,
+    vertices: list | None = None,
+    semantics: str = "directed",
+    backend: str = "igraph",
+) -> dict:
+    """
+    Compute the node-level metrics of one group.
+
+    A metric that runs over its budget is approximated if it can be, see
+    approximate_betweenness() and approximate_closeness(), and is
+    otherwise NaN for every vertex.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        group (str): one of METRIC_GROUPS.
+        metric_budgets (dict | None): output of
+            budgets.get_metric_budgets().
+        vertices (list | None): vertices to compute the metrics of, and the
+            sources of betweenness; every vertex if None.
+        semantics (str): one of GRAPH_SEMANTICS, see get_graph_semantics().
+        backend (str): one of METRIC_BACKENDS, see get_metric_backend().
+
+    Returns:
+        dict: {metric name: list of values in the order of vertices}, but
+        betweenness always for every vertex, with the notes of metrics that
+        ran over their budget under budgets.DEGRADED_KEY
+    """
+    metric_budgets = metric_budgets or {}
+    degraded: dict = {}
+    num_values: int = graph.vcount() if vertices is None else len(vertices)
+    null: list = [math.nan] * num_values
+
+    if group == "period_issue":
+        node_metrics: dict = {
+            "betweenness": budgets.run_metric(
+                "betweenness",
+                metric_budgets,
+                degraded,
+                get_betweenness,
+                (graph, vertices),
+                approximate_betweenness,
+                [math.nan] * graph.vcount(),
+            ),
+            "closeness": budgets.run_metric(
+                "closeness", metric_budgets, degraded, get_closeness, (graph, vertices), approximate_closeness, null
+            ),
+        }
+
+    elif backend == "sparse":
+        node_metrics = sparse_metrics.get_node_metrics(
+            get_structural_graph(graph, semantics), group, vertices, metric_budgets, degraded
+        )
+
+    elif group == "igraph":
+        node_metrics = {
+            "constraint": budgets.run_metric(
+                "constraint",
+                metric_budgets,
+                degraded,
+                get_constraint,
+                (get_structural_graph(graph, semantics), vertices),
+                null=null,
+            )
+        }
+
+    else:
+        node_metrics = {
+            metric_name: [values[node] for node in (range(graph.vcount()) if vertices is None else vertices)]
+            for metric_name, values in get_networkx_node_metrics(
+                get_structural_graph(graph, semantics).to_networkx(), vertices, metric_budgets, degraded
+            ).items()
+        }
+
+    if degraded:
+        node_metrics[budgets.DEGRADED_KEY] = degraded
+
+    return node_metrics
+
+
+def get_betweenness(graph: igraph.Graph, sources: list | None = None) -> list:
+    """
+    Get the betweenness of every vertex of a graph.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        sources (list | None): only count shortest paths from these
+            vertices; every vertex if None.
+
+    Returns:
+        list: betweenness of each vertex, in vertex order
+    """
+    if sources is None:
+        return graph.betweenness()
+
+    return brandes.partial_betweenness(graph.vcount(), graph.get_edgelist(), sources)
+
+
+def approximate_betweenness(graph: igraph.Graph, sources: list | None = None) -> tuple:
+    """
+    Estimate betweenness from the shortest paths of a sample of sources.
+
+    The partial betweenness over a uniform sample of the sources, scaled
+    by the sources per sample, is an unbiased estimate of the betweenness
+    over all of them. See Brandes and Pich, "Centrality Estimation in Large
+    Networks" (2007).
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        sources (list | None): vertices to sample sources from; every
+            vertex if None.
+
+    Returns:
+        tuple: (betweenness of each vertex in vertex order, description of
+        the estimate)
+    """
+    sources = list(range(graph.vcount())) if sources is None else sources
+    sample: list = sorted(random.Random(APPROX_SEED).sample(sources, min(APPROX_SOURCES, len(sources))))
+    scale: float = len(sources) / len(sample) if sample else 0.0
+    partial: list = brandes.partial_betweenness(graph.vcount(), graph.get_edgelist(), sample)
+
+    return [val * scale for val in partial], f"sampled {len(sample)} of {len(sources)} sources"
+
+
+def get_closeness(graph: igraph.Graph, vertices: list | None = None) -> list:
+    """
+    Get the closeness of some vertices of a graph.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        vertices (list | None): vertices to compute; every vertex if None.
+
+    Returns:
+        list: closeness of each vertex, in the order of vertices
+    """
+    return graph.closeness(vertices)
+
+
+def approximate_closeness(graph: igraph.Graph, vertices: list | None = None) -> tuple:
+    """
+    Estimate closeness from the vertices within APPROX_CUTOFF hops.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        vertices (list | None): vertices to compute; every vertex if None.
+
+    Returns:
+        tuple: (closeness of each vertex in the order of vertices,
+        description of the estimate)
+    """
+    return graph.closeness(vertices, cutoff=APPROX_CUTOFF), f"paths of at most {APPROX_CUTOFF} hops"
+
+
+def get_constraint(graph: igraph.Graph, vertices: list | None = None) -> list:
+    """
+    Get Burt's constraint of some vertices of a graph.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        vertices (list | None): vertices to compute; every vertex if None.
+
+    Returns:
+        list: constraint of each vertex, in the order of vertices
+    """
+    return graph.constraint(vertices, weights=get_edge_weights(graph))
+
+
+def get_edge_weights(graph: igraph.Graph) -> str | None:
+    """
+    Get the edge attribute that weighs the edges of a graph, if any.
+
+    Period graphs weigh a pair of participants by repeating its edge.
+    Graphs with one edge per pair, e.g. decayed snapshots, carry the weight
+    of the pair in a "weight" attribute instead.
+
+    Args:
+        graph (igraph.Graph): graph of a period.
+
+    Returns:
+        str | None: "weight", or None if edges are unweighted
+    """
+    if "weight" in graph.es.attributes():
+        return "weight"
+
+    return None
+
+
+def get_structural_graph(graph: igraph.Graph, semantics: str = "directed") -> igraph.Graph:
+    """
+    Get the graph the structural hole metrics of a period run on.
+
+    Args:
+        graph (igraph.Graph): graph of the period.
+        semantics (str): one of GRAPH_SEMANTICS, see get_graph_semantics().
+
+    Returns:
+        igraph.Graph: graph itself if directed, else an undirected graph
+        with one edge per pair of vertices, its "weight" the sum of the
+        weights of their edges in either direction
+    """
+    if semantics == "directed":
+        return graph
+
+    edges = numpy.array(graph.get_edgelist(), dtype=numpy.int64).reshape(-1, 2)
+    weight_attr: str | None = get_edge_weights(graph)
+    weights = numpy.array(graph.es[weight_attr], dtype=numpy.float64) if weight_attr else None
+
+    pairs, pair_index = numpy.unique(numpy.sort(edges, axis=1), axis=0, return_inverse=True)
+    pair_weights = numpy.bincount(pair_index.reshape(-1), weights=weights, minlength=len(pairs))
+
+    symmetric = igraph.Graph(
+        n=graph.vcount(),
+        edges=pairs.tolist(),
+        directed=False,
+        edge_attrs={"weight": pair_weights.astype(numpy.float64).tolist()},
+    )
+    symmetric["userids"] = get_vseq(graph)
+
+    return symmetric
+
+
+def get_vseq(graph: igraph.Graph) -> list:
+    """
+    Get the interned userid of each vertex of a graph.
+
+    Args:
+        graph (igraph.Graph): graph of a period.
+
+    Returns:
+        list: interned userids in vertex order
+    """
+    return graph["userids"]
+
+
+def profile_period_metrics(issue_posters: dict, issue_nums: list) -> dict:
+    """
+    Time each phase of the metric computation for one period.
+
+    Args:
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+
+    Returns:
+        dict: {"features": cost model features of the period,
+               "seconds": {phase: wall time of phase}}
+    """
+    seconds: dict = {}
+
+    start: float = time.perf_counter()
+    graph: igraph.Graph = make_igraph_period_network_matrix(issue_posters, issue_nums)
+    seconds["build"] = time.perf_counter() - start
+
+    for group in METRIC_GROUPS:
+        start = time.perf_counter()
+        get_metric_group(graph, issue_posters, issue_nums, group)
+        seconds[group] = time.perf_counter() - start
+
+    return {
+        "features": cost_model.get_period_features(issue_posters, issue_nums),
+        "seconds": seconds,
+    }
+
+
+def aggregate_period_issue_metrics(
+    vseq: list, betweenness: list, closeness: list, issue_posters: dict, issue_nums: list
+) -> dict:
+    """
+    Aggregate the centralities of each issue's participants.
+
+    Args:
+        vseq (list): userid of each vertex of the period's graph.
+        betweenness (list): betweenness of each vertex.
+        closeness (list): closeness of each vertex.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
+
+    Returns:
+        dict: {"per_period_issue": {issue num: participants and aggregates}}
+    """
+    def create_dev_role_metric_dict() -> dict:
         """
         TODO.
 
-        Args:
-            graph:
-
         Returns:
             todo.
 
         """
         metrics: dict = {}
 
-        try:
-            vseq = graph.vs["name"]
-        except KeyError:
-            return {}
-
-        betweenness = graph.betweenness()
-        closeness = graph.closeness()
-
-        # can get names of vertices, userids in our case, with graph.vs()["name"]
         for index, userid in enumerate(vseq):
             metrics[userid] = {
                 "betweenness": betweenness[index],
@@ -201,16 +1067,6 @@ def get_period_issue_metrics(graph: igraph.Graph, issue_data, issue_nums) -> dic
 
         return metrics
 
-    def get_issue_set(issue) -> set:
-        participants: set = set()
-
-        participants.add(issue["userid"])
-
-        for _, comment in issue["comments"].items():
-            participants.add(comment["userid"])
-
-        return participants
-
     def get_issue_metrics(participants, metrics) -> dict:
         betweennesses: list = []
         closenesses: list = []
@@ -225,13 +1081,11 @@ def get_period_issue_metrics(graph: igraph.Graph, issue_data, issue_nums) -> dic
     period_issue_metrics: dict = {}
 
     # consider using https://igraph.readthedocs.io/en/main/api/igraph.VertexSeq.html#select
-    dev_role_metrics: dict = create_dev_role_metric_dict(graph)
+    dev_role_metrics: dict = create_dev_role_metric_dict()
 
     for num in issue_nums:
-        cur_issue: dict = issue_data[num]
-
         # get who participated in the issue
-        issue_participants: set = get_issue_set(cur_issue)
+        issue_participants: set = set(issue_posters[num])
 
         # get their values from dev_role_metrics
         metrics = get_issue_metrics(issue_participants, dev_role_metrics)
@@ -246,105 +1100,134 @@ def get_period_issue_metrics(graph: igraph.Graph, issue_data, issue_nums) -> dic
     return {"per_period_issue": period_issue_metrics}
 
 
-def make_igraph_period_network_matrix(issue_data: dict, period_issue_nums: list) -> igraph.Graph:
+def make_igraph_period_network_matrix(issue_posters: dict, period_issue_nums: list) -> igraph.Graph:
     """
-    TODO.
+    Build the graph of conversation between the participants of a period.
+
+    Vertices are numbered in order of first appearance, and the interned
+    id of each vertex is kept in the graph's "userids" attribute rather
+    than as a per-vertex name.
 
     Args:
-        period_num_list ():
-        issue_data (dict):
+        issue_posters (dict): {issue num: posters} with interned userids,
+            see ingest.project_issue_data().
+        period_issue_nums (list): issue nums in the period.
 
     Returns:
         igraph.Graph: graph of social network for period
     """
-    cur_bucket_graph = igraph.Graph(directed=True)
+    vertices: dict = {}
+    edges: list = []
 
     for num in period_issue_nums:
-        cur_bucket_graph = make_igraph_issue_network_matrix(issue_data[num], cur_bucket_graph)
+        edges += get_issue_edges(issue_posters[num], vertices)
+
+    graph = igraph.Graph(n=len(vertices), edges=edges, directed=True)
+    graph["userids"] = list(vertices)
 
-    return cur_bucket_graph
+    return graph
 
 
-def make_igraph_issue_network_matrix(cur_issue: dict, graph: igraph.Graph) -> igraph.Graph:
+def export_period_graph(graph: igraph.Graph, issue_posters: dict, issue_nums: list) -> dict:
     """
-    Create an adjacency matrix for participants in one issue conversation.
-
-    Notes:
-        This functionality requires:
-            - userid
-            - issue comments
-                - userid
+    Reduce the graph of a period to arrays that can be stored and rebuilt.
 
     Args:
-        cur_issue (dict):
-        cur_graph (igraph.Graph):
+        graph (igraph.Graph): graph of the period.
+        issue_posters (dict): {issue num: posters} for at least the period.
+        issue_nums (list): issue nums in the period.
 
     Returns:
-        igraph.Graph: graph object update with nodes and edges from the
-        conversation that transpired in the given issue parameter
+        dict: {"vertices": interned userid of each vertex, "edges": int32
+        array of shape (edges, 2), "participants": int32 vertices of every
+        issue's participants, one issue after another, "offsets": int64
+        start of each issue's participants, plus one end offset}
     """
-    # TODO: can use sets?
-    issue_nodes: list = []
-    edges: list = []
-
-    # idempotently add the original poster of the issue
-    cur_vertex, graph = idempotent_add(cur_issue["userid"], graph)
-    issue_nodes.append(cur_vertex)
+    vertex_index: dict = {userid: vertex for vertex, userid in enumerate(get_vseq(graph))}
+    participants: list = []
+    offsets: list = [0]
 
-    for _, comment in cur_issue["comments"].items():
-        # idempotently add each commenter
-        cur_vertex, graph = idempotent_add(comment["userid"], graph)
-        issue_nodes.append(cur_vertex)
-
-        edges.extend(
-            (cur_vertex, present_vertex)
-            for present_vertex in issue_nodes
-            if cur_vertex["name"] != present_vertex["name"]
-        )
-
-    graph.add_edges(edges)
+    for num in issue_nums:
+        participants += sorted({vertex_index[userid] for userid in issue_posters[num]})
+        offsets.append(len(participants))
 
-    return graph
+    return {
+        "vertices": get_vseq(graph),
+        "edges": numpy.array(graph.get_edgelist(), dtype=numpy.int32).reshape(-1, 2),
+        "participants": numpy.array(participants, dtype=numpy.int32),
+        "offsets": numpy.array(offsets, dtype=numpy.int64),
+    }
 
 
-def idempotent_add(userid, graph):
+def get_issue_edges(posters: tuple, vertices: dict) -> list:
     """
-    TODO: update name, finish docstring.
+    Get the edges of one issue conversation.
+
+    Each commenter gets an edge to every earlier post in the issue by
+    someone else.
 
     Args:
-        userid ():
-        graph ():
+        posters (tuple): userid of the author of each post of the issue,
+            starting with the issue itself.
+        vertices (dict): {userid: vertex index}, updated with the
+            participants of the issue not seen before.
 
     Returns:
-        vertex_obj:
-        graph:
+        list: (commenter vertex, earlier poster vertex) pairs
     """
-    try:
-        vertex_obj = graph.vs.find(name=userid)
+    issue_nodes: list = []
+    edges: list = []
 
-    except ValueError:
-        vertex_obj = graph.add_vertex(name=userid)
+    for userid in posters:
+        cur_vertex: int = vertices.setdefault(userid, len(vertices))
+        edges.extend((cur_vertex, present_vertex) for present_vertex in issue_nodes if cur_vertex != present_vertex)
+        issue_nodes.append(cur_vertex)
 
-    return vertex_obj, graph
+    return edges
 
 
-def get_networkx_graph_metrics(ig_graph: igraph.Graph):
+def get_networkx_node_metrics(
+    nx_graph, nodes=None, metric_budgets: dict | None = None, degraded: dict | None = None
+) -> dict:
     """
-    Get NetworkX-specific metrics from an iGraph graph.
+    Get the NetworkX-specific metrics of some nodes of a graph.
+
+    Neither metric has an approximation, so one that runs over its budget
+    is NaN for every node. Efficiency is null along with effective size.
 
     Args:
-        graph (igraph.Graph): igraph graph to convert to NetworkX
+        nx_graph (networkx.Graph): graph converted from igraph.
+        nodes (iterable): nodes to get metrics for; all nodes if None.
+        metric_budgets (dict | None): output of
+            budgets.get_metric_budgets().
+        degraded (dict | None): notes of degraded metrics, updated in place.
+
+    Returns:
+        dict: {metric name: {node: value}}
     """
-    nx_graph = ig_graph.to_networkx()
+    metric_budgets = metric_budgets or {}
+    degraded = {} if degraded is None else degraded
+    null: dict = dict.fromkeys(nx_graph if nodes is None else nodes, math.nan)
+
+    node_eff_sz: dict = budgets.run_metric(
+        "effective_size", metric_budgets, degraded, networkx.effective_size, (nx_graph, nodes), null=null
+    )
+
+    if "effective_size" in degraded:
+        degraded["efficiency"] = degraded["effective_size"]
+        node_efficiencies: dict = null
+
+    else:
+        node_efficiencies = global_efficiency(nx_graph, node_eff_sz)
 
-    node_eff_sz: dict = networkx.effective_size(nx_graph)
-    node_efficiencies: dict = global_efficiency(nx_graph, node_eff_sz)
-    node_hierarchies: dict = hierarchy.global_hierarchy(nx_graph)
+    node_hierarchies: dict = budgets.run_metric(
+        "hierarchy", metric_budgets, degraded, hierarchy.global_hierarchy, (nx_graph, nodes), null=null
+    )
 
     return {
-        **calc_aggregates_from_dict(node_eff_sz, "effective_size"),
-        **calc_aggregates_from_dict(node_efficiencies, "efficiency"),
-        **calc_aggregates_from_dict(node_hierarchies, "hierarchy"),
+        "effective_size": node_eff_sz,
+        "efficiency": node_efficiencies,
+        "hierarchy": node_hierarchies,
     }
 
 
@@ -407,24 +1290,6 @@ def efficiency(degree: int, effective_size: int):
     return effective_size / degree
 
 
-def get_igraph_graph_metrics(graph: igraph.Graph) -> dict:
-    """
-    Get metrics of interest about a social network from the network's graph.
-
-    Args:
-        graph(igraph.Graph): graph of conversation from issues in some time
-        period.
-
-    Returns:
-        dict: dict of social metrics derived from the input graph.
-    """
-
-    return {
-        # Structural Holes of Communication
-        **aggregate_node_metric(graph.constraint(), "constraint"),
-    }
-
-
 def aggregate_node_metric(node_metrics: list, metric_name: str):
     """
     Return aggregate values for the given metric.
@@ -0,0 +1,313 @@
+"""
+Compute the structural hole metrics of a period from its sparse adjacency.
+
+Constraint, effective size, efficiency and hierarchy only depend on the
+normalized weights of each vertex's ties, and those of its contacts, so
+each is a few products of a period's adjacency matrix with itself. This
+module builds that adjacency once, as scipy.sparse CSR matrices, and
+computes every metric from it with the values igraph and NetworkX give:
+
+    - constraint as igraph's: ties weighted by the replies between a pair
+      in both directions, or by the "weight" of the pair's edges.
+
+    - effective size, efficiency and hierarchy as NetworkX's, called with
+      no weight: a pair's mutual weight is whether it replied in either
+      direction, degree counts every reply to and from a vertex, and
+      hierarchy only walks a vertex's out-neighbors.
+
+See per_period.get_metric_backend() for choosing it over igraph and
+NetworkX.
+"""
+
+import igraph
+import math
+import numpy
+import scipy.sparse
+from metrics_aggregator import budgets
+
+
+def get_adjacency(graph: igraph.Graph) -> dict:
+    """
+    Build the sparse adjacency of a graph.
+
+    Args:
+        graph (igraph.Graph): graph of a period, or its structural graph,
+            see per_period.get_structural_graph().
+
+    Returns:
+        dict: CSR matrices over the graph's vertices, "weights" the weight
+        of the ties of each pair in either direction, "counts" the number
+        of edges between each pair in either direction, and "successors"
+        1 where a vertex has an edge to another, in both directions if the
+        graph is undirected
+    """
+    num_vertices: int = graph.vcount()
+    edges = numpy.array(graph.get_edgelist(), dtype=numpy.int64).reshape(-1, 2)
+    ones = numpy.ones(len(edges), dtype=numpy.float64)
+    weights = numpy.array(graph.es["weight"], dtype=numpy.float64) if "weight" in graph.es.attributes() else ones
+
+    def make_matrix(values):
+        # repeated edges are summed
+        return scipy.sparse.csr_matrix((values, (edges[:, 0], edges[:, 1])), shape=(num_vertices, num_vertices))
+
+    counts = make_matrix(ones)
+    successors = counts if graph.is_directed() else counts + counts.T
+    successors = (successors > 0).astype(numpy.float64)
+
+    return {
+        "weights": (make_matrix(weights) + make_matrix(weights).T).tocsr(),
+        "counts": (counts + counts.T).tocsr(),
+        "successors": successors.tocsr(),
+    }
+
+
+def normalize_rows(matrix, norms):
+    """
+    Divide every row of a matrix by its norm.
+
+    Args:
+        matrix (scipy.sparse.csr_matrix): matrix to normalize.
+        norms (numpy.ndarray): norm of every row; rows of norm 0 stay 0.
+
+    Returns:
+        scipy.sparse.csr_matrix: normalized matrix
+    """
+    scale = numpy.divide(1.0, norms, out=numpy.zeros(len(norms)), where=norms > 0)
+
+    return (scipy.sparse.diags(scale) @ matrix).tocsr()
+
+
+def get_row_sums(matrix):
+    """
+    Sum every row of a sparse matrix.
+
+    Args:
+        matrix (scipy.sparse.spmatrix): matrix to sum.
+
+    Returns:
+        numpy.ndarray: 1-d sums
+    """
+    return numpy.asarray(matrix.sum(axis=1)).reshape(-1)
+
+
+def get_vertex_index(adjacency: dict, vertices: list | None):
+    """
+    Get the rows of the vertices to compute metrics of.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+        vertices (list | None): vertices; every vertex if None.
+
+    Returns:
+        numpy.ndarray: row indices
+    """
+    if vertices is None:
+        return numpy.arange(adjacency["weights"].shape[0])
+
+    return numpy.asarray(vertices, dtype=numpy.int64)
+
+
+def get_local_constraints(proportions, rows):
+    """
+    Get the local constraint of some vertices' contacts on them.
+
+    Local constraint of contact j on i is (p_ij + sum_q p_iq * p_qj) ** 2,
+    for every j, contact of i or not.
+
+    Args:
+        proportions (scipy.sparse.csr_matrix): tie weights, each row
+            normalized by its sum.
+        rows (numpy.ndarray): vertices to get local constraints on.
+
+    Returns:
+        scipy.sparse.csr_matrix: local constraints, one row per vertex
+    """
+    direct = proportions[rows]
+    indirect = direct + direct @ proportions
+
+    return indirect.multiply(indirect).tocsr()
+
+
+def get_constraint(adjacency: dict, vertices: list | None = None) -> list:
+    """
+    Compute Burt's constraint as igraph.Graph.constraint() does.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+        vertices (list | None): vertices to compute constraint of; every
+            vertex if None.
+
+    Returns:
+        list: constraint in the order of vertices, NaN for isolated
+        vertices
+    """
+    rows = get_vertex_index(adjacency, vertices)
+    weights = adjacency["weights"]
+    strengths = get_row_sums(weights)
+
+    # only a vertex's contacts constrain it
+    local_constraints = get_local_constraints(normalize_rows(weights, strengths), rows)
+    constraint = get_row_sums(local_constraints.multiply(weights[rows] > 0))
+    constraint[strengths[rows] == 0] = math.nan
+
+    return constraint.tolist()
+
+
+def get_mutual_proportions(adjacency: dict) -> tuple:
+    """
+    Get the mutual weights NetworkX's structural hole metrics use.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+
+    Returns:
+        tuple: mutual weights normalized by their row sum, and by their row
+        max, as networkx.algorithms.structuralholes.normalized_mutual_weight()
+    """
+    mutual = (adjacency["successors"] + adjacency["successors"].T).tocsr()
+    # scipy cannot reduce a graph without vertices
+    row_max = numpy.asarray(mutual.max(axis=1).todense()).reshape(-1) if mutual.shape[0] else numpy.zeros(0)
+
+    return normalize_rows(mutual, get_row_sums(mutual)), normalize_rows(mutual, row_max)
+
+
+def get_effective_size(adjacency: dict, vertices: list | None = None) -> list:
+    """
+    Compute effective size as networkx.effective_size() does.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+        vertices (list | None): vertices to compute effective size of;
+            every vertex if None.
+
+    Returns:
+        list: effective size in the order of vertices, NaN for vertices
+        without successors
+    """
+    rows = get_vertex_index(adjacency, vertices)
+    sum_proportions, max_proportions = get_mutual_proportions(adjacency)
+    contacts = sum_proportions[rows] > 0
+
+    redundancy = get_row_sums((sum_proportions[rows] @ max_proportions.T).multiply(contacts))
+    effective_size = get_row_sums(contacts) - redundancy
+    effective_size[get_row_sums(adjacency["successors"][rows]) == 0] = math.nan
+
+    return effective_size.tolist()
+
+
+def get_degree(adjacency: dict, vertices: list | None = None) -> list:
+    """
+    Get vertices' degree in the graph NetworkX converts the graph to.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+        vertices (list | None): vertices to get the degree of; every vertex
+            if None.
+
+    Returns:
+        list: int degree in the order of vertices
+    """
+    return get_row_sums(adjacency["counts"][get_vertex_index(adjacency, vertices)]).astype(numpy.int64).tolist()
+
+
+def get_efficiency(degrees: list, effective_sizes: list) -> list:
+    """
+    Compute efficiency as per_period.global_efficiency() does.
+
+    Args:
+        degrees (list): output of get_degree().
+        effective_sizes (list): output of get_effective_size() for the same
+            vertices.
+
+    Returns:
+        list: efficiency in the order of vertices, int 0 if a vertex has no
+        edges
+    """
+    return [0 if degree == 0 else effective_size / degree for degree, effective_size in zip(degrees, effective_sizes)]
+
+
+def get_hierarchy(adjacency: dict, vertices: list | None = None) -> list:
+    """
+    Compute hierarchy as __hierarchy.global_hierarchy() does.
+
+    Args:
+        adjacency (dict): output of get_adjacency().
+        vertices (list | None): vertices to compute hierarchy of; every
+            vertex if None.
+
+    Returns:
+        list: hierarchy in the order of vertices, NaN for vertices without
+        edges and int 1 for vertices with one
+    """
+    rows = get_vertex_index(adjacency, vertices)
+    sum_proportions = get_mutual_proportions(adjacency)[0]
+    degrees = numpy.asarray(get_degree(adjacency, vertices), dtype=numpy.float64)
+
+    # constraint of each of a vertex's out-neighbors on it, over the mean
+    local_constraints = get_local_constraints(sum_proportions, rows).multiply(adjacency["successors"][rows]).tocsr()
+    mean_constraints = get_row_sums(local_constraints) / numpy.maximum(degrees, 1)
+    ratios = normalize_rows(local_constraints, mean_constraints)
+    ratios.data = ratios.data * numpy.log(ratios.data)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        hierarchy = get_row_sums(ratios) / (degrees * numpy.log(degrees))
+
+    return [
+        math.nan if degree == 0 else 1 if degree == 1 else value
+        for degree, value in zip(degrees.tolist(), hierarchy.tolist())
+    ]
+
+
+def get_node_metrics(
+    graph: igraph.Graph, group: str, vertices: list | None = None, metric_budgets: dict | None = None, degraded=None
+) -> dict:
+    """
+    Compute the node-level metrics of one group from a graph's adjacency.
+
+    Budgets apply as in per_period.get_node_metric_group(); none of these
+    metrics has an approximation, so one that runs over its budget is NaN
+    for every vertex, and efficiency is null along with effective size.
+
+    Args:
+        graph (igraph.Graph): structural graph of a period, see
+            per_period.get_structural_graph().
+        group (str): "igraph" or "networkx", see per_period.METRIC_GROUPS.
+        vertices (list | None): vertices to compute the metrics of; every
+            vertex if None.
+        metric_budgets (dict | None): output of
+            budgets.get_metric_budgets().
+        degraded (dict | None): notes of degraded metrics, updated in place.
+
+    Returns:
+        dict: {metric name: list of values in the order of vertices}
+    """
+    metric_budgets = metric_budgets or {}
+    degraded = {} if degraded is None else degraded
+    null: list = [math.nan] * (graph.vcount() if vertices is None else len(vertices))
+    adjacency: dict = get_adjacency(graph)
+
+    if group == "igraph":
+        return {
+            "constraint": budgets.run_metric(
+                "constraint", metric_budgets, degraded, get_constraint, (adjacency, vertices), null=null
+            )
+        }
+
+    effective_size: list = budgets.run_metric(
+        "effective_size", metric_budgets, degraded, get_effective_size, (adjacency, vertices), null=null
+    )
+
+    if "effective_size" in degraded:
+        degraded["efficiency"] = degraded["effective_size"]
+        node_efficiencies: list = null
+
+    else:
+        node_efficiencies = get_efficiency(get_degree(adjacency, vertices), effective_size)
+
+    return {
+        "effective_size": effective_size,
+        "efficiency": node_efficiencies,
+        "hierarchy": budgets.run_metric(
+            "hierarchy", metric_budgets, degraded, get_hierarchy, (adjacency, vertices), null=null
+        ),
+    }
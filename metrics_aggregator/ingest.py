@@ -0,0 +1,76 @@
+"""
+Project raw extractor output into the slim records each stage needs.
+
+Extractor output carries issue and comment bodies, and whatever other
+fields the extractor wrote, but after the wordiness count the metrics
+only need who posted in each issue and when it closed. Ingestion makes
+two passes over the raw issues:
+    1. count the words of every issue, dropping its bodies once counted
+    2. intern the userids of every issue's posters and parse "closed_at"
+
+The records it returns are:
+    posters: {issue num: tuple of the interned userid of the issue's
+        author, then of each comment's author, in order}. Periods need
+        nothing else about an issue.
+    wordiness: {issue num: word count}. With posters, all that per-issue
+        metrics need.
+    closed_at: int64 NumPy array of the epoch seconds of each issue's
+        "closed_at", in issue order
+    userids: userid of each interned id, see userids.py
+"""
+
+from metrics_aggregator import userids
+from metrics_aggregator.improved import per_issue
+from metrics_aggregator.utils import date_utils
+
+
+def project_issue_data(issue_data: dict, drop_bodies: bool = False, ids: dict | None = None) -> dict:
+    """
+    Project raw issues into the records of each processing stage.
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+        drop_bodies (bool): remove the issue and comment bodies from
+            issue_data as soon as they are counted, so that they are freed
+            before the second pass. Only for callers that own issue_data.
+        ids (dict | None): userids interned so far, see
+            userids.intern_posters(), when a repository is projected a few
+            issues at a time. "userids" then lists every id so far.
+
+    Returns:
+        dict: {"posters": dict, "wordiness": dict, "closed_at":
+        numpy.ndarray, "userids": list}, see the module docstring
+    """
+    wordiness: dict = {}
+
+    for num, issue in issue_data.items():
+        wordiness[num] = per_issue.get_issue_wordiness(issue)
+
+        if drop_bodies:
+            issue.pop("body", None)
+
+            for comment in issue["comments"].values():
+                comment.pop("body", None)
+
+    posters, userid_table = userids.intern_posters(issue_data, ids)
+
+    return {
+        "posters": posters,
+        "wordiness": wordiness,
+        "closed_at": date_utils.get_closed_at_epochs(issue_data),
+        "userids": userid_table,
+    }
+
+
+def get_issue_records(records: dict, issue_nums: list) -> dict:
+    """
+    Get the per-issue stage records of some issues.
+
+    Args:
+        records (dict): output of project_issue_data().
+        issue_nums (list): issue nums to get records of.
+
+    Returns:
+        dict: {issue num: (word count, posters)}
+    """
+    return {num: (records["wordiness"][num], records["posters"][num]) for num in issue_nums}
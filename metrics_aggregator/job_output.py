@@ -0,0 +1,66 @@
+"""Write the checkpoints and output of a finished job."""
+
+from metrics_aggregator import checkpoint, compact_output, developers, userids
+from metrics_aggregator.improved import graph_store
+
+
+def write_period(ckpt_dir: str, userid_table: list, graph_dir: str | None, period: str, metrics: dict) -> None:
+    """
+    Checkpoint a finished period with its userids restored.
+
+    Args:
+        ckpt_dir (str): path to checkpoint directory of the repository.
+        userid_table (list): userid of each interned id.
+        graph_dir (str | None): path to store the period's graph in, if
+            its metrics carry one under a "graph" key.
+        period (str): period key.
+        metrics (dict): metrics of the period, with interned userids.
+    """
+    if "graph" in metrics:
+        graph_store.write_period_graph(graph_dir, userid_table, period, metrics["keys"], metrics.pop("graph"))
+
+    checkpoint.write_period(ckpt_dir, period, userids.restore_period_userids(userid_table, metrics))
+
+
+def write_job_output(job: dict, ckpt_dir: str, num_shards: int, buckets: dict, computed) -> None:
+    """
+    Assemble the output of a job whose tasks have all finished from its checkpoints.
+
+    Args:
+        job (dict): job configuration.
+        ckpt_dir (str): path to checkpoint directory of the job.
+        num_shards (int): number of per-issue shards of the job.
+        buckets (dict): {period str: list of issue nums} of every period.
+        computed (dict | set): periods computed by this run.
+    """
+    checkpoint.write_checkpoint_output(
+        ckpt_dir, num_shards, buckets, job["out_path"], compact_output.get_output_format(job)
+    )
+
+    if job.get("developer_out_path"):
+        write_developer_series(job["developer_out_path"], ckpt_dir, buckets, computed)
+
+    if not job.get("keep_checkpoints"):
+        checkpoint.remove_checkpoint_dir(ckpt_dir)
+
+
+def write_developer_series(out_path: str, ckpt_dir: str, buckets: dict, computed) -> None:
+    """
+    Add the periods of a finished job to its developer series file.
+
+    Only the periods computed by this run, and periods the file lacks, are
+    added to an existing file.
+
+    Args:
+        out_path (str): path to the job's "developer_out_path".
+        ckpt_dir (str): path to checkpoint directory of the job.
+        buckets (dict): {period str: list of issue nums} of every period.
+        computed (dict | set): periods computed by this run.
+    """
+    series: dict = developers.read_series(out_path)
+    written: set = set(series["periods"])
+
+    periods: list = [period for period in buckets if period in computed or period not in written]
+
+    series = developers.add_period_columns(series, checkpoint.iter_period_developers(ckpt_dir, periods))
+    developers.write_series(series, out_path)
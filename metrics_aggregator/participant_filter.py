@@ -0,0 +1,184 @@
+"""
+Filter bots and outliers out of issue conversations before graphs are built.
+
+Each post of an issue gains an edge to every earlier post by someone else,
+so a bot commenting on thousands of issues, or a thread with hundreds of
+comments, makes up a large share of the edges of a period and of the time
+its betweenness takes. The filter rewrites the interned poster sequences
+of ingest.project_issue_data(), so no edge of a filtered post is ever
+made. Every graph metric, per issue and per period, sees the filtered
+conversations; only wordiness still counts every post.
+
+Options of a job's "participant_filter", applied in this order:
+    exclude_userids: userids whose posts are dropped
+    exclude_patterns: regular expressions; the posts of every userid one
+        of them matches, e.g. "\\[bot\\]$", are dropped; numeric userids
+        are matched as strings
+    max_comments_per_user: most comments kept per user per issue; the
+        issue's own post does not count
+    max_thread_length: most comments kept per issue, the earliest first
+"""
+
+import re
+from metrics_aggregator import cost_model
+
+FILTER_OPTIONS: tuple = ("exclude_userids", "exclude_patterns", "max_comments_per_user", "max_thread_length")
+
+
+def get_filter_config(cfg: dict) -> dict | None:
+    """
+    Get the participant filter of a job.
+
+    Args:
+        cfg (dict): job configuration.
+
+    Raises:
+        ValueError: if the filter has an option not in FILTER_OPTIONS, or a
+            limit that is not a positive integer.
+
+    Returns:
+        dict | None: filter options, or None if the job has no filter
+    """
+    filter_cfg: dict | None = cfg.get("participant_filter")
+
+    if not filter_cfg:
+        return None
+
+    for option, value in filter_cfg.items():
+        if option not in FILTER_OPTIONS:
+            raise ValueError(f"Unknown participant filter option {option!r}, expected one of {', '.join(FILTER_OPTIONS)}")
+
+        if option.startswith("max_") and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f'"{option}" must be a positive integer, got {value!r}')
+
+    return filter_cfg
+
+
+def get_excluded_ids(userid_table: list, filter_cfg: dict, first_id: int = 0) -> set:
+    """
+    Get the interned ids of every excluded userid.
+
+    Args:
+        userid_table (list): userid of each interned id.
+        filter_cfg (dict): output of get_filter_config().
+        first_id (int): only check the ids from this one on, e.g. those
+            interned since the last check.
+
+    Returns:
+        set: interned ids whose posts are dropped
+    """
+    excluded_userids: set = set(filter_cfg.get("exclude_userids", []))
+    patterns: list = [re.compile(pattern) for pattern in filter_cfg.get("exclude_patterns", [])]
+
+    return {
+        userid
+        for userid, name in enumerate(userid_table[first_id:], start=first_id)
+        if name in excluded_userids or any(pattern.search(str(name)) for pattern in patterns)
+    }
+
+
+def filter_posters(posters: tuple, excluded: set, max_comments_per_user=None, max_thread_length=None) -> tuple:
+    """
+    Filter the poster sequence of one issue.
+
+    Args:
+        posters (tuple): interned userid of the author of each post of the
+            issue, starting with the issue itself.
+        excluded (set): interned ids whose posts are dropped.
+        max_comments_per_user (int | None): most comments kept per user.
+        max_thread_length (int | None): most comments kept.
+
+    Returns:
+        tuple: posters of the kept posts, in order. If the issue's author
+        is excluded, it starts with the first kept comment instead, and it
+        is empty if no post is kept.
+    """
+    kept: list = []
+    comment_counts: dict = {}
+
+    for index, userid in enumerate(posters):
+        if userid in excluded:
+            continue
+
+        if index > 0 and max_comments_per_user is not None:
+            comment_counts[userid] = comment_counts.get(userid, 0) + 1
+
+            if comment_counts[userid] > max_comments_per_user:
+                continue
+
+        kept.append(userid)
+
+    if max_thread_length is not None:
+        # the issue's own post, if kept, is not a comment
+        has_issue_post: bool = bool(posters) and posters[0] not in excluded
+        kept = kept[: max_thread_length + has_issue_post]
+
+    return tuple(kept)
+
+
+def filter_records(records: dict, filter_cfg: dict | None, excluded: set | None = None) -> dict:
+    """
+    Filter the poster sequences of a repository's records.
+
+    Args:
+        records (dict): output of ingest.project_issue_data(); its
+            "posters" are replaced by the filtered sequences.
+        filter_cfg (dict | None): output of get_filter_config(); nothing is
+            filtered if None.
+        excluded (set | None): output of get_excluded_ids() for the
+            records' userids, if already known.
+
+    Returns:
+        dict: {"excluded_users", "issues_changed", "posts_removed",
+        "edges_before", "edges_after", "edges_avoided"}, with the edges of
+        the per-issue conversation graphs
+    """
+    stats: dict = dict.fromkeys(
+        ("excluded_users", "issues_changed", "posts_removed", "edges_before", "edges_after", "edges_avoided"), 0
+    )
+
+    if filter_cfg is None:
+        return stats
+
+    if excluded is None:
+        excluded = get_excluded_ids(records["userids"], filter_cfg)
+
+    max_comments_per_user: int | None = filter_cfg.get("max_comments_per_user")
+    max_thread_length: int | None = filter_cfg.get("max_thread_length")
+    stats["excluded_users"] = len(excluded)
+
+    for num, posters in records["posters"].items():
+        kept: tuple = filter_posters(posters, excluded, max_comments_per_user, max_thread_length)
+        edges_before: int = cost_model.count_issue_edges(posters)
+        edges_after: int = edges_before
+
+        if len(kept) < len(posters):
+            records["posters"][num] = kept
+            edges_after = cost_model.count_issue_edges(kept)
+            stats["issues_changed"] += 1
+            stats["posts_removed"] += len(posters) - len(kept)
+
+        stats["edges_before"] += edges_before
+        stats["edges_after"] += edges_after
+
+    stats["edges_avoided"] = stats["edges_before"] - stats["edges_after"]
+
+    return stats
+
+
+def format_filter_stats(stats: dict) -> str:
+    """
+    Describe what a participant filter removed.
+
+    Args:
+        stats (dict): output of filter_records().
+
+    Returns:
+        str: one line summary
+    """
+    share: float = stats["edges_avoided"] / stats["edges_before"] if stats["edges_before"] else 0.0
+
+    return (
+        f"filter removed {stats['posts_removed']} posts from {stats['issues_changed']} issues, "
+        f"avoiding {stats['edges_avoided']} of {stats['edges_before']} edges ({share:.1%})"
+    )
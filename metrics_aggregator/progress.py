@@ -0,0 +1,448 @@
+"""
+Report the progress of a run from the main process.
+
+Workers do not print. Each worker sends what its task is computing over a
+queue, and the main process keeps one view of the whole run:
+    - periods done out of all periods, and tasks done out of all tasks
+    - issues and edges of finished periods per second
+    - the period that has been in flight the longest, and its phase
+    - an ETA from the cost model: the predicted cost still to run, at the
+      rate that predicted cost has been getting done so far
+
+Modes, see MODES:
+    live: one status line, rewritten in place on a terminal, or written
+        every LOG_INTERVAL seconds otherwise
+    quiet: nothing
+    json: one JSON object per line every LOG_INTERVAL seconds, when a
+        repository finishes, and at the end of the run
+"""
+
+import json
+import sys
+import time
+
+CLR = "\x1b[K"
+TAB = " " * 4
+
+MODES: tuple = ("live", "quiet", "json")
+
+# seconds between status lines that are not rewritten in place
+LOG_INTERVAL: float = 10.0
+
+# seconds between refreshes of a live status line
+REFRESH_INTERVAL: float = 0.5
+
+# queue to the main process and key of the running task; set in each
+# worker by init_worker() and run_task()
+EVENT_QUEUE = None
+CURRENT_TASK = None
+
+
+def get_progress_mode(cfg: dict) -> str:
+    """
+    Get how a run reports its progress.
+
+    Args:
+        cfg (dict): run configuration.
+
+    Raises:
+        ValueError: if "progress" is not one of MODES.
+
+    Returns:
+        str: one of MODES
+    """
+    mode: str = cfg.get("progress", "live")
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown progress mode {mode!r}, expected one of {', '.join(MODES)}")
+
+    return mode
+
+
+def init_worker(queue) -> None:
+    """
+    Set the queue a worker process sends its events to.
+
+    Args:
+        queue (multiprocessing.Queue): queue read by the main process.
+    """
+    global EVENT_QUEUE
+    EVENT_QUEUE = queue
+
+
+def run_task(key: tuple, func, args: tuple):
+    """
+    Run a scheduler task in a worker, tagging its events with its key.
+
+    Args:
+        key (tuple): (repo, period, part) of the task.
+        func (callable): function of the task.
+        args (tuple): positional arguments for func.
+
+    Returns:
+        result of func
+    """
+    global CURRENT_TASK
+    CURRENT_TASK = key
+
+    try:
+        return func(*args)
+
+    finally:
+        CURRENT_TASK = None
+
+
+def report_phase(phase: str) -> None:
+    """
+    Tell the main process what the running task is computing.
+
+    Does nothing outside of a scheduler task, e.g. when metrics are
+    computed directly in the main process.
+
+    Args:
+        phase (str): short description, e.g. "networkx metrics".
+    """
+    if EVENT_QUEUE is not None and CURRENT_TASK is not None:
+        EVENT_QUEUE.put((CURRENT_TASK, phase))
+
+
+def make_reporter(tasks: list, mode: str = "live", work: dict | None = None, stream=None) -> dict:
+    """
+    Create the progress state of a run.
+
+    Args:
+        tasks (list): task dicts created by scheduler.make_task().
+        mode (str): one of MODES.
+        work (dict | None): {(repo, period): {"issues": int, "edges": int}}
+            of every period of the run. Tasks of any other period, e.g.
+            per-issue shards, count toward tasks but not periods.
+        stream: file to report to; stdout if None.
+
+    Returns:
+        dict: reporter state for the other functions of this module
+    """
+    stream = stream or sys.stdout
+    work = work or {}
+    reporter: dict = {
+        "mode": mode,
+        "stream": stream,
+        "in_place": mode == "live" and stream.isatty(),
+        "start": time.perf_counter(),
+        "last_log": time.perf_counter(),
+        "tasks_total": 0,
+        "tasks_done": 0,
+        "cost_total": 0.0,
+        "cost_done": 0.0,
+        "periods": {},
+        "periods_total": 0,
+        "periods_done": 0,
+        "issues": 0,
+        "edges": 0,
+        "repos": {},
+    }
+
+    add_tasks(reporter, tasks, work)
+
+    return reporter
+
+
+def add_tasks(reporter: dict, tasks: list, work: dict | None = None) -> None:
+    """
+    Count tasks handed to the scheduler while the run is going.
+
+    A period whose tasks had all finished is no longer counted as done
+    until its new tasks finish too.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        tasks (list): task dicts created by scheduler.make_task().
+        work (dict | None): {(repo, period): {"issues": int, "edges": int}}
+            of the periods of tasks, see make_reporter().
+    """
+    work = work or {}
+
+    for task in tasks:
+        key: tuple = (task["repo"], task["period"])
+        period: dict = reporter["periods"].setdefault(
+            key, {"tasks": 0, "done": 0, "start": None, "phase": None, "work": None}
+        )
+
+        if period["tasks"] and period["done"] == period["tasks"]:
+            period["start"] = None
+
+            if period["work"] is not None:
+                reporter["periods_done"] -= 1
+                reporter["issues"] -= period["work"]["issues"]
+                reporter["edges"] -= period["work"]["edges"]
+
+        period["work"] = work.get(key, period["work"])
+        period["tasks"] += 1
+
+        repo: dict = open_repo(reporter, task["repo"], streaming=None)
+        repo["tasks"] += 1
+
+    reporter["tasks_total"] += len(tasks)
+    reporter["cost_total"] += sum(task["cost"] for task in tasks)
+    reporter["periods_total"] = sum(period["work"] is not None for period in reporter["periods"].values())
+
+
+def open_repo(reporter: dict, repo: str, streaming: bool | None = True) -> dict:
+    """
+    Get the progress of a repository, adding it if it is new.
+
+    A streaming repository is not complete when all of its tasks so far
+    have finished, since more may come, until close_repo() is called.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        repo (str): name of the repository.
+        streaming (bool | None): whether more tasks of the repository may
+            come; left as it is if None.
+
+    Returns:
+        dict: {"tasks", "done", "start", "streaming"} of the repository
+    """
+    item: dict = reporter["repos"].setdefault(repo, {"tasks": 0, "done": 0, "start": None, "streaming": False})
+
+    if streaming is not None:
+        item["streaming"] = streaming
+
+    return item
+
+
+def close_repo(reporter: dict, repo: str) -> None:
+    """
+    Note that a streaming repository has no more tasks to come.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        repo (str): name of the repository.
+    """
+    item: dict = open_repo(reporter, repo, streaming=False)
+
+    if item["done"] == item["tasks"]:
+        report_repo_done(reporter, repo)
+
+
+def mark_dispatched(reporter: dict, task: dict) -> None:
+    """
+    Start the timers of a task's period and repository.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        task (dict): task sent to a worker.
+    """
+    now: float = time.perf_counter()
+
+    for item in (reporter["periods"][(task["repo"], task["period"])], reporter["repos"][task["repo"]]):
+        if item["start"] is None:
+            item["start"] = now
+
+
+def mark_done(reporter: dict, task: dict) -> None:
+    """
+    Count a finished task, and its period and repository once complete.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        task (dict): finished task.
+    """
+    reporter["tasks_done"] += 1
+    reporter["cost_done"] += task["cost"]
+
+    period: dict = reporter["periods"][(task["repo"], task["period"])]
+    period["done"] += 1
+
+    if period["done"] == period["tasks"] and period["work"] is not None:
+        reporter["periods_done"] += 1
+        reporter["issues"] += period["work"]["issues"]
+        reporter["edges"] += period["work"]["edges"]
+
+    repo: dict = reporter["repos"][task["repo"]]
+    repo["done"] += 1
+
+    if repo["done"] == repo["tasks"] and not repo["streaming"]:
+        report_repo_done(reporter, task["repo"])
+
+
+def report_repo_done(reporter: dict, repo: str) -> None:
+    """
+    Report that every task of a repository has finished.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        repo (str): name of the repository.
+    """
+    start: float | None = reporter["repos"][repo]["start"]
+    elapsed: float = 0.0 if start is None else time.perf_counter() - start
+
+    if reporter["mode"] == "json":
+        write_json(reporter, {"event": "repo_done", "repo": repo, "seconds": elapsed})
+
+    elif reporter["mode"] == "live":
+        write_line(reporter, f"{TAB}{repo}: complete in {elapsed:.1f}s")
+
+
+def drain_events(reporter: dict, queue) -> None:
+    """
+    Apply every event workers have sent so far.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        queue (multiprocessing.Queue): queue workers send events to.
+    """
+    while not queue.empty():
+        (repo, period, _), phase = queue.get()
+        reporter["periods"][(repo, period)]["phase"] = phase
+
+
+def get_status(reporter: dict) -> dict:
+    """
+    Summarize the progress of a run.
+
+    Args:
+        reporter (dict): output of make_reporter().
+
+    Returns:
+        dict: {"seconds", "periods_done", "periods_total", "tasks_done",
+        "tasks_total", "issues_per_second", "edges_per_second",
+        "slowest": {"repo", "period", "seconds", "phase"} or None,
+        "eta_seconds": float or None before any task has finished}
+    """
+    now: float = time.perf_counter()
+    elapsed: float = max(now - reporter["start"], 1e-9)
+    slowest: dict | None = None
+
+    for (repo, period_key), period in reporter["periods"].items():
+        if period["start"] is None or period["done"] == period["tasks"]:
+            continue
+
+        seconds: float = now - period["start"]
+
+        if slowest is None or seconds > slowest["seconds"]:
+            slowest = {"repo": repo, "period": period_key, "seconds": seconds, "phase": period["phase"]}
+
+    eta: float | None = None
+
+    if reporter["cost_done"] > 0:
+        eta = max(reporter["cost_total"] - reporter["cost_done"], 0.0) * elapsed / reporter["cost_done"]
+
+    return {
+        "seconds": elapsed,
+        "periods_done": reporter["periods_done"],
+        "periods_total": reporter["periods_total"],
+        "tasks_done": reporter["tasks_done"],
+        "tasks_total": reporter["tasks_total"],
+        "issues_per_second": reporter["issues"] / elapsed,
+        "edges_per_second": reporter["edges"] / elapsed,
+        "slowest": slowest,
+        "eta_seconds": eta,
+    }
+
+
+def format_status(status: dict) -> str:
+    """
+    Write the progress of a run as one line.
+
+    Args:
+        status (dict): output of get_status().
+
+    Returns:
+        str: status line
+    """
+    line: str = (
+        f"{TAB}{status['periods_done']}/{status['periods_total']} periods, "
+        f"{status['tasks_done']}/{status['tasks_total']} tasks, {status['seconds']:.0f}s | "
+        f"{status['issues_per_second']:.1f} issues/s, {status['edges_per_second']:.0f} edges/s"
+    )
+    slowest: dict | None = status["slowest"]
+
+    if slowest is not None:
+        phase: str = f", {slowest['phase']}" if slowest["phase"] else ""
+        line += f" | slowest: {slowest['repo']} {slowest['period']} ({slowest['seconds']:.0f}s{phase})"
+
+    eta: str = "?" if status["eta_seconds"] is None else f"{status['eta_seconds']:.0f}s"
+
+    return f"{line} | ETA {eta}"
+
+
+def show(reporter: dict, force: bool = False) -> None:
+    """
+    Report the progress of a run if it is time to.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        force (bool): report even if LOG_INTERVAL has not passed.
+    """
+    if reporter["mode"] == "quiet":
+        return
+
+    now: float = time.perf_counter()
+
+    if not (reporter["in_place"] or force or now - reporter["last_log"] >= LOG_INTERVAL):
+        return
+
+    reporter["last_log"] = now
+
+    if reporter["mode"] == "json":
+        write_json(reporter, {"event": "progress", **get_status(reporter)})
+
+    elif reporter["in_place"]:
+        reporter["stream"].write(f"\r{format_status(get_status(reporter))}{CLR}")
+        reporter["stream"].flush()
+
+    else:
+        write_line(reporter, format_status(get_status(reporter)))
+
+
+def finish(reporter: dict) -> None:
+    """
+    Report the end of a run.
+
+    Args:
+        reporter (dict): output of make_reporter().
+    """
+    if reporter["mode"] == "json":
+        write_json(reporter, {"event": "done", **get_status(reporter)})
+
+    elif reporter["mode"] == "live":
+        write_line(reporter, format_status(get_status(reporter)))
+
+
+def log(mode: str, line: str) -> None:
+    """
+    Write a line about the setup or outcome of a run, outside its status line.
+
+    Only "live" mode writes it, so that "json" output stays one JSON object
+    per line and "quiet" output stays empty.
+
+    Args:
+        mode (str): one of MODES.
+        line (str): line to write.
+    """
+    if mode == "live":
+        print(line, flush=True)
+
+
+def write_line(reporter: dict, line: str) -> None:
+    """
+    Write a line that stays, above a status line rewritten in place.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        line (str): line to write.
+    """
+    prefix: str = f"\r{CLR}" if reporter["in_place"] else ""
+
+    print(f"{prefix}{line}", file=reporter["stream"], flush=True)
+
+
+def write_json(reporter: dict, event: dict) -> None:
+    """
+    Write one machine-readable event.
+
+    Args:
+        reporter (dict): output of make_reporter().
+        event (dict): event to write.
+    """
+    print(json.dumps(event), file=reporter["stream"], flush=True)
@@ -0,0 +1,222 @@
+"""Shared process pool scheduling for period metric tasks."""
+
+import bisect
+from concurrent import futures
+import multiprocessing
+from queue import Empty
+from metrics_aggregator import progress
+
+
+WORKERS: int = 10
+
+# seconds to wait for a task to finish before checking for streamed tasks
+# again, while some workers are idle
+FEED_INTERVAL: float = 0.05
+
+
+def make_task(
+    repo: str, period: str, part, cost: float, func, args: tuple, on_result=None, memory: int = 0
+) -> dict:
+    """
+    Create a unit of work for the shared scheduler.
+
+    Args:
+        repo (str): name of the repository the task belongs to.
+        period (str): period key the task computes metrics for.
+        part: identifier of the slice of the period's work this task covers.
+        cost (float): estimated cost of the task; higher runs earlier.
+        func (callable): module-level function to run in a worker.
+        args (tuple): positional arguments for func.
+        on_result (callable): called in the main process with the result
+            of the task as soon as it finishes. If given, the result is
+            not kept by run_tasks().
+        memory (int): estimated bytes the task needs in its worker.
+
+    Returns:
+        dict: task description
+    """
+    return {
+        "repo": repo,
+        "period": period,
+        "part": part,
+        "cost": cost,
+        "func": func,
+        "args": args,
+        "on_result": on_result,
+        "memory": memory,
+    }
+
+
+def get_task_key(task: dict) -> tuple:
+    """
+    Get the key a task's result is stored under.
+
+    Args:
+        task (dict): task created by make_task().
+
+    Returns:
+        tuple: (repo, period, part)
+    """
+    return task["repo"], task["period"], task["part"]
+
+
+def run_tasks(
+    tasks: list,
+    workers: int = WORKERS,
+    memory_budget: int | None = None,
+    progress_mode: str = "live",
+    work: dict | None = None,
+    incoming=None,
+    streams: tuple = (),
+) -> dict:
+    """
+    Run tasks from any number of repositories on one process pool.
+
+    Tasks are dispatched most expensive first, so tasks from different
+    repositories are interleaved by estimated cost and the longest tasks
+    do not end up running alone at the end of the run. At most one task
+    per worker is in flight at a time.
+
+    With a memory budget, a task is only dispatched while the estimated
+    memory of all tasks in flight stays within the budget; the most
+    expensive task that fits goes first. A task larger than the whole
+    budget runs on its own.
+
+    Progress is reported from the main process, see progress.py.
+
+    Repositories named in streams hand over their tasks while the run is
+    going, through incoming, rather than all at once in tasks. Each item
+    they put is (repo, list of tasks, work of the tasks' periods), and a
+    repository puts (repo, None, None) once it has no more tasks. The run
+    lasts until every one of them has.
+
+    Args:
+        tasks (list): task dicts created by make_task().
+        workers (int): number of worker processes.
+        memory_budget (int | None): most bytes of estimated task memory in
+            flight at a time; unbounded if None.
+        progress_mode (str): one of progress.MODES.
+        work (dict | None): {(repo, period): {"issues": int, "edges": int}}
+            of the periods the tasks compute, for throughput reporting.
+        incoming (queue.Queue | None): queue streamed tasks are put on.
+        streams (tuple): names of the repositories that put tasks on
+            incoming.
+
+    Returns:
+        dict: {(repo, period, part): result of the task} for tasks without
+        an on_result callback
+    """
+    res: dict = {}
+    queue: list = sorted(tasks, key=lambda task: task["cost"])
+    reporter: dict = progress.make_reporter(tasks, progress_mode, work)
+    events = multiprocessing.Queue()
+    in_flight: dict = {}
+    open_streams: set = set(streams)
+
+    for repo in open_streams:
+        progress.open_repo(reporter, repo)
+
+    with futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=progress.init_worker, initargs=(events,)
+    ) as executor:
+        while queue or in_flight or open_streams:
+            if open_streams:
+                receive_tasks(incoming, queue, reporter, open_streams, block=not (queue or in_flight))
+
+            while queue and len(in_flight) < workers:
+                index = get_next_task_index(queue, in_flight.values(), memory_budget)
+
+                if index is None:
+                    break
+
+                task = queue.pop(index)
+                progress.mark_dispatched(reporter, task)
+                in_flight[
+                    executor.submit(progress.run_task, get_task_key(task), task["func"], task["args"])
+                ] = task
+
+            timeout: float = FEED_INTERVAL if open_streams and len(in_flight) < workers else progress.REFRESH_INTERVAL
+            done, _ = futures.wait(in_flight, timeout=timeout, return_when=futures.FIRST_COMPLETED)
+            progress.drain_events(reporter, events)
+
+            for future in done:
+                task = in_flight.pop(future)
+
+                if task["on_result"] is None:
+                    res[get_task_key(task)] = future.result()
+                else:
+                    task["on_result"](future.result())
+
+                progress.mark_done(reporter, task)
+
+            progress.show(reporter)
+
+    progress.finish(reporter)
+
+    return res
+
+
+def receive_tasks(incoming, queue: list, reporter: dict, open_streams: set, block: bool = False) -> None:
+    """
+    Queue the tasks streamed in since the last call.
+
+    Args:
+        incoming (queue.Queue): queue streamed tasks are put on, see
+            run_tasks().
+        queue (list): waiting tasks, sorted by ascending cost; updated in
+            place.
+        reporter (dict): output of progress.make_reporter().
+        open_streams (set): repositories that may still put tasks;
+            updated in place.
+        block (bool): wait up to progress.REFRESH_INTERVAL for an item if
+            there is none yet.
+    """
+    try:
+        item: tuple = incoming.get(timeout=progress.REFRESH_INTERVAL) if block else incoming.get_nowait()
+
+        while True:
+            repo, tasks, work = item
+
+            if tasks is None:
+                open_streams.discard(repo)
+                progress.close_repo(reporter, repo)
+
+            else:
+                progress.add_tasks(reporter, tasks, work)
+
+                for task in tasks:
+                    bisect.insort(queue, task, key=lambda task: task["cost"])
+
+            item = incoming.get_nowait()
+
+    except Empty:
+        pass
+
+
+def get_next_task_index(queue: list, in_flight, memory_budget: int | None) -> int | None:
+    """
+    Pick the next task to dispatch.
+
+    Args:
+        queue (list): waiting tasks, sorted by ascending cost.
+        in_flight (iterable): tasks currently running.
+        memory_budget (int | None): most bytes of estimated task memory in
+            flight at a time; unbounded if None.
+
+    Returns:
+        int | None: index into queue of the most expensive task that fits,
+        or None if none fits until a running task finishes
+    """
+    if memory_budget is None:
+        return len(queue) - 1
+
+    in_use: int = sum(task["memory"] for task in in_flight)
+
+    if in_use == 0:
+        return len(queue) - 1
+
+    for index in range(len(queue) - 1, -1, -1):
+        if in_use + queue[index]["memory"] <= memory_budget:
+            return index
+
+    return None
@@ -1,18 +1,18 @@
 """Tools for gathering metrics about the communicators in a repo's issues."""
 
 import concurrent.futures
-import datetime
 import math
 import igraph
 import networkx
 from metrics_aggregator import __hierarchy as hierarchy
+from metrics_aggregator import progress
+from metrics_aggregator.utils import date_utils
 
 
-CLR = "\x1b[K"
 TAB = " " * 4
 
 
-def gather_all_period_comm_metrics(issue_data: dict) -> dict:
+def gather_all_period_comm_metrics(issue_data: dict, progress_mode: str = "live") -> dict:
     """
     Create a dictionary of metrics for all issues in a dictionary of issues.
 
@@ -28,6 +28,7 @@ def gather_all_period_comm_metrics(issue_data: dict) -> dict:
     Args:
         issue_data (dict): dict of data about all issues of interest in a
         repository's history.
+        progress_mode (str): one of progress.MODES; only "live" prints.
 
     Returns:
         dict: {period str: dict of metrics from graph of "conversation" for
@@ -37,12 +38,12 @@ def gather_all_period_comm_metrics(issue_data: dict) -> dict:
     num_workers: int = 12
     total_metrics: dict = {}
 
-    print(f"\n{TAB}Partitioning issues into temporal periods...")
+    progress.log(progress_mode, f"\n{TAB}Partitioning issues into temporal periods...")
     issue_buckets: dict = create_partitioned_issue_dict(issue_data)
-    print(f"{TAB*2}- {len(issue_data.keys())} keys")
-    print(f"{TAB*2}- {len(issue_buckets.keys())} buckets\n")
+    progress.log(progress_mode, f"{TAB*2}- {len(issue_data.keys())} keys")
+    progress.log(progress_mode, f"{TAB*2}- {len(issue_buckets.keys())} buckets\n")
 
-    print(f"{TAB}Calculating metrics...")
+    progress.log(progress_mode, f"{TAB}Calculating metrics...")
     with concurrent.futures.ThreadPoolExecutor(
         max_workers=num_workers
     ) as executor:
@@ -54,6 +55,7 @@ def gather_all_period_comm_metrics(issue_data: dict) -> dict:
                 issue_nums,
                 total_metrics,
                 id_index,
+                progress_mode,
             )
             id_index += 1
 
@@ -83,57 +85,12 @@ def create_partitioned_issue_dict(issue_data: dict) -> dict:
         dict: {date string: python list of issue nums}
     """
 
-    def datetime_to_github_time_str(date: datetime.datetime) -> str:
-        return datetime.datetime.strftime(date, "%m/%d/%y, %I:%M:%S %p")
+    start_date, fmt = date_utils.get_first_closed_at(issue_data)
 
-    def get_start_date(issue_data: dict) -> datetime.datetime:
-        """
-        TODO.
+    # periods start at midnight of the day the first issue was closed
+    start_date = start_date.replace(hour=0, minute=0, second=0)
 
-        Args:
-            issue_data (dict):
-
-        Returns:
-            datetime.datetime:
-        """
-        first_item_val = list(issue_data.values())[0]
-        start_date: str = first_item_val["closed_at"].split(",")[0]
-
-        return datetime.datetime.strptime(start_date, "%m/%d/%y")
-
-    def github_time_str_to_datetime(date: str) -> datetime.datetime:
-        return datetime.datetime.strptime(date, "%m/%d/%y, %I:%M:%S %p")
-
-    def init_issue_interval_dict_keys(issues: dict) -> dict:
-
-        interval: datetime.timedelta = datetime.timedelta(weeks=12, days=0)
-        issue_interval_data: dict = {}
-        start_date: datetime.datetime = get_start_date(issues)
-
-        while start_date < datetime.datetime.now():
-            next_interval_start = start_date + interval
-            interval_date_str = datetime_to_github_time_str(
-                next_interval_start
-            )
-            issue_interval_data[interval_date_str] = []
-            start_date = next_interval_start
-
-        return issue_interval_data
-
-    issue_interval_data = init_issue_interval_dict_keys(issue_data)
-    date_key_list = list(issue_interval_data.keys())
-
-    for key, val in issue_data.items():
-        cur_date = github_time_str_to_datetime(val["closed_at"])
-
-        # NOTE: could use binary search if performance became an issue
-        i = 0
-        while cur_date > github_time_str_to_datetime(date_key_list[i]):
-            i += 1
-
-        issue_interval_data[date_key_list[i]].append(key)
-
-    return issue_interval_data
+    return date_utils.partition_by_closed_at(issue_data, start_date, fmt, date_utils.LEGACY_FMT)
 
 
 def gather_single_period_comm_metrics(
@@ -142,6 +99,7 @@ def gather_single_period_comm_metrics(
     issue_nums: list,
     metrics_output: dict,
     run_id: int,
+    progress_mode: str = "live",
 ):
     """
     Gather all communication metrics for one temporal period.
@@ -149,12 +107,13 @@ def gather_single_period_comm_metrics(
     Args:
         period ():
         issue_nums ():
+        progress_mode (str): one of progress.MODES; only "live" prints.
     """
     keys: dict = {"keys": issue_nums}
 
     title: str = f"{period}, {len(issue_nums)} issues"
 
-    print(f"{TAB*2}{run_id} Initiated: {title}")
+    progress.log(progress_mode, f"{TAB*2}{run_id} Initiated: {title}")
 
     cur_bucket_graph: igraph.Graph = make_igraph_period_network_matrix(
         issue_data, issue_nums
@@ -170,7 +129,7 @@ def gather_single_period_comm_metrics(
         **networkx_metrics,
     }
 
-    print(f"{TAB*2}{run_id} Complete: {title}")
+    progress.log(progress_mode, f"{TAB*2}{run_id} Complete: {title}")
 
 
 def make_igraph_period_network_matrix(
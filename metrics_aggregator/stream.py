@@ -0,0 +1,176 @@
+"""
+Read a repository's issues a batch at a time and find its finished periods.
+
+A job with "stream_input" does not wait for its whole input to be read
+before any metric is computed. Its issues are parsed a batch at a time, see
+file_io_utils.iter_jsonfile_items(), and each batch is projected and
+filtered as ingest.py and participant_filter.py would the whole file, and
+added to its periods.
+
+Extractor output is sorted by "closed_at", so a period has all of its
+issues as soon as an issue closed after the period's end has been read,
+and can be computed while later issues are still being read. Input that
+is not sorted still gives the same periods: an issue of a period that was
+already handed out sends the period out again with all of its issues, and
+is counted under the stream's "reordered".
+"""
+
+import numpy
+from metrics_aggregator import dedup, ingest, participant_filter
+from metrics_aggregator.utils import date_utils
+from metrics_aggregator.utils import file_io_utils as file_io
+
+# issues parsed and projected at a time
+STREAM_BATCH_SIZE: int = 500
+
+
+def make_stream(
+    filter_cfg: dict | None = None, interval=date_utils.PERIOD_INTERVAL, dedup_issues: bool = False
+) -> dict:
+    """
+    Create the state of a repository read a batch at a time.
+
+    Args:
+        filter_cfg (dict | None): output of
+            participant_filter.get_filter_config().
+        interval (datetime.timedelta): length of a period.
+        dedup_issues (bool): drop issues whose content repeats an earlier
+            issue's, see dedup.drop_duplicate_issues().
+
+    Returns:
+        dict: stream state for the other functions of this module. Its
+        "records" are those of ingest.project_issue_data() without
+        "closed_at", and its "buckets" those of
+        per_period.create_partitioned_issue_dict(), for the issues read so
+        far.
+    """
+    return {
+        "ids": {},
+        "filter": filter_cfg,
+        "excluded": set(),
+        # all zero until a batch is filtered
+        "filter_stats": participant_filter.filter_records({}, None),
+        # digests of the issues read so far, if duplicates are dropped
+        "digests": set() if dedup_issues else None,
+        "duplicates": 0,
+        "records": {"posters": {}, "wordiness": {}, "userids": []},
+        "interval": interval,
+        "period_keys": [],
+        "end_epochs": None,
+        "buckets": {},
+        # index of the latest period an issue has been read into, of the
+        # first period not handed out yet, and of the periods handed out
+        # before some of their issues were read
+        "frontier": 0,
+        "next_period": 0,
+        "stale": set(),
+        "reordered": 0,
+    }
+
+
+def iter_issue_batches(in_path: str, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Read the issues of extractor output a batch at a time.
+
+    Args:
+        in_path (str): path to extractor output.
+        batch_size (int): most issues per batch.
+
+    Yields:
+        dict: {issue num: issue data} of the next issues, in input order
+    """
+    issue_batch: dict = {}
+
+    for num, issue in file_io.iter_jsonfile_items(in_path):
+        issue_batch[num] = issue
+
+        if len(issue_batch) == batch_size:
+            yield issue_batch
+            issue_batch = {}
+
+    if issue_batch:
+        yield issue_batch
+
+
+def add_issue_batch(stream: dict, issue_data: dict) -> list:
+    """
+    Add a batch of raw issues to a stream's records and periods.
+
+    Args:
+        stream (dict): output of make_stream(), updated in place.
+        issue_data (dict): next issues of the repository; their bodies are
+            dropped, and so are duplicate issues if the stream drops them.
+
+    Returns:
+        list: issue nums of the batch, in input order
+    """
+    records: dict = stream["records"]
+
+    if stream["digests"] is not None:
+        stream["duplicates"] += dedup.drop_duplicate_issues(issue_data, stream["digests"])
+
+    batch_records: dict = ingest.project_issue_data(issue_data, drop_bodies=True, ids=stream["ids"])
+
+    if stream["filter"] is not None:
+        stream["excluded"] |= participant_filter.get_excluded_ids(
+            batch_records["userids"], stream["filter"], len(records["userids"])
+        )
+        stats: dict = participant_filter.filter_records(batch_records, stream["filter"], stream["excluded"])
+
+        for key, val in stats.items():
+            stream["filter_stats"][key] += val
+
+        stream["filter_stats"]["excluded_users"] = len(stream["excluded"])
+
+    records["posters"].update(batch_records["posters"])
+    records["wordiness"].update(batch_records["wordiness"])
+    records["userids"] = batch_records["userids"]
+    issue_nums: list = list(batch_records["posters"])
+
+    if not issue_nums:
+        return issue_nums
+
+    if not stream["period_keys"]:
+        # periods start at the first issue read, as in a whole file
+        start_date = date_utils.from_epoch(int(batch_records["closed_at"][0]))
+        stream["period_keys"], stream["end_epochs"] = date_utils.get_period_ends(
+            start_date, date_utils.ISO_FMT, stream["interval"]
+        )
+        stream["buckets"] = {key: [] for key in stream["period_keys"]}
+
+    indices = numpy.searchsorted(stream["end_epochs"], batch_records["closed_at"], side="left")
+
+    for num, index in zip(issue_nums, indices.tolist()):
+        # an issue closed after the last period end has no period, and
+        # raises an IndexError
+        stream["buckets"][stream["period_keys"][index]].append(num)
+        stream["frontier"] = max(stream["frontier"], index)
+
+        if index < stream["next_period"]:
+            stream["stale"].add(index)
+            stream["reordered"] += 1
+
+    return issue_nums
+
+
+def pop_ready_periods(stream: dict, final: bool = False) -> list:
+    """
+    Get the periods of a stream that can be computed now.
+
+    Args:
+        stream (dict): output of make_stream(), updated in place.
+        final (bool): every issue has been read, so every period is ready.
+
+    Returns:
+        list: keys of the periods that have not been handed out yet and
+        now have all of their issues, followed by those handed out before
+        some of their issues were read, each to be computed from its
+        current "buckets"
+    """
+    limit: int = len(stream["period_keys"]) if final else stream["frontier"]
+    ready: list = list(range(stream["next_period"], limit)) + sorted(stream["stale"])
+
+    stream["next_period"] = max(stream["next_period"], limit)
+    stream["stale"].clear()
+
+    return [stream["period_keys"][index] for index in ready]
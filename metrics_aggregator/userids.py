@@ -0,0 +1,143 @@
+"""
+Intern userids into dense integer ids.
+
+Issue data is interned once as it is ingested, so that graphs are built,
+and participants looked up and compared, on small ints rather than
+strings. Ids are mapped back to userids only in the main process, just
+before metrics are written out.
+
+Userids are usually strings. Other values, e.g. numeric ids, are interned
+too but, as in the standard engine, do not count as discussants of an
+issue, and they keep their type when written to JSON or NumPy files.
+"""
+
+import json
+import numpy
+
+
+def intern_posters(issue_data: dict, ids: dict | None = None) -> tuple:
+    """
+    Reduce every issue to the interned userids of the authors of its posts.
+
+    Ids are handed out in order of first appearance, to every userid but
+    null, e.g. of deleted accounts, which is left as it is so that it can
+    still be told apart from real users. Userids need not be strings:
+    numeric ids are interned too, so an interned id is never mistaken for
+    a userid.
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+        ids (dict | None): {userid: id} handed out so far, updated in
+            place, to intern a repository's issues a few at a time.
+
+    Returns:
+        tuple: ({issue num: tuple of the interned userid of the issue's
+        author, then of each comment's author, in order}, list of userid
+        of each id)
+    """
+    ids = {} if ids is None else ids
+
+    def intern(userid):
+        if userid is None:
+            return None
+
+        return ids.setdefault(userid, len(ids))
+
+    posters: dict = {
+        num: (intern(issue["userid"]), *(intern(comment["userid"]) for comment in issue["comments"].values()))
+        for num, issue in issue_data.items()
+    }
+
+    return posters, list(ids)
+
+
+def get_userid(table: list, userid):
+    """
+    Map an interned id back to its userid.
+
+    Args:
+        table (list): userid of each id, from intern_posters().
+        userid: interned id, or null.
+
+    Returns:
+        userid as it appeared in the input
+    """
+    if userid is None:
+        return None
+
+    return table[userid]
+
+
+def restore_period_userids(table: list, metrics: dict) -> dict:
+    """
+    Map the interned ids in the metrics of a period back to userids.
+
+    Args:
+        table (list): userid of each id, from intern_posters().
+        metrics (dict): metrics of a period, with an optional "developers"
+            key.
+
+    Returns:
+        dict: the same metrics, updated in place
+    """
+    for issue_metrics in metrics.get("per_period_issue", {}).values():
+        issue_metrics["participants"] = [get_userid(table, userid) for userid in issue_metrics["participants"]]
+
+    if "developers" in metrics:
+        # pairs rather than objects, whose keys JSON would turn into strings
+        metrics["developers"] = {
+            metric_name: [[get_userid(table, userid), val] for userid, val in values.items()]
+            for metric_name, values in metrics["developers"].items()
+        }
+
+    return metrics
+
+
+def get_non_string_ids(table: list, ids) -> frozenset:
+    """
+    Get the interned ids whose userid is not a string.
+
+    Args:
+        table (list): userid of each id, from intern_posters().
+        ids (iterable): interned ids, or null, to check.
+
+    Returns:
+        frozenset: those of ids whose userid is not a string
+    """
+    return frozenset(userid for userid in ids if userid is not None and not isinstance(table[userid], str))
+
+
+def pack_userids(userid_list: list) -> dict:
+    """
+    Lay out userids as NumPy arrays, keeping the type of those that are not strings.
+
+    Args:
+        userid_list (list): userids, null included.
+
+    Returns:
+        dict: {"userids": str array of each userid, or of the JSON of one
+        that is not a string, "json_userids": bool array, True where the
+        userid is stored as JSON}
+    """
+    is_json: list = [not isinstance(userid, str) for userid in userid_list]
+
+    return {
+        "userids": numpy.array(
+            [json.dumps(userid) if as_json else userid for userid, as_json in zip(userid_list, is_json)], dtype=str
+        ),
+        "json_userids": numpy.array(is_json, dtype=bool),
+    }
+
+
+def unpack_userids(texts, is_json) -> list:
+    """
+    Read userids back from the arrays of pack_userids().
+
+    Args:
+        texts (numpy.ndarray): "userids" array.
+        is_json (numpy.ndarray): "json_userids" array.
+
+    Returns:
+        list: userids
+    """
+    return [json.loads(text) if as_json else text for text, as_json in zip(texts.tolist(), is_json.tolist())]
@@ -1,3 +1,5 @@
 """TODO."""
+import metrics_aggregator.utils.date_utils
 import metrics_aggregator.utils.dict_utils
 import metrics_aggregator.utils.file_io_utils
+import metrics_aggregator.utils.record_file_utils
@@ -0,0 +1,289 @@
+"""
+Utilities for parsing issue timestamps and partitioning issues by date.
+
+Extractor output stores "closed_at" either in GitHub's ISO format or in the
+legacy format of older extractor versions. The format is detected once per
+dataset, and timestamps are parsed by slicing their fixed-width fields
+rather than with datetime.strptime(), which is far slower. Timestamps that
+do not have the expected width fall back to datetime.strptime().
+"""
+
+import datetime
+import numpy
+
+
+ISO_FMT: str = "%Y-%m-%dT%H:%M:%SZ"
+LEGACY_FMT: str = "%m/%d/%y, %I:%M:%S %p"
+
+# length of a timestamp of each format, e.g. "2022-07-07T13:05:09Z" and
+# "07/07/22, 01:05:09 PM"
+FMT_WIDTHS: dict = {ISO_FMT: 20, LEGACY_FMT: 21}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# length of a period
+PERIOD_INTERVAL = datetime.timedelta(weeks=12, days=0)
+
+
+def detect_format(date: str) -> str:
+    """
+    Detect which format a timestamp is written in.
+
+    Args:
+        date (str): timestamp from extractor output.
+
+    Raises:
+        ValueError: if the timestamp is in neither format.
+
+    Returns:
+        str: ISO_FMT or LEGACY_FMT
+    """
+    for fmt in (ISO_FMT, LEGACY_FMT):
+        try:
+            datetime.datetime.strptime(date, fmt)
+
+        except ValueError:
+            continue
+
+        return fmt
+
+    raise ValueError(f"Unknown timestamp format: {date!r}")
+
+
+def get_parser(fmt: str):
+    """
+    Get the fast parser of a timestamp format.
+
+    Args:
+        fmt (str): ISO_FMT or LEGACY_FMT.
+
+    Returns:
+        callable: str -> naive datetime.datetime
+    """
+    if fmt == ISO_FMT:
+        return parse_iso_date
+
+    return parse_legacy_date
+
+
+def parse_iso_date(date: str) -> datetime.datetime:
+    """
+    Parse a timestamp in ISO_FMT.
+
+    Args:
+        date (str): e.g. "2022-07-07T13:05:09Z".
+
+    Returns:
+        datetime.datetime: naive datetime of the timestamp
+    """
+    if len(date) != FMT_WIDTHS[ISO_FMT] or date[-1] != "Z":
+        return datetime.datetime.strptime(date, ISO_FMT)
+
+    return datetime.datetime.fromisoformat(date[:-1])
+
+
+def parse_legacy_date(date: str) -> datetime.datetime:
+    """
+    Parse a timestamp in LEGACY_FMT.
+
+    Args:
+        date (str): e.g. "07/07/22, 01:05:09 PM".
+
+    Returns:
+        datetime.datetime: naive datetime of the timestamp
+    """
+    if len(date) != FMT_WIDTHS[LEGACY_FMT]:
+        return datetime.datetime.strptime(date, LEGACY_FMT)
+
+    year: int = int(date[6:8])
+    hour: int = int(date[10:12]) % 12
+
+    if date[19:21].upper() == "PM":
+        hour += 12
+
+    return datetime.datetime(
+        # same pivot as %y: 69-99 are 1969-1999, 00-68 are 2000-2068
+        year + (1900 if year >= 69 else 2000),
+        int(date[0:2]),
+        int(date[3:5]),
+        hour,
+        int(date[13:15]),
+        int(date[16:18]),
+    )
+
+
+def format_date(date: datetime.datetime, fmt: str) -> str:
+    """
+    Write a datetime in a timestamp format.
+
+    Args:
+        date (datetime.datetime): datetime to write.
+        fmt (str): ISO_FMT or LEGACY_FMT.
+
+    Returns:
+        str: timestamp
+    """
+    return datetime.datetime.strftime(date, fmt)
+
+
+def to_epoch(date: datetime.datetime) -> int:
+    """
+    Get the seconds since the epoch of a naive datetime.
+
+    Args:
+        date (datetime.datetime): naive datetime.
+
+    Returns:
+        int: seconds since 1970-01-01T00:00:00
+    """
+    return (date - EPOCH) // datetime.timedelta(seconds=1)
+
+
+def get_closed_at_epochs(issue_data: dict, fmt: str | None = None):
+    """
+    Convert the "closed_at" of every issue to seconds since the epoch.
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+        fmt (str | None): format of the timestamps; detected from the
+            first issue if None.
+
+    Returns:
+        numpy.ndarray: int64 epoch seconds, in issue order
+    """
+    closed_at: list = [issue["closed_at"] for issue in issue_data.values()]
+
+    if not closed_at:
+        return numpy.empty(0, dtype=numpy.int64)
+
+    fmt = fmt or detect_format(closed_at[0])
+
+    if fmt == ISO_FMT and all(len(date) == FMT_WIDTHS[ISO_FMT] for date in closed_at):
+        # NumPy parses ISO timestamps itself, without the trailing "Z"
+        return numpy.array([date[:-1] for date in closed_at], dtype="datetime64[s]").astype(numpy.int64)
+
+    parse = get_parser(fmt)
+
+    return numpy.fromiter((to_epoch(parse(date)) for date in closed_at), dtype=numpy.int64, count=len(closed_at))
+
+
+def from_epoch(seconds: int) -> datetime.datetime:
+    """
+    Get the naive datetime of some seconds since the epoch.
+
+    Args:
+        seconds (int): seconds since 1970-01-01T00:00:00.
+
+    Returns:
+        datetime.datetime: naive datetime
+    """
+    return EPOCH + datetime.timedelta(seconds=seconds)
+
+
+def get_first_closed_at(issue_data: dict) -> tuple:
+    """
+    Parse the "closed_at" of the first issue and detect its format.
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+
+    Returns:
+        tuple: (datetime.datetime, format of the dataset's timestamps)
+    """
+    # only the first issue, which a lazy mapping decodes on its own
+    closed_at: str = next(iter(issue_data.values()))["closed_at"]
+    fmt: str = detect_format(closed_at)
+
+    return get_parser(fmt)(closed_at), fmt
+
+
+def partition_by_closed_at(
+    issue_data: dict,
+    start_date: datetime.datetime,
+    fmt: str,
+    key_fmt: str,
+    interval: datetime.timedelta = PERIOD_INTERVAL,
+) -> dict:
+    """
+    Partition issues into consecutive periods after a start date.
+
+    Period keys are the ends of the periods, written in key_fmt, from one
+    interval after start_date up to the first one after the current time.
+    An issue belongs to the first period whose end is at or after its
+    "closed_at".
+
+    Args:
+        issue_data (dict): dict of data about all issues in a repository.
+        start_date (datetime.datetime): start of the first period.
+        fmt (str): format of the issues' timestamps.
+        key_fmt (str): format of the period keys.
+        interval (datetime.timedelta): length of a period.
+
+    Returns:
+        dict: {period key: list of issue nums}
+    """
+    return partition_epochs(list(issue_data), get_closed_at_epochs(issue_data, fmt), start_date, key_fmt, interval)
+
+
+def get_period_ends(
+    start_date: datetime.datetime, key_fmt: str, interval: datetime.timedelta = PERIOD_INTERVAL
+) -> tuple:
+    """
+    Get the ends of consecutive periods after a start date.
+
+    See partition_by_closed_at().
+
+    Args:
+        start_date (datetime.datetime): start of the first period.
+        key_fmt (str): format of the period keys.
+        interval (datetime.timedelta): length of a period.
+
+    Returns:
+        tuple: (list of period keys, int64 NumPy array of the epoch
+        seconds each period ends at)
+    """
+    period_ends: list = []
+
+    while start_date < datetime.datetime.now():
+        start_date += interval
+        period_ends.append(start_date)
+
+    period_keys: list = [format_date(date, key_fmt) for date in period_ends]
+    end_epochs = numpy.array([to_epoch(date) for date in period_ends], dtype=numpy.int64)
+
+    return period_keys, end_epochs
+
+
+def partition_epochs(
+    issue_nums: list,
+    closed_at,
+    start_date: datetime.datetime,
+    key_fmt: str,
+    interval: datetime.timedelta = PERIOD_INTERVAL,
+) -> dict:
+    """
+    Partition issues into consecutive periods by their closing epochs.
+
+    See partition_by_closed_at().
+
+    Args:
+        issue_nums (list): issue nums, in the order of closed_at.
+        closed_at (numpy.ndarray): epoch seconds each issue was closed at.
+        start_date (datetime.datetime): start of the first period.
+        key_fmt (str): format of the period keys.
+        interval (datetime.timedelta): length of a period.
+
+    Returns:
+        dict: {period key: list of issue nums}
+    """
+    period_keys, end_epochs = get_period_ends(start_date, key_fmt, interval)
+    indices = numpy.searchsorted(end_epochs, closed_at, side="left")
+
+    issue_interval_data: dict = {key: [] for key in period_keys}
+
+    for num, index in zip(issue_nums, indices.tolist()):
+        # an issue closed after the last period end has no period, and
+        # raises an IndexError
+        issue_interval_data[period_keys[index]].append(num)
+
+    return issue_interval_data
@@ -12,6 +12,12 @@ import sys
 
 from metrics_aggregator.utils import dict_utils
 
+# characters read from a JSON file at a time when streaming its items
+READ_CHUNK_SIZE: int = 1 << 20
+
+# characters that may continue a JSON number
+NUMBER_CHARS: str = "0123456789.eE+-"
+
 
 def mk_json_outpath(out_dir: str, repo_title: str, output_type: str) -> str:
     """
@@ -124,6 +130,121 @@ def read_jsonfile_into_dict(in_path: str) -> dict:
     return json_dict
 
 
+def iter_jsonfile_items(in_path: str, chunk_size: int = READ_CHUNK_SIZE):
+    """
+    Read the items of a JSON file's top-level object one at a time.
+
+    The file is read chunk_size characters at a time, and each value is
+    parsed as soon as all of it has been read, so only one item and one
+    chunk are held in memory at a time. Yields the same items, in the same
+    order, as read_jsonfile_into_dict(in_path).items() would, except that
+    a key repeated in the file is yielded each time it appears.
+
+    Args:
+        in_path (str): path to JSON file to read from.
+        chunk_size (int): characters to read at a time.
+
+    Raises:
+        FileNotFoundError: hard exit if a file cannot be found.
+        JSONDecodeError: hard exit if the file is not a JSON object.
+
+    Yields:
+        tuple: (key, value) of each item
+    """
+    decoder = json.JSONDecoder()
+
+    try:
+        file_obj = open(in_path, "r", encoding="UTF-8")
+
+    except FileNotFoundError:
+        print(f'\nFile at "{in_path}" not found!')
+        sys.exit(1)
+
+    with file_obj:
+        text: str = ""
+        pos: int = 0
+        eof: bool = False
+
+        def fill() -> bool:
+            # drop what has been parsed and read another chunk, False at
+            # the end of the file
+            nonlocal text, pos, eof
+
+            chunk: str = "" if eof else file_obj.read(chunk_size)
+            eof = eof or not chunk
+            text, pos = text[pos:] + chunk, 0
+
+            return bool(chunk)
+
+        def skip_space() -> str:
+            # next character that is not whitespace, "" at the end of the file
+            nonlocal pos
+
+            while True:
+                while pos < len(text) and text[pos] in " \t\n\r":
+                    pos += 1
+
+                if pos < len(text) or not fill():
+                    return text[pos : pos + 1]
+
+        def decode():
+            # a number only counts once text goes on past it with a
+            # character that cannot continue it, since a number at the end
+            # of a chunk, e.g. "1500" of "15000.0", may go on in the next one
+            nonlocal pos
+
+            while True:
+                try:
+                    val, end = decoder.raw_decode(text, pos)
+                    is_number: bool = isinstance(val, (int, float)) and not isinstance(val, bool)
+
+                    if eof or not is_number or (end < len(text) and text[end] not in NUMBER_CHARS):
+                        pos = end
+                        return val
+
+                except JSONDecodeError:
+                    if eof:
+                        raise
+
+                fill()
+
+        def expect(chars: str) -> str:
+            nonlocal pos
+
+            char: str = skip_space()
+
+            if not char or char not in chars:
+                raise JSONDecodeError(f"Expecting one of {chars!r}", text, pos)
+
+            pos += 1
+
+            return char
+
+        try:
+            expect("{")
+
+            if skip_space() == "}":
+                return
+
+            while True:
+                if skip_space() != '"':
+                    raise JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+
+                key = decode()
+                expect(":")
+                skip_space()
+
+                yield key, decode()
+
+                if expect(",}") == "}":
+                    return
+
+        except JSONDecodeError as e:
+            print(f"\nNo valid JSON found: {e}\n")
+            print("Exiting...")
+            sys.exit(1)
+
+
 def read_jsontext_into_dict(json_text: str) -> dict:
     """
     Convert text from JSON file into a python dict.
@@ -193,3 +314,71 @@ def write_merged_dict_to_jsonfile(out_dict: dict, out_path: str) -> None:
 
     # write JSON content back to file
     write_dict_to_jsonfile(json_dict, out_path)
+
+
+def write_dict_to_jsonfile_atomically(out_dict: dict, out_path: str) -> None:
+    """
+    Write given Python dictionary to output file as JSON, all or nothing.
+
+    The dictionary is written to a temporary file next to the output file
+    and moved into place, so a run that is killed mid-write never leaves a
+    truncated file at out_path.
+
+    Args:
+        out_dict (dict): dictionary to write as JSON.
+        out_path (str): path to write output to.
+    """
+    tmp_path = f"{out_path}.tmp"
+
+    write_dict_to_jsonfile(out_dict, tmp_path)
+    os.replace(tmp_path, out_path)
+
+
+def write_sections_to_jsonfile(sections: dict, out_path: str, indent: int | None = 4) -> None:
+    """
+    Write a two-level dictionary to a JSON file one item at a time.
+
+    Produces the same text as write_dict_to_jsonfile() would for
+    {section: dict(items) for section, items in sections.items()}, but
+    only one item is held in memory at a time.
+
+    Args:
+        sections (dict): {section key: iterable of (key, value) pairs}; a
+            list is written as a JSON array instead, and is only read once
+            its section is reached, so earlier sections may still fill it.
+        out_path (str): path to write output to.
+        indent (int | None): indent of the values of items, as in
+            json.dumps(); None writes each value on one line, without
+            spaces.
+    """
+    tab: str = " " * 4
+
+    def dump(val, depth: int) -> str:
+        if indent is None:
+            return json.dumps(val, ensure_ascii=False, separators=(",", ":"))
+
+        text = json.dumps(val, ensure_ascii=False, indent=indent)
+        return text.replace("\n", "\n" + tab * depth)
+
+    try:
+        with open(out_path, "w", encoding="UTF-8") as json_outfile:
+            json_outfile.write("{")
+
+            for i, (section, items) in enumerate(sections.items()):
+                is_array: bool = isinstance(items, list)
+                json_outfile.write(("," if i else "") + f"\n{tab}{dump(section, 1)}: " + ("[" if is_array else "{"))
+                empty = True
+
+                for item in items:
+                    text: str = dump(item, 2) if is_array else f"{dump(item[0], 2)}: {dump(item[1], 2)}"
+                    json_outfile.write(("\n" if empty else ",\n") + f"{tab * 2}{text}")
+                    empty = False
+
+                closing: str = "]" if is_array else "}"
+                json_outfile.write(closing if empty else f"\n{tab}{closing}")
+
+            json_outfile.write("\n}" if sections else "}")
+
+    except FileNotFoundError:
+        print(f"\nFile at {out_path} not found!")
+        sys.exit(1)
@@ -0,0 +1,118 @@
+"""
+Read issues one at a time from a memory-mapped record file.
+
+Each issue of extractor output is written to a record file as its JSON
+text, prefixed with its length, and its offset in the file is kept in an
+index. LazyIssueData maps issue nums to issues like the dict of
+file_io_utils.read_jsonfile_into_dict() does, but only decodes an issue
+when it is looked up, so a run holds the index and the issues it is
+working on rather than the whole input.
+
+mmap docs:
+    https://docs.python.org/3/library/mmap.html
+"""
+
+import collections.abc
+import json
+import mmap
+import struct
+from metrics_aggregator.utils import file_io_utils as file_io
+
+# length of a record, in bytes, before its JSON text
+RECORD_PREFIX = struct.Struct("<I")
+
+
+def write_record_file(in_path: str, record_path: str) -> dict:
+    """
+    Write the issues of extractor output to a record file.
+
+    The input is read one issue at a time, see
+    file_io_utils.iter_jsonfile_items().
+
+    Args:
+        in_path (str): path to extractor output.
+        record_path (str): path to write the record file to.
+
+    Returns:
+        dict: {issue num: offset of its record}, in input order
+    """
+    index: dict = {}
+    offset: int = 0
+
+    with open(record_path, "wb") as file_obj:
+        for num, issue in file_io.iter_jsonfile_items(in_path):
+            record: bytes = json.dumps(issue).encode("UTF-8")
+            file_obj.write(RECORD_PREFIX.pack(len(record)))
+            file_obj.write(record)
+
+            # a repeated issue num keeps its place and its last issue, as
+            # in a dict read from the whole file
+            index[num] = offset
+            offset += RECORD_PREFIX.size + len(record)
+
+    return index
+
+
+class LazyIssueData(collections.abc.Mapping):
+    """
+    Read-only {issue num: issue data} backed by a record file.
+
+    Every lookup decodes a fresh copy of the issue, so changes to it are
+    not kept. Lookups may be made from several threads at once.
+
+    Args:
+        record_path (str): path to a record file.
+        index (dict): output of write_record_file() for the file.
+    """
+
+    def __init__(self, record_path: str, index: dict):
+        self._index: dict = index
+        self._file = open(record_path, "rb")
+
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if index else b""
+
+    def __getitem__(self, num):
+        offset: int = self._index[num]
+        start: int = offset + RECORD_PREFIX.size
+        (length,) = RECORD_PREFIX.unpack_from(self._map, offset)
+
+        return json.loads(self._map[start : start + length])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, num) -> bool:
+        return num in self._index
+
+    def close(self) -> None:
+        """Unmap the record file and close it."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_issue_data(in_path: str, record_path: str) -> LazyIssueData:
+    """
+    Map the issues of extractor output without holding them in memory.
+
+    Args:
+        in_path (str): path to extractor output.
+        record_path (str): path to write the record file to; it is
+            overwritten if it exists, and left for the caller to remove
+            once the mapping is closed.
+
+    Returns:
+        LazyIssueData: the issues of in_path, in input order
+    """
+    return LazyIssueData(record_path, write_record_file(in_path, record_path))
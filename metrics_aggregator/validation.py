@@ -0,0 +1,216 @@
+"""
+Check a batch configuration before any of its input is read.
+
+Every job of a batch is checked at once, see get_config_problems(), so
+that a run or a dry run reports all of a configuration's problems rather
+than failing on the first, partway through a long run.
+"""
+
+import os
+from metrics_aggregator import budgets, compact_output, participant_filter, progress, scheduler
+from metrics_aggregator.improved import decay, per_period
+
+# how the graph of each period is built: from the period's own issues,
+# from every issue up to the period, or from edges decayed by age
+PERIOD_MODES: tuple = ("period", "cumulative", "decay")
+
+
+class ConfigError(ValueError):
+    """Raised when a batch configuration is invalid, with each of its problems."""
+
+    def __init__(self, problems: list):
+        super().__init__("Invalid configuration:\n" + "\n".join(problems))
+        self.problems: list = problems
+
+
+def get_batch_jobs(cfg: dict) -> list:
+    """
+    Expand a batch configuration into one configuration per job.
+
+    Args:
+        cfg (dict): batch configuration.
+
+    Returns:
+        list: job configurations with shared defaults and a unique "name".
+    """
+    defaults: dict = {key: val for key, val in cfg.items() if key != "batch"}
+    jobs: list = []
+    names: set = set()
+
+    for job in cfg["batch"]:
+        job_cfg: dict = {**defaults, **job}
+
+        # a job without input is still named, so that get_config_problems()
+        # can report it with every other problem
+        in_path: str = os.path.normpath(job_cfg.get("issue_data") or job_cfg.get("graph_in_dir") or "job")
+        name: str = job_cfg.get("name") or os.path.splitext(os.path.basename(in_path))[0]
+
+        # repositories are told apart by name in the scheduler's results
+        while name in names:
+            name += "_"
+
+        names.add(name)
+        jobs.append({**job_cfg, "name": name})
+
+    return jobs
+
+
+def get_config_problems(cfg: dict, jobs: list) -> list:
+    """
+    Find what would make a batch fail, before any of its input is read.
+
+    Args:
+        cfg (dict): batch configuration.
+        jobs (list): output of get_batch_jobs() for cfg.
+
+    Returns:
+        list: description of each problem, prefixed with the name of its
+        job; empty if the configuration is valid
+    """
+    problems: list = []
+
+    try:
+        progress.get_progress_mode(cfg)
+
+    except ValueError as e:
+        problems.append(str(e))
+
+    workers = cfg.get("workers", scheduler.WORKERS)
+
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+        problems.append(f'"workers" must be a positive integer, got {workers!r}')
+
+    if cfg.get("cost_model") and not os.path.isfile(cfg["cost_model"]):
+        problems.append(f'"cost_model" {cfg["cost_model"]!r} is not a file')
+
+    for job in jobs:
+        problems += [f"{job['name']}: {problem}" for problem in get_job_problems(job)]
+
+    return problems
+
+
+def get_job_problems(job: dict) -> list:
+    """
+    Find what would make a job fail, before any of its input is read.
+
+    Args:
+        job (dict): job configuration.
+
+    Returns:
+        list: description of each problem; empty if the job is valid
+    """
+    problems: list = []
+    checks: list = [
+        get_period_mode,
+        get_stream_input,
+        get_memoize_periods,
+        per_period.get_graph_semantics,
+        per_period.get_metric_backend,
+        compact_output.get_output_format,
+        budgets.get_metric_budgets,
+        participant_filter.get_filter_config,
+    ]
+
+    if "processing_method" not in job:
+        problems.append('"processing_method" is missing')
+
+    if job.get("graph_in_dir"):
+        if not os.path.isdir(job["graph_in_dir"]):
+            problems.append(f'"graph_in_dir" {job["graph_in_dir"]!r} is not a directory')
+
+    elif not job.get("issue_data"):
+        problems.append('"issue_data" or "graph_in_dir" is missing')
+
+    elif not os.path.isfile(job["issue_data"]):
+        problems.append(f'"issue_data" {job["issue_data"]!r} is not a file')
+
+    if not job.get("out_path"):
+        problems.append('"out_path" is missing')
+
+    elif not os.path.isdir(os.path.dirname(os.path.abspath(job["out_path"]))):
+        problems.append(f'the directory of "out_path" {job["out_path"]!r} does not exist')
+
+    if job.get("period_mode") == "decay":
+        checks.append(decay.get_decay_config)
+
+    for check in checks:
+        try:
+            check(job)
+
+        except ValueError as e:
+            problems.append(str(e))
+
+    return problems
+
+
+def get_period_mode(job: dict) -> str:
+    """
+    Get how a job builds the graph of each period.
+
+    Args:
+        job (dict): job configuration.
+
+    Raises:
+        ValueError: if "period_mode" is not one of PERIOD_MODES.
+
+    Returns:
+        str: one of PERIOD_MODES
+    """
+    period_mode: str = job.get("period_mode", "period")
+
+    if period_mode not in PERIOD_MODES:
+        raise ValueError(f'Unknown "period_mode" {period_mode!r}, expected one of {PERIOD_MODES}')
+
+    return period_mode
+
+
+def get_stream_input(job: dict) -> bool:
+    """
+    Check whether a job reads its issues a batch at a time.
+
+    Args:
+        job (dict): job configuration.
+
+    Raises:
+        ValueError: if "stream_input" is set on a job whose "period_mode"
+            is not "period"; cumulative and decayed periods need every
+            earlier issue before any period is computed.
+
+    Returns:
+        bool: True if the job streams its input, see stream.py
+    """
+    if not job.get("stream_input"):
+        return False
+
+    if get_period_mode(job) != "period":
+        raise ValueError(f'"stream_input" needs "period_mode" "period", got {get_period_mode(job)!r}')
+
+    return True
+
+
+def get_memoize_periods(job: dict) -> bool:
+    """
+    Check whether a job shares the metrics of identical periods.
+
+    Args:
+        job (dict): job configuration.
+
+    Raises:
+        ValueError: if "memoize_periods" is set on a job whose periods
+            depend on more than their own issues, or whose period graphs
+            are stored or streamed.
+
+    Returns:
+        bool: True if the job's periods are memoized, see dedup.py
+    """
+    if not job.get("memoize_periods"):
+        return False
+
+    if get_period_mode(job) != "period":
+        raise ValueError(f'"memoize_periods" needs "period_mode" "period", got {get_period_mode(job)!r}')
+
+    for key in ("graph_in_dir", "graph_out_dir", "stream_input"):
+        if job.get(key):
+            raise ValueError(f'"memoize_periods" cannot be used with "{key}"')
+
+    return True
@@ -1,37 +1,51 @@
-"""TODO."""
+"""Run the test suite, optionally recording new phase timing baselines first."""
 
 import argparse
-from tests import test_communicators as test_comm
-from metrics_aggregator.utils import file_io_utils as file_io
+import os
+import sys
+import pytest
+from tests import test_timing
 
 
 def main():
-    """TODO."""
-    in_json_path: str = get_cli_args()
-    input_dict: dict = file_io.read_jsonfile_into_dict(in_json_path)
+    """Run the tests and exit with pytest's status."""
+    args = get_cli_args()
 
-    test_comm.verify_issue_matrix_equivalence(input_dict)
+    if args.update_timings:
+        for phase, seconds in test_timing.write_timing_baseline().items():
+            print(f"{phase}: {seconds:.3f}s")
 
+        # a baseline was just recorded on this machine, so gate against it
+        os.environ[test_timing.GATES_ENV] = "1"
 
-def get_cli_args() -> str:
+    sys.exit(pytest.main(["-q", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests"), *args.pytest_args]))
+
+
+def get_cli_args() -> argparse.Namespace:
     """
     Get initializing arguments from CLI.
 
-    :return: path to file with arguments to program
-    :rtype: str
+    Returns:
+        argparse.Namespace: whether to record timings, and extra arguments
+        for pytest
     """
-    # establish positional argument capability
     arg_parser = argparse.ArgumentParser(
         description="Test social metric data generation functionality",
     )
 
-    # add repo input CLI arg
     arg_parser.add_argument(
-        "test_data_json",
-        help="Path to metrics test input",
+        "--update-timings",
+        action="store_true",
+        help="Record this machine's phase timings as the baseline of the timing gates before testing",
+    )
+
+    arg_parser.add_argument(
+        "pytest_args",
+        nargs="*",
+        help="Extra arguments passed on to pytest, e.g. -k hierarchy",
     )
 
-    return arg_parser.parse_args().test_data_json
+    return arg_parser.parse_args()
 
 
 if __name__ == "__main__":
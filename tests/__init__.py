@@ -1,4 +1 @@
-"""TODO."""
-
-
-import tests.test_communicators
+"""Tests of the metrics aggregator."""
@@ -0,0 +1,49 @@
+"""Generate synthetic extractor output for tests."""
+
+import datetime
+import random
+
+
+def make_issue_data(
+    num_issues: int,
+    num_users: int,
+    mean_comments: float = 4,
+    seed: int = 0,
+    start: datetime.datetime = datetime.datetime(2019, 1, 1),
+) -> dict:
+    """
+    Create issue data shaped like extractor output.
+
+    Participants are drawn from a heavy-tailed distribution so that a few
+    users take part in many issues, as in real repositories.
+
+    Args:
+        num_issues (int): number of issues to create.
+        num_users (int): number of distinct users.
+        mean_comments (float): mean number of comments per issue.
+        seed (int): seed of the random generator.
+        start (datetime.datetime): time before the first issue closes.
+
+    Returns:
+        dict: {issue num: issue data}
+    """
+    rnd = random.Random(seed)
+    closed_at: datetime.datetime = start
+    issue_data: dict = {}
+
+    for num in range(num_issues):
+        closed_at += datetime.timedelta(hours=rnd.randint(1, 12))
+        num_comments: int = min(int(rnd.expovariate(1 / mean_comments)), 15 * int(mean_comments))
+        users: list = [f"user{int(rnd.paretovariate(1.2)) % num_users}" for _ in range(num_comments + 1)]
+
+        issue_data[str(num)] = {
+            "userid": users[0],
+            "closed_at": closed_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "body": " ".join(rnd.choice(["issue", "body", "of", "nan", "words"]) for _ in range(rnd.randint(0, 30))),
+            "comments": {
+                str(index): {"userid": user, "body": "some words in a comment body"}
+                for index, user in enumerate(users[1:])
+            },
+        }
+
+    return issue_data
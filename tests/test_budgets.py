@@ -0,0 +1,71 @@
+"""Test per-metric time budgets and the degraded metrics they leave behind."""
+
+import math
+import time
+import pytest
+from metrics_aggregator import budgets, ingest
+from metrics_aggregator.improved import per_period
+from tests.synthetic import make_issue_data
+
+
+def sleep_past_budget(*args) -> None:
+    """Stand in for a metric that runs far longer than its budget."""
+    time.sleep(30)
+
+
+def test_budgets_are_validated():
+    """A single number budgets every metric, and unknown metrics are rejected."""
+    assert budgets.get_metric_budgets({}) == {}
+    assert budgets.get_metric_budgets({"metric_budgets_s": 5}) == dict.fromkeys(budgets.BUDGET_METRICS, 5)
+
+    with pytest.raises(ValueError):
+        budgets.get_metric_budgets({"metric_budgets_s": {"diameter": 5}})
+
+    with pytest.raises(ValueError):
+        budgets.get_metric_budgets({"metric_budgets_s": {"hierarchy": 0}})
+
+
+def test_overrunning_metrics_are_approximated_or_null(monkeypatch):
+    """Betweenness falls back to sampled sources, hierarchy to null, and both are noted."""
+    records: dict = ingest.project_issue_data(make_issue_data(40, 12, mean_comments=3))
+    issue_posters: dict = records["posters"]
+    issue_nums: list = list(issue_posters)
+    graph = per_period.make_igraph_period_network_matrix(issue_posters, issue_nums)
+    exact: dict = per_period.get_metric_group(graph, issue_posters, issue_nums, "period_issue")
+
+    monkeypatch.setattr(per_period, "get_betweenness", sleep_past_budget)
+    monkeypatch.setattr(per_period.hierarchy, "global_hierarchy", sleep_past_budget)
+    metric_budgets: dict = {"betweenness": 0.05, "hierarchy": 0.05}
+
+    start: float = time.perf_counter()
+    period_issue: dict = per_period.get_metric_group(
+        graph, issue_posters, issue_nums, "period_issue", {**per_period.PERIOD_OPTIONS, "metric_budgets": metric_budgets}
+    )
+    networkx_metrics: dict = per_period.get_metric_group(
+        graph, issue_posters, issue_nums, "networkx", {**per_period.PERIOD_OPTIONS, "developers": True, "metric_budgets": metric_budgets}
+    )
+
+    assert time.perf_counter() - start < 10
+
+    # every vertex is sampled in a graph smaller than APPROX_SOURCES
+    assert graph.vcount() <= per_period.APPROX_SOURCES
+    assert period_issue["degraded"]["betweenness"]["status"] == "approximate"
+
+    for num in issue_nums:
+        assert math.isclose(
+            period_issue["per_period_issue"][num]["betweenness_sum"],
+            exact["per_period_issue"][num]["betweenness_sum"],
+            rel_tol=1e-9,
+            abs_tol=1e-9,
+        )
+
+    assert networkx_metrics["degraded"] == {"hierarchy": {"status": "null", "reason": "exceeded 0.05s budget"}}
+    assert networkx_metrics["hierarchy_avg"] is None and networkx_metrics["hierarchy_max"] is None
+    assert networkx_metrics["effective_size_avg"] is not None
+    assert all(math.isnan(val) for val in networkx_metrics["developers"]["hierarchy"].values())
+
+    merged: dict = per_period.merge_period_parts(
+        {"period_issue": period_issue, "networkx": networkx_metrics, "igraph": {}}, issue_posters, issue_nums
+    )
+
+    assert set(merged["degraded"]) == {"betweenness", "hierarchy"}
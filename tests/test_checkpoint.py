@@ -0,0 +1,57 @@
+"""Test resuming a run from its checkpoints."""
+
+import json
+import os
+import pytest
+from metrics_aggregator import batch, checkpoint, job_output
+from tests.synthetic import make_issue_data
+
+
+def run_job(tmp_path, out_name: str, resume: bool = False, **options) -> dict:
+    """Run one job on the test input and return its output."""
+    out_path = tmp_path / out_name
+    job: dict = {"issue_data": str(tmp_path / "issues.json"), "out_path": str(out_path), "keep_checkpoints": True}
+    cfg: dict = {"processing_method": "new", "workers": 2, "progress": "quiet", "batch": [{**job, **options}]}
+    batch.gather_batch_metrics(cfg, resume)
+
+    return json.loads(out_path.read_text(encoding="UTF-8"))
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path, monkeypatch):
+    """A run stopped partway finishes on resume with the output of a whole run, and changed options start over."""
+    (tmp_path / "issues.json").write_text(json.dumps(make_issue_data(400, 25)), encoding="UTF-8")
+    expected: dict = run_job(tmp_path, "whole.json")
+    write_period = job_output.write_period
+    written: list = []
+
+    def stop_after_two(*args) -> None:
+        if len(written) == 2:
+            raise RuntimeError("stopped")
+
+        written.append(args[3])
+        write_period(*args)
+
+    monkeypatch.setattr(job_output, "write_period", stop_after_two)
+
+    with pytest.raises(RuntimeError):
+        run_job(tmp_path, "out.json")
+
+    assert not (tmp_path / "out.json").exists()
+
+    written.clear()
+    monkeypatch.setattr(job_output, "write_period", lambda *args: written.append(args[3]) or write_period(*args))
+
+    assert run_job(tmp_path, "out.json", resume=True) == expected
+    assert 0 < len(written) == len(expected["per_period"]) - 2
+
+    ckpt_dir: str = str(tmp_path / "out.json.checkpoint")
+    fingerprint: str | None = checkpoint.read_fingerprint(ckpt_dir)
+    written.clear()
+    undirected: dict = run_job(tmp_path, "out.json", resume=True, graph_semantics="undirected")
+
+    assert len(written) == len(expected["per_period"])
+    assert checkpoint.read_fingerprint(ckpt_dir) != fingerprint
+    assert undirected == run_job(tmp_path, "undirected.json", graph_semantics="undirected")
+    assert sorted(os.listdir(os.path.join(ckpt_dir, "per_period"))) == sorted(
+        os.listdir(str(tmp_path / "undirected.json.checkpoint" / "per_period"))
+    )
@@ -1,100 +1,50 @@
-"""Test communicator social metric-generating functionality."""
+"""Test the period graph builders against the hand-made fixture matrices."""
 
-import sys
-from metrics_aggregator import communicators as comm
+import json
+import os
+import pytest
+from metrics_aggregator import userids
+from metrics_aggregator.improved import per_period as improved_period
+from metrics_aggregator.standard import per_period as standard_period
 
-TAB = " " * 4
+FIXTURE_DIR: str = os.path.join(os.path.dirname(__file__), os.pardir, "data", "tests", "artificial")
+FIXTURES: list = sorted(name for name in os.listdir(FIXTURE_DIR) if name.endswith(".json"))
 
 
-def assert_matrix_equality(correct_mat, graph_mat):
+def read_fixture(file_name: str) -> dict:
     """
-    TODO.
+    Read one fixture of the artificial test data.
 
     Args:
-        correct_mat ():
-        graph_mat ():
-    """
-    i = 0
-
-    correct_mat_len = len(correct_mat)
-    graph_mat_len = graph_mat._nrow
-
-    print()
-    print("Matrices:")
-    print_matrix(f"{TAB}True:", graph_mat)
-    print_matrix(f"{TAB}Correct:", correct_mat)
-
-    try:
-        assert (
-            graph_mat_len == correct_mat_len
-        ), "Matrices are not the same length!\n"
-
-    except AssertionError as err_msg:
-        print(f"\nAssertionError: \n    {err_msg}")
-        sys.exit()
-
-    finally:
-        print("Length:")
-        print(f"{TAB}Correct num rows: {correct_mat_len}")
-        print(f"{TAB}True num rows   : {graph_mat_len}")
-        print()
-
-    try:
-        while i < graph_mat_len:
-            cur_true_row = graph_mat[i]
-            cur_correct_row = correct_mat[i]
-
-            assert (
-                cur_true_row == cur_correct_row
-            ), f"""Rows at index {i} are not identical
-{TAB * 2}Correct: {cur_correct_row}
-{TAB * 2}Actual : {cur_true_row}\n"""
-
-            i += 1
-
-    except AssertionError as err_msg:
-        print(f"\nAssertionError: \n    {err_msg}")
-        sys.exit()
+        file_name (str): file name of the fixture.
 
-    else:
-        print("Matrix rows are identical!\n")
-
-
-def print_matrix(label: str, mat: list[list[int]]) -> None:
-    """
-    Print a list of lists of ints.
-
-    Args:
-        mat (list[list[int]]): matrix to print
+    Returns:
+        dict: {"description", "by_issue", "matrix"}, where "matrix" is
+        the adjacency matrix of the issues' graph, with vertices in order
+        of first appearance
     """
-    print(label)
+    with open(os.path.join(FIXTURE_DIR, file_name), encoding="utf-8") as fptr:
+        return json.load(fptr)
 
-    for row in mat:
-        print(f"{TAB}{row}")
 
-    print()
+@pytest.mark.parametrize("file_name", FIXTURES)
+def test_standard_graph_matches_fixture(file_name):
+    """The standard builder gives the fixture's adjacency matrix."""
+    fixture: dict = read_fixture(file_name)
+    issue_data: dict = fixture["by_issue"]
 
+    graph = standard_period.make_igraph_period_network_matrix(issue_data, list(issue_data))
 
-def verify_issue_matrix_equivalence(issue_test_input: dict):
-    """
-    TODO: update.
-
-    Check if adjacency-matrix-producing function produces correct output.
-
-    Given an issue and the corresponding adjacency matrix, check if the
-    function that we are using to produce adjacency matrices produces
-    the correct output.
+    assert list(graph.get_adjacency()) == fixture["matrix"]
 
-    Args:
-        issue_data (dict):
-    """
-    correct_matrix: dict = issue_test_input["matrix"]
-    issue_data: dict = issue_test_input["by_issue"]
 
-    cur_network_graph = comm.make_igraph_period_network_matrix(
-        issue_data, list(issue_data.keys())
-    )
+@pytest.mark.parametrize("file_name", FIXTURES)
+def test_improved_graph_matches_fixture(file_name):
+    """The improved builder gives the fixture's adjacency matrix on interned userids."""
+    fixture: dict = read_fixture(file_name)
+    issue_posters, table = userids.intern_posters(fixture["by_issue"])
 
-    adj_mat = cur_network_graph.get_adjacency()
+    graph = improved_period.make_igraph_period_network_matrix(issue_posters, list(issue_posters))
 
-    assert_matrix_equality(correct_matrix, adj_mat)
+    assert list(graph.get_adjacency()) == fixture["matrix"]
+    assert graph["userids"] == list(range(len(table)))
@@ -0,0 +1,51 @@
+"""Test writing output with each metric name and userid given once."""
+
+import json
+import pytest
+from metrics_aggregator import checkpoint, compact_output, ingest, userids
+from metrics_aggregator.improved import per_issue, per_period
+from tests.synthetic import make_issue_data
+
+
+def test_compact_output_expands_to_the_full_output(tmp_path):
+    """Compact output, a degraded period included, reads back as the full output does."""
+    records: dict = ingest.project_issue_data(make_issue_data(150, 20))
+    issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+    issue_nums: list = list(records["posters"])
+    ckpt_dir: str = str(tmp_path / "ckpt")
+    checkpoint.init_checkpoint_dir(ckpt_dir, False)
+
+    checkpoint.write_issue_shard(
+        ckpt_dir, 0, issue_nums, per_issue.gather_all_issue_comm_metrics(ingest.get_issue_records(records, issue_nums))
+    )
+
+    for period, nums in issue_buckets.items():
+        metrics: dict = per_period.gather_single_period_comm_metrics(records["posters"], nums)
+        checkpoint.write_period(ckpt_dir, period, userids.restore_period_userids(records["userids"], metrics))
+
+    periods: list = list(issue_buckets)
+    degraded: dict = dict(checkpoint.iter_period_metrics(ckpt_dir, periods[-1:]))[periods[-1]]
+    checkpoint.write_period(ckpt_dir, periods[-1], {**degraded, "degraded": {"closeness": "approximated"}})
+
+    for output_format in compact_output.OUTPUT_FORMATS:
+        out_path = tmp_path / f"{output_format}.json"
+        checkpoint.write_checkpoint_output(ckpt_dir, 1, periods, str(out_path), output_format)
+
+    full: dict = json.loads((tmp_path / "full.json").read_text(encoding="UTF-8"))
+    compact: dict = json.loads((tmp_path / "compact.json").read_text(encoding="UTF-8"))
+
+    assert compact_output.expand_compact_output(compact) == full
+    assert compact["schema"]["per_period_issue"][0] == "participants"
+    assert len(compact["userids"]) == len(set(compact["userids"]))
+    assert (tmp_path / "compact.json").stat().st_size < (tmp_path / "full.json").stat().st_size / 2
+
+
+def test_output_format_is_checked():
+    """Unknown formats, and compact output of the old method, are rejected."""
+    assert compact_output.get_output_format({}) == "full"
+
+    with pytest.raises(ValueError):
+        compact_output.get_output_format({"output_format": "binary"})
+
+    with pytest.raises(ValueError):
+        compact_output.get_output_format({"output_format": "compact", "processing_method": "old"})
@@ -0,0 +1,80 @@
+"""Test the predictions of the period cost model against timings of synthetic periods."""
+
+import os
+import time
+import pytest
+from metrics_aggregator import cost_model, ingest
+from metrics_aggregator.improved import per_issue, per_period
+from tests.synthetic import make_issue_data
+from tests.test_timing import GATES_ENV
+
+# (issues, users, mean comments) of inputs used across the tests
+FIXTURES: tuple = ((300, 25, 5), (700, 30, 4), (300, 400, 4), (1200, 25, 1))
+
+# a prediction fails once it is off by this factor either way
+MAX_ERROR: float = 2.5
+
+
+@pytest.fixture(scope="module")
+def fixture_profiles() -> dict:
+    """Profile every period of each fixture, and time its per-issue metrics."""
+    profiles: dict = {}
+
+    for num_issues, num_users, mean_comments in FIXTURES:
+        records: dict = ingest.project_issue_data(make_issue_data(num_issues, num_users, mean_comments=mean_comments))
+        issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+        issue_records: dict = ingest.get_issue_records(records, list(records["posters"]))
+        issue_seconds: list = []
+
+        # the fastest of two runs, the first of which may pay for imports
+        for _ in range(2):
+            start: float = time.perf_counter()
+            per_issue.gather_all_issue_comm_metrics(issue_records)
+            issue_seconds.append(time.perf_counter() - start)
+
+        profiles[num_issues, num_users, mean_comments] = {
+            "periods": [
+                per_period.profile_period_metrics(records["posters"], issue_nums)
+                for issue_nums in issue_buckets.values()
+                if issue_nums
+            ],
+            "issue_records": issue_records,
+            "issue_seconds": min(issue_seconds),
+        }
+
+    return profiles
+
+
+def get_error(profiles: list, coefficients: dict) -> float:
+    """Get the ratio of predicted to measured seconds of some periods."""
+    predicted: float = sum(
+        cost_model.get_total_cost(cost_model.estimate_phase_costs(profile["features"], coefficients))
+        for profile in profiles
+    )
+    measured: float = sum(sum(profile["seconds"].values()) for profile in profiles)
+
+    return predicted / measured
+
+
+def test_calibrated_model_predicts_held_out_fixtures(fixture_profiles: dict):
+    """Fit on all fixtures but one, the model predicts the time of the one left out."""
+    for held_out, profiles in fixture_profiles.items():
+        coefficients: dict = cost_model.calibrate(
+            [profile for fixture, other in fixture_profiles.items() if fixture != held_out for profile in other["periods"]]
+        )
+
+        assert 1 / MAX_ERROR < get_error(profiles["periods"], coefficients) < MAX_ERROR, held_out
+
+
+@pytest.mark.skipif(os.environ.get(GATES_ENV) != "1", reason=f"set {GATES_ENV}=1 to check the default coefficients")
+def test_default_coefficients_predict_fixtures(fixture_profiles: dict):
+    """The default coefficients predict the period and per-issue time of every fixture on this machine."""
+    coefficients: dict = cost_model.read_coefficients(None)
+
+    for fixture, profiles in fixture_profiles.items():
+        issue_error: float = (
+            cost_model.estimate_issue_shard_cost(profiles["issue_records"], coefficients) / profiles["issue_seconds"]
+        )
+
+        assert 1 / MAX_ERROR < get_error(profiles["periods"], coefficients) < MAX_ERROR, fixture
+        assert 1 / MAX_ERROR < issue_error < MAX_ERROR, fixture
@@ -0,0 +1,57 @@
+"""Test incremental cumulative period metrics against full recomputation."""
+
+import math
+import pytest
+from metrics_aggregator import ingest
+from metrics_aggregator.improved import cumulative, per_period
+from tests.synthetic import make_issue_data
+
+
+def is_same(expected: float, actual: float) -> bool:
+    """
+    Compare two metric values, treating NaN as equal to NaN.
+
+    Args:
+        expected (float): value from full recomputation.
+        actual (float): value from the incremental update.
+
+    Returns:
+        bool: True if the values match
+    """
+    if math.isnan(expected):
+        return math.isnan(actual)
+
+    return math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-12)
+
+
+@pytest.mark.parametrize("semantics", per_period.GRAPH_SEMANTICS)
+def test_incremental_metrics_match_merged_graphs(semantics: str):
+    """Every cumulative period matches a from-scratch graph of all its issues."""
+    records: dict = ingest.project_issue_data(make_issue_data(120, 30, mean_comments=3))
+    issue_data: dict = records["posters"]
+    issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+    cum: dict = cumulative.get_cumulative_edges(issue_data, issue_buckets)
+
+    incremental: dict = cumulative.gather_incremental_networkx_metrics(
+        cum["userids"], cum["edges"], cum["sizes"], list(issue_buckets), developers=True, semantics=semantics
+    )
+    merged: list = []
+
+    for period, issue_nums in issue_buckets.items():
+        merged += issue_nums
+        graph = per_period.make_igraph_period_network_matrix({num: issue_data[num] for num in merged}, merged)
+
+        assert (graph.vcount(), graph.ecount()) == cum["sizes"][period]
+
+        expected: dict = per_period.get_metric_group(
+            graph, issue_data, issue_nums, "networkx", {**per_period.PERIOD_OPTIONS, "developers": True, "semantics": semantics}
+        )
+        actual: dict = dict(incremental[period])
+        expected_devs: dict = expected.pop("developers")
+        actual_devs: dict = actual.pop("developers")
+
+        assert list(expected) == list(actual)
+        assert all(is_same(expected[key], actual[key]) for key in expected)
+
+        for metric_name, values in expected_devs.items():
+            assert all(is_same(val, actual_devs[metric_name][userid]) for userid, val in values.items())
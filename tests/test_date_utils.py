@@ -0,0 +1,125 @@
+"""Test the fast timestamp parsers and period partition against the strptime ones they replace."""
+
+import datetime
+import random
+import pytest
+from metrics_aggregator.improved import per_period as improved_period
+from metrics_aggregator.standard import per_period as standard_period
+from metrics_aggregator.utils import date_utils
+
+
+TIMESTAMPS: list = [
+    datetime.datetime(1999, 12, 31, 23, 59, 59),
+    datetime.datetime(2000, 1, 1, 0, 0, 0),
+    datetime.datetime(2022, 7, 7, 12, 0, 1),
+    datetime.datetime(2022, 7, 7, 13, 5, 9),
+]
+
+
+def test_parsers_match_strptime():
+    """Both formats parse to the same datetimes as datetime.strptime()."""
+    for fmt in (date_utils.ISO_FMT, date_utils.LEGACY_FMT):
+        for date in TIMESTAMPS:
+            date_str: str = date.strftime(fmt)
+
+            assert date_utils.detect_format(date_str) == fmt
+            assert date_utils.get_parser(fmt)(date_str) == datetime.datetime.strptime(date_str, fmt)
+
+
+def test_closed_at_epochs():
+    """Epoch arrays agree for both formats and with to_epoch()."""
+    epochs: list = [date_utils.to_epoch(date) for date in TIMESTAMPS]
+
+    for fmt in (date_utils.ISO_FMT, date_utils.LEGACY_FMT):
+        issue_data: dict = {str(num): {"closed_at": date.strftime(fmt)} for num, date in enumerate(TIMESTAMPS)}
+
+        assert date_utils.get_closed_at_epochs(issue_data).tolist() == epochs
+
+
+def partition_by_scan(issue_data: dict, fmt: str, start_date: datetime.datetime) -> dict:
+    """
+    Partition issues as both processing paths did before the searchsorted partition.
+
+    Every "closed_at" is parsed with strptime and the period keys are
+    scanned linearly, each parsed back from its string.
+
+    Args:
+        issue_data (dict): {issue num: {"closed_at": str}}.
+        fmt (str): format of both the timestamps and the period keys.
+        start_date (datetime.datetime): start of the first period.
+
+    Returns:
+        dict: {period key: list of issue nums}
+    """
+    date_keys: list = []
+
+    while start_date < datetime.datetime.now():
+        start_date += date_utils.PERIOD_INTERVAL
+        date_keys.append(start_date.strftime(fmt))
+
+    buckets: dict = {key: [] for key in date_keys}
+
+    for num, issue in issue_data.items():
+        closed_at: datetime.datetime = datetime.datetime.strptime(issue["closed_at"], fmt)
+        i: int = 0
+
+        while closed_at > datetime.datetime.strptime(date_keys[i], fmt):
+            i += 1
+
+        buckets[date_keys[i]].append(num)
+
+    return buckets
+
+
+def make_closed_at(seed: int) -> list:
+    """
+    Draw closing times in order, some exactly on a period end or a second off it.
+
+    Args:
+        seed (int): seed of the random generator.
+
+    Returns:
+        list: datetimes, the first at 09:30:15 of its day
+    """
+    rnd = random.Random(seed)
+    start: datetime.datetime = datetime.datetime(2015, 3, 4, 9, 30, 15)
+    midnight: datetime.datetime = start.replace(hour=0, minute=0, second=0)
+    dates: list = [start]
+
+    for _ in range(300):
+        dates.append(dates[-1] + datetime.timedelta(seconds=rnd.randint(0, 10**6)))
+
+    # ends of the periods of both paths, which start from the first closing
+    # time and from midnight of its day
+    for origin in (start, midnight):
+        for periods in rnd.sample(range(1, 40), 8):
+            end: datetime.datetime = origin + periods * date_utils.PERIOD_INTERVAL
+            dates += [end - datetime.timedelta(seconds=1), end, end + datetime.timedelta(seconds=1)]
+
+    return [start] + sorted(dates[1:])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_partition_matches_the_linear_scan(seed: int):
+    """Both paths put every issue, boundary timestamps included, in the bucket the strptime scan did."""
+    dates: list = make_closed_at(seed)
+    iso_data: dict = {str(num): {"closed_at": date.strftime(date_utils.ISO_FMT)} for num, date in enumerate(dates)}
+    legacy_data: dict = {
+        str(num): {"closed_at": date.strftime(date_utils.LEGACY_FMT)} for num, date in enumerate(dates)
+    }
+    records: dict = {"posters": dict.fromkeys(iso_data), "closed_at": date_utils.get_closed_at_epochs(iso_data)}
+
+    iso_buckets: dict = improved_period.create_partitioned_issue_dict(records)
+    legacy_buckets: dict = standard_period.create_partitioned_issue_dict(legacy_data)
+
+    assert iso_buckets == partition_by_scan(iso_data, date_utils.ISO_FMT, dates[0])
+    assert legacy_buckets == partition_by_scan(
+        legacy_data, date_utils.LEGACY_FMT, dates[0].replace(hour=0, minute=0, second=0)
+    )
+
+    # the same start gives the same buckets in either format, under keys of either format
+    for key_fmt in (date_utils.ISO_FMT, date_utils.LEGACY_FMT):
+        from_iso: dict = date_utils.partition_by_closed_at(iso_data, dates[0], date_utils.ISO_FMT, key_fmt)
+        from_legacy: dict = date_utils.partition_by_closed_at(legacy_data, dates[0], date_utils.LEGACY_FMT, key_fmt)
+
+        assert from_iso == from_legacy
@@ -0,0 +1,71 @@
+"""Test aging, pruning and snapshotting of decayed period networks."""
+
+import collections
+import datetime
+import math
+import numpy
+from metrics_aggregator import ingest
+from metrics_aggregator.improved import decay, per_period
+from metrics_aggregator.utils import date_utils
+from tests.synthetic import make_issue_data
+
+
+def test_age_edges_sums_decays_and_prunes():
+    """Repeated pairs are summed, old weights decayed, and light pairs dropped."""
+    pairs = decay.pack_pairs(numpy.array([[0, 1], [1, 0]], dtype=numpy.int64))
+    new_pairs = decay.pack_pairs(numpy.array([[0, 1], [2, 0], [2, 0]], dtype=numpy.int64))
+
+    pairs, weights = decay.age_edges(
+        pairs, numpy.array([1.0, 0.1]), 0.5, new_pairs, numpy.array([1.0, 0.25, 0.25]), threshold=0.1
+    )
+
+    assert decay.unpack_pairs(pairs).tolist() == [[0, 1], [2, 0]]
+    assert weights.tolist() == [1.5, 0.5]
+
+
+def test_snapshots_match_weights_computed_from_scratch():
+    """Without pruning, every snapshot holds each pair's decayed weight over all earlier issues."""
+    raw_data: dict = make_issue_data(150, 30, mean_comments=3)
+    records: dict = ingest.project_issue_data(raw_data)
+    decay_cfg: dict = decay.get_decay_config({"half_life_weeks": 6, "snapshot_weeks": 4, "decay_threshold": 0})
+    snapshot_buckets: dict = decay.create_snapshot_issue_dict(records, decay_cfg)
+    closed: list = []
+
+    for snapshot_name, snapshot in decay.get_snapshot_edges(records, snapshot_buckets, decay_cfg):
+        closed += snapshot_buckets[snapshot_name]
+        end = datetime.datetime.strptime(snapshot_name, date_utils.ISO_FMT)
+        expected: collections.Counter = collections.Counter()
+
+        for num in closed:
+            age: float = (end - date_utils.parse_iso_date(raw_data[num]["closed_at"])).total_seconds()
+            vertices: dict = {}
+
+            for source, target in per_period.get_issue_edges(records["posters"][num], vertices):
+                issue_userids: list = list(vertices)
+                expected[(issue_userids[source], issue_userids[target])] += 2 ** -(age / decay_cfg["half_life"])
+
+        vseq: list = snapshot["userids"]
+        actual: dict = {
+            (vseq[source], vseq[target]): weight
+            for (source, target), weight in zip(snapshot["edges"].tolist(), snapshot["weights"].tolist())
+        }
+
+        assert actual.keys() == expected.keys()
+        assert all(math.isclose(actual[pair], expected[pair], rel_tol=1e-9) for pair in expected)
+
+        graph = decay.make_snapshot_graph(snapshot)
+
+        assert graph.ecount() == len(expected)
+        assert per_period.get_edge_weights(graph) == "weight"
+
+
+def test_weighted_pairs_match_repeated_edges():
+    """Constraint on one weighted edge per pair equals constraint on repeated edges."""
+    issue_posters: dict = ingest.project_issue_data(make_issue_data(60, 15, mean_comments=3))["posters"]
+    graph = per_period.make_igraph_period_network_matrix(issue_posters, list(issue_posters))
+    weighted = graph.copy()
+    weighted.es["weight"] = 1
+    weighted.simplify(multiple=True, loops=False, combine_edges="sum")
+
+    for expected, actual in zip(graph.constraint(), weighted.constraint(weights="weight")):
+        assert (math.isnan(expected) and math.isnan(actual)) or math.isclose(expected, actual, rel_tol=1e-9)
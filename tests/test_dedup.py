@@ -0,0 +1,77 @@
+"""Test dropping duplicate issues and sharing the metrics of identical periods."""
+
+import copy
+import math
+from metrics_aggregator import checkpoint, dedup, ingest, userids
+from metrics_aggregator.improved import per_period
+from tests.synthetic import make_issue_data
+
+
+def test_duplicate_issues_keep_the_first_key():
+    """Issues with the same content under other keys are dropped, whatever their key order."""
+    issue: dict = {"userid": "a", "closed_at": "2019-01-01T00:00:00Z", "body": "x", "comments": {}}
+    reordered: dict = dict(reversed(list(issue.items())))
+    issue_data: dict = {"1": issue, "2": {**issue, "body": "y"}, "3": reordered}
+    digests: set = set()
+
+    assert dedup.drop_duplicate_issues(issue_data, digests) == 1
+    assert list(issue_data) == ["1", "2"]
+
+    # a later batch of the same repository
+    later: dict = {"4": copy.deepcopy(issue), "5": {**issue, "body": "z"}}
+
+    assert dedup.drop_duplicate_issues(later, digests) == 1 and list(later) == ["5"]
+
+
+def test_identical_period_gets_the_metrics_of_the_computed_one(tmp_path):
+    """A period with the same posters under other issue nums, in another order, is copied, not computed."""
+    records: dict = ingest.project_issue_data(make_issue_data(80, 12))
+    issue_nums: list = list(records["posters"])
+
+    # the same issues renumbered and reversed, in a repository interned apart
+    renamed: dict = {f"r{num}": [records["userids"][userid] for userid in records["posters"][num]] for num in issue_nums}
+    other_nums: list = list(reversed(list(renamed)))
+    other_table: list = sorted({userid for posters in renamed.values() for userid in posters})
+    other_posters: dict = {num: tuple(other_table.index(userid) for userid in renamed[num]) for num in other_nums}
+
+    dirs: list = [str(tmp_path / "a"), str(tmp_path / "b")]
+
+    for ckpt_dir in dirs:
+        checkpoint.init_checkpoint_dir(ckpt_dir, False)
+
+    memo: dict = dedup.make_period_memo(str(tmp_path / "memo"))
+    options: dict = {"developers": True}
+
+    assert dedup.claim_periods(memo, dirs[0], records["userids"], records["posters"], {"p": issue_nums}, options)
+    assert not dedup.claim_periods(memo, dirs[1], other_table, other_posters, {"q": other_nums}, options)
+
+    metrics: dict = per_period.gather_single_period_comm_metrics(records["posters"], issue_nums, {**per_period.PERIOD_OPTIONS, "developers": True})
+    dedup.share_period(memo, dirs[0], records["userids"], "p", metrics)
+
+    expected: dict = userids.restore_period_userids(
+        other_table, per_period.gather_single_period_comm_metrics(other_posters, other_nums, {**per_period.PERIOD_OPTIONS, "developers": True})
+    )
+    copied: dict = dict(checkpoint.iter_period_metrics(dirs[1], ["q"]))["q"]
+
+    assert copied["keys"] == other_nums
+    assert memo["stats"] == {"computed": 1, "shared": 1, "stored": 0}
+
+    for key, val in expected.items():
+        if isinstance(val, float):
+            assert math.isclose(copied[key], val, rel_tol=1e-9)
+
+    for num in other_nums:
+        for key, val in expected["per_period_issue"][num].items():
+            copied_val = copied["per_period_issue"][num][key]
+
+            if key == "participants":
+                assert sorted(copied_val) == sorted(val)
+
+            else:
+                assert math.isclose(copied_val, val, rel_tol=1e-9)
+
+    # a later run finds the period in the memo's directory
+    rerun: dict = dedup.make_period_memo(str(tmp_path / "memo"))
+
+    assert not dedup.claim_periods(rerun, dirs[1], other_table, other_posters, {"q": other_nums}, options)
+    assert rerun["stats"]["stored"] == 1
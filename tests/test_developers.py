@@ -0,0 +1,71 @@
+"""Test appending periods to per-developer metric time series."""
+
+import math
+from metrics_aggregator import developers
+
+
+def make_column(values: dict) -> dict:
+    """
+    Create the developer metrics of one period with every metric equal.
+
+    Args:
+        values (dict): {userid: value}
+
+    Returns:
+        dict: {metric name: {userid: value}}
+    """
+    return {metric_name: dict(values) for metric_name in developers.NODE_METRICS}
+
+
+def test_appended_periods_keep_earlier_columns(tmp_path):
+    """Adding a later period adds a column and rows without touching others."""
+    out_path = str(tmp_path / "developers.npz")
+
+    series = developers.add_period_columns(
+        developers.read_series(out_path),
+        [("2020-01-01", make_column({"ann": 1.0, "bo": 2.0})), ("2020-04-01", make_column({"bo": 3.0}))],
+    )
+    developers.write_series(series, out_path)
+
+    series = developers.add_period_columns(
+        developers.read_series(out_path), [("2020-07-01", make_column({"cy": 4.0, "ann": 5.0}))]
+    )
+
+    assert series["userids"] == ["ann", "bo", "cy"]
+    assert series["periods"] == ["2020-01-01", "2020-04-01", "2020-07-01"]
+
+    matrix = series["metrics"]["betweenness"]
+
+    assert matrix[0, 0] == 1.0 and math.isnan(matrix[0, 1]) and matrix[0, 2] == 5.0
+    assert matrix[1, 0] == 2.0 and matrix[1, 1] == 3.0 and math.isnan(matrix[1, 2])
+    assert math.isnan(matrix[2, 0]) and math.isnan(matrix[2, 1]) and matrix[2, 2] == 4.0
+
+
+def test_recomputed_period_replaces_its_column():
+    """A period computed again, e.g. after gaining issues, is replaced in place."""
+    series = developers.add_period_columns(
+        developers.init_series(),
+        [("2020-01-01", make_column({"ann": 1.0})), ("2020-04-01", make_column({"ann": 2.0, "bo": 1.0}))],
+    )
+    series = developers.add_period_columns(series, [("2020-04-01", make_column({"ann": 7.0}))])
+
+    matrix = series["metrics"]["closeness"]
+
+    assert series["periods"] == ["2020-01-01", "2020-04-01"]
+    assert matrix[0].tolist() == [1.0, 7.0]
+    assert math.isnan(matrix[1, 1])
+
+
+def test_series_keeps_userid_types(tmp_path):
+    """A numeric userid keeps its own row, apart from the same digits as a string."""
+    out_path = str(tmp_path / "developers.npz")
+    developers.write_series(
+        developers.add_period_columns(
+            developers.init_series(), [("2020-01-01", make_column({5: 1.0, "5": 2.0, None: 3.0}))]
+        ),
+        out_path,
+    )
+    series: dict = developers.read_series(out_path)
+
+    assert series["userids"] == [5, "5", None]
+    assert series["metrics"]["hierarchy"][:, 0].tolist() == [1.0, 2.0, 3.0]
@@ -0,0 +1,98 @@
+"""Test validating a configuration and predicting its cost without running it."""
+
+import json
+import sys
+import pytest
+import aggregator_driver
+from metrics_aggregator import cost_model, dry_run, ingest, validation
+from metrics_aggregator.improved import per_period
+from metrics_aggregator.utils import file_io_utils as file_io
+from tests.synthetic import make_issue_data
+
+
+def test_every_problem_of_a_batch_is_reported(tmp_path):
+    """Missing keys, paths and bad options of every job are listed at once, rather than failing on the first."""
+    in_path = tmp_path / "issues.json"
+    in_path.write_text("{}", encoding="UTF-8")
+    cfg: dict = {
+        "workers": 0,
+        "batch": [
+            {"issue_data": str(tmp_path / "missing.json"), "out_path": str(tmp_path / "none" / "out.json")},
+            {"processing_method": "new", "issue_data": str(in_path), "out_path": "out.json", "graph_semantics": "x"},
+            {"processing_method": "new", "issue_data": str(in_path), "out_path": "out.json"},
+        ],
+    }
+    jobs: list = validation.get_batch_jobs(cfg)
+    problems: list = validation.get_config_problems(cfg, jobs)
+
+    assert [job["name"] for job in jobs] == ["missing", "issues", "issues_"]
+    assert len(problems) == 5
+    assert sum(problem.startswith("missing: ") for problem in problems) == 3
+    assert not any(problem.startswith("issues_: ") for problem in problems)
+
+
+def test_scanned_predictions_match_the_run(tmp_path):
+    """A batch-at-a-time scan partitions and predicts periods as a run on the whole file does."""
+    issue_data: dict = make_issue_data(700, 30)
+    in_path = tmp_path / "issues.json"
+    in_path.write_text(json.dumps(issue_data), encoding="UTF-8")
+    coefficients: dict = cost_model.read_coefficients(None)
+
+    records: dict = ingest.project_issue_data(file_io.read_jsonfile_into_dict(str(in_path)))
+    issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+    expected: dict = per_period.estimate_period_costs(records["posters"], issue_buckets, coefficients)
+
+    job: dict = {"processing_method": "new", "issue_data": str(in_path), "out_path": str(tmp_path / "out.json")}
+    prediction: dict = dry_run.predict_job(job, coefficients)
+
+    assert prediction["buckets"] == issue_buckets
+    assert prediction["costs"] == expected
+    assert prediction["counts"]["issues"] == len(issue_data)
+    assert prediction["counts"]["comments"] == sum(len(issue["comments"]) for issue in issue_data.values())
+
+    summary: dict = dry_run.summarize_batch(prediction["task_seconds"], [1, 5, 3], 2, None)
+
+    assert summary["peak_memory"] == 8
+    assert summary["wall_seconds"] >= sum(prediction["task_seconds"]) / 2
+
+
+def test_invalid_configuration_exits_with_its_problems(tmp_path, monkeypatch, capsys):
+    """Without --dry-run, an invalid configuration is listed as the dry run lists it, and exits 1."""
+    cfg_path = tmp_path / "cfg.json"
+    cfg_path.write_text(json.dumps({"processing_method": "new", "out_path": str(tmp_path / "out.json")}), "UTF-8")
+    monkeypatch.setattr(sys, "argv", ["aggregator_driver.py", str(cfg_path)])
+
+    with pytest.raises(SystemExit) as exited:
+        aggregator_driver.main()
+
+    assert exited.value.code == 1
+    assert capsys.readouterr().out == '\nInvalid configuration:\n    - job: "issue_data" or "graph_in_dir" is missing\n'
+
+
+def test_old_method_jobs_are_not_estimated(tmp_path, capsys):
+    """Jobs of the "old" method are labelled as not estimated, and the main process's memory adds to the peak."""
+    in_path = tmp_path / "issues.json"
+    in_path.write_text(json.dumps(make_issue_data(150, 20)), encoding="UTF-8")
+    jobs: list = [
+        {"processing_method": method, "issue_data": str(in_path), "out_path": str(tmp_path / f"{method}.json")}
+        for method in ("old", "new")
+    ]
+    coefficients: dict = cost_model.read_coefficients(None)
+    old, new = (dry_run.predict_job(job, coefficients) for job in jobs)
+
+    assert old["costs"] is None and not old["task_seconds"]
+    assert old["main_memory"] == {"records": 0, "raw": cost_model.estimate_raw_memory(in_path.stat().st_size)}
+    assert new["main_memory"]["records"] > 0 and new["main_memory"]["raw"] == old["main_memory"]["raw"]
+
+    summary: dict = dry_run.summarize_batch([1.0], [5], 2, None, [old["main_memory"], new["main_memory"]])
+
+    assert summary["main_memory"] == new["main_memory"]["records"] + new["main_memory"]["raw"]
+    assert summary["peak_memory"] == summary["main_memory"] + 5
+
+    assert dry_run.dry_run_batch({"workers": 2, "batch": jobs})
+
+    out: str = capsys.readouterr().out
+
+    assert 'run time not estimated for the "old" processing method' in out
+    assert 'not counting 1 "old" method jobs' in out
+    assert "0.0 MiB of it in the main process" not in out
@@ -0,0 +1,46 @@
+"""Test comparing the metrics of two engines."""
+
+import math
+from metrics_aggregator import equivalence
+
+
+def test_nan_and_inf_only_match_themselves():
+    """NaN matches NaN or null, infinities match the same infinity, and errors are gathered per metric."""
+    expected: dict = {
+        "per_issue": {"1": {"density": math.nan, "diameter": 2}, "2": {"density": 0.5, "diameter": 3}},
+        "per_period": {"p": {"constraint_max": math.inf, "hierarchy_avg": 0.25, "keys": ["1", "2"]}},
+    }
+    actual: dict = {
+        "per_issue": {"1": {"density": None, "diameter": 2}, "2": {"density": math.nan, "diameter": 3.001}},
+        "per_period": {"p": {"constraint_max": 1.0, "hierarchy_avg": 0.25 + 1e-13, "keys": ["2", "1"]}},
+    }
+
+    report: dict = equivalence.compare_outputs(expected, actual)
+    metrics: dict = report["metrics"]
+
+    assert metrics["per_issue/density"]["nan_mismatches"] == 1
+    assert metrics["per_issue/diameter"]["mismatches"] == 1
+    assert math.isclose(metrics["per_issue/diameter"]["max_abs_error"], 0.001)
+    assert metrics["per_period/constraint_max"]["inf_mismatches"] == 1
+    assert metrics["per_period/hierarchy_avg"]["mismatches"] == 0
+    assert metrics["per_period/keys"]["mismatches"] == 0
+    assert not equivalence.is_equivalent(report)
+
+
+def test_periods_are_paired_across_key_formats():
+    """Periods keyed in different timestamp formats are paired in date order, and extra metrics only fail strictly."""
+    expected: dict = {
+        "per_issue": {},
+        "per_period": {"06/20/19, 12:00:00 AM": {"edges": 4}, "03/28/19, 12:00:00 AM": {"edges": 3}},
+    }
+    actual: dict = {
+        "per_issue": {},
+        "per_period": {"2019-03-28T00:00:00Z": {"edges": 3, "density": 0.5}, "2019-06-20T00:00:00Z": {"edges": 4}},
+    }
+
+    report: dict = equivalence.compare_outputs(expected, actual)
+
+    assert report["metrics"]["per_period/edges"]["compared"] == 2
+    assert report["unmatched"] == {"per_period/density": 1}
+    assert equivalence.is_equivalent(report)
+    assert not equivalence.is_equivalent(report, strict=True)
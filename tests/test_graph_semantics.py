@@ -0,0 +1,64 @@
+"""Document how the structural hole metrics differ between graph semantics."""
+
+import math
+from metrics_aggregator.improved import per_period
+
+# 1 replies to 0 twice, 2 replies to 0 once, 1 replies to 2, and 0 replies
+# to 1 once: a triangle whose 0-1 tie is reciprocal
+ISSUE_POSTERS: dict = {1: (0, 1), 2: (0, 2, 1), 3: (1, 0)}
+
+
+def get_node_metrics(semantics: str) -> dict:
+    """
+    Compute the node-level structural hole metrics of the triangle.
+
+    Args:
+        semantics (str): one of per_period.GRAPH_SEMANTICS.
+
+    Returns:
+        dict: {metric name: {vertex: value}}
+    """
+    graph = per_period.make_igraph_period_network_matrix(ISSUE_POSTERS, list(ISSUE_POSTERS))
+    node_metrics: dict = {}
+
+    for group in ("igraph", "networkx"):
+        node_metrics |= per_period.get_metric_group(
+            graph, ISSUE_POSTERS, list(ISSUE_POSTERS), group, {**per_period.PERIOD_OPTIONS, "developers": True, "semantics": semantics}
+        )["developers"]
+
+    return node_metrics
+
+
+def test_symmetric_graph_collapses_each_pair_once():
+    """Five directed replies become three weighted undirected ties."""
+    graph = per_period.make_igraph_period_network_matrix(ISSUE_POSTERS, list(ISSUE_POSTERS))
+    symmetric = per_period.get_structural_graph(graph, "undirected")
+
+    assert graph.ecount() == 5 and not symmetric.is_directed()
+    assert dict(zip(symmetric.get_edgelist(), symmetric.es["weight"])) == {(0, 1): 3, (0, 2): 1, (1, 2): 1}
+    assert per_period.get_structural_graph(graph, "directed") is graph
+
+
+def test_numeric_difference_between_semantics():
+    """Constraint is unchanged; NetworkX metrics stop counting reciprocity and repeated replies."""
+    directed: dict = get_node_metrics("directed")
+    undirected: dict = get_node_metrics("undirected")
+
+    # igraph already sums the replies between a pair in both directions
+    for vertex, val in directed["constraint"].items():
+        assert math.isclose(val, undirected["constraint"][vertex], rel_tol=1e-12)
+
+    # directed: the reciprocal 0-1 tie has mutual weight 2, lowering the
+    # redundancy of 0's contacts; undirected: Borgatti's n - 2t / n
+    assert math.isclose(directed["effective_size"][0], 7 / 6)
+    assert math.isclose(undirected["effective_size"][0], 1.0)
+
+    # directed degree counts all four replies to and from 0; undirected
+    # degree counts its two contacts
+    assert math.isclose(directed["efficiency"][0], 7 / 6 / 4)
+    assert math.isclose(undirected["efficiency"][0], 1 / 2)
+
+    # directed hierarchy only walks 0's one out-neighbor, but divides by
+    # its directed degree; undirected, both contacts constrain 0 equally
+    assert math.isclose(directed["hierarchy"][0], 1.0)
+    assert math.isclose(undirected["hierarchy"][0], 0.0, abs_tol=1e-12)
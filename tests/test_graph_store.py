@@ -0,0 +1,65 @@
+"""Test storing period graphs and computing metrics from them."""
+
+import math
+from metrics_aggregator import ingest, userids
+from metrics_aggregator.improved import graph_store, per_period
+from tests.synthetic import make_issue_data
+
+
+def is_same(expected: float, actual: float) -> bool:
+    """
+    Compare two metric values, treating NaN as equal to NaN.
+
+    Args:
+        expected (float): value from the graph built from issues.
+        actual (float): value from the stored graph.
+
+    Returns:
+        bool: True if the values match
+    """
+    return expected == actual or (math.isnan(expected) and math.isnan(actual))
+
+
+def test_stored_graph_gives_same_metrics(tmp_path):
+    """Metrics from a stored graph match those of the graph built from issues."""
+    raw_data: dict = make_issue_data(40, 12, mean_comments=3)
+    first_issue: dict = next(iter(raw_data.values()))
+    next(iter(first_issue["comments"].values()), first_issue)["userid"] = None
+
+    # a numeric userid next to the same digits as a string
+    for num, userid in zip(list(raw_data)[1:3], (5, "5")):
+        raw_data[num]["userid"] = userid
+
+    records: dict = ingest.project_issue_data(raw_data)
+    userid_table: list = records["userids"]
+    issue_nums: list = list(records["posters"])
+
+    expected: dict = per_period.gather_single_period_comm_metrics(
+        records["posters"], issue_nums, {**per_period.PERIOD_OPTIONS, "developers": True, "export_graph": True}
+    )
+    graph_store.write_period_graph(str(tmp_path), userid_table, "p", issue_nums, expected.pop("graph"))
+    userids.restore_period_userids(userid_table, expected)
+
+    assert graph_store.read_graph_index(str(tmp_path)) == {"p": issue_nums}
+
+    actual: dict = graph_store.gather_stored_period_metrics(
+        graph_store.get_period_graph_path(str(tmp_path), "p"), {**per_period.PERIOD_OPTIONS, "developers": True}
+    )
+
+    assert actual["keys"] == expected["keys"]
+
+    assert {5, "5", None} <= set(dict(expected["developers"]["betweenness"]))
+
+    for metric_name, pairs in expected["developers"].items():
+        values: dict = dict(pairs)
+        actual_values: dict = dict(actual["developers"][metric_name])
+
+        assert values.keys() == actual_values.keys()
+        assert all(is_same(val, actual_values[userid]) for userid, val in values.items())
+
+    for num, issue_metrics in expected["per_period_issue"].items():
+        assert set(actual["per_period_issue"][num]["participants"]) == set(issue_metrics["participants"])
+
+    for key, val in expected.items():
+        if key not in ("keys", "developers", "per_period_issue"):
+            assert is_same(val, actual[key]), key
@@ -0,0 +1,59 @@
+"""Test hierarchy against values worked out by hand from Burt's formula."""
+
+import math
+import networkx
+from metrics_aggregator import __hierarchy as hierarchy
+
+
+def test_hierarchy_of_isolated_and_single_contact_nodes():
+    """A node without contacts has no hierarchy and one with a single contact has the most."""
+    graph = networkx.DiGraph()
+    graph.add_node(0)
+    graph.add_edge(1, 2)
+
+    assert math.isnan(hierarchy.hierarchy(graph, 0))
+    assert hierarchy.hierarchy(graph, 1) == 1
+
+
+def test_hierarchy_of_mutual_triad():
+    """
+    Every pair of a triad replies to each other.
+
+    Each node has two contacts of equal constraint c, so C = 2c. N is the
+    node's degree, counting in- and out-edges, so N = 4 and C/N = c/2:
+        (2 * 2 ln 2) / (4 ln 4) = 0.5
+    """
+    graph = networkx.DiGraph([(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)])
+
+    assert all(math.isclose(hierarchy.hierarchy(graph, node), 0.5) for node in graph)
+
+
+def test_hierarchy_of_transitive_triad():
+    """
+    Edges 0 -> 1, 1 -> 2 and 0 -> 2.
+
+    Every node splits its mutual weight evenly between its two
+    neighbours, so every p_ij = 1/2 and each local constraint is
+    (1/2 + 1/2 * 1/2)^2 = 9/16.
+        node 0: constraints 9/16 and 9/16 toward 1 and 2; equal ratios of 1
+            give 0
+        node 1: one constraint of 9/16 toward 2, N = 2, ratio 2:
+            (2 ln 2) / (2 ln 2) = 1
+        node 2: no successors, so no constraints are summed: 0
+    """
+    graph = networkx.DiGraph([(0, 1), (1, 2), (0, 2)])
+
+    assert [hierarchy.hierarchy(graph, node) for node in (0, 1, 2)] == [0, 1, 0]
+
+
+def test_hierarchy_counts_repeated_replies_in_degree_only():
+    """
+    Node 0 replies twice to 1 and once to 2.
+
+    Local constraint ignores edge multiplicity, giving 1/4 toward each of 1
+    and 2, but N is the degree of 3, so C/N = 1/6 and each ratio is 3/2:
+        (2 * 3/2 ln 3/2) / (3 ln 3) = ln 1.5 / ln 3
+    """
+    graph = networkx.MultiDiGraph([(0, 1), (0, 1), (0, 2)])
+
+    assert math.isclose(hierarchy.hierarchy(graph, 0), math.log(1.5) / math.log(3))
@@ -0,0 +1,26 @@
+"""Test projecting raw issues into slim records."""
+
+from metrics_aggregator import ingest
+
+
+def test_projection_keeps_only_what_metrics_need():
+    """Records hold word counts, interned posters and epochs, and bodies can be freed."""
+    issue_data: dict = {
+        "3": {
+            "userid": "ann",
+            "body": "two words",
+            "closed_at": "2020-01-01T00:00:10Z",
+            "comments": {"0": {"userid": "bo", "body": "three more words"}, "1": {"userid": "ann", "body": ""}},
+        },
+        "7": {"userid": None, "body": "", "closed_at": "2020-01-01T00:00:00Z", "comments": {}},
+    }
+
+    records: dict = ingest.project_issue_data(issue_data, drop_bodies=True)
+
+    assert records["posters"] == {"3": (0, 1, 0), "7": (None,)}
+    assert records["wordiness"] == {"3": 5, "7": 0}
+    assert records["closed_at"][0] - records["closed_at"][1] == 10
+    assert records["userids"] == ["ann", "bo"]
+    assert "body" not in issue_data["3"] and "body" not in issue_data["3"]["comments"]["0"]
+
+    assert ingest.get_issue_records(records, ["7"]) == {"7": (0, (None,))}
@@ -0,0 +1,195 @@
+"""Test that a run under a memory budget stays within it."""
+
+import os
+import subprocess
+import sys
+import time
+import pytest
+from metrics_aggregator import scheduler
+
+PACKAGE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# workers, and memory held by each task of the budget tests
+WORKERS: int = 4
+TASK_BYTES: int = 48 * 2**20
+TASK_SECONDS: float = 0.5
+NUM_TASKS: int = 8
+
+# at most one task fits at a time
+MEMORY_BUDGET: int = 64 * 2**20
+
+
+def get_tree_pids(pid: int) -> list:
+    """
+    Get a process and all of its descendants.
+
+    Args:
+        pid (int): root process id.
+
+    Returns:
+        list: process ids
+    """
+    pids: list = [pid]
+
+    for root in pids:
+        try:
+            for task in os.listdir(f"/proc/{root}/task"):
+                with open(f"/proc/{root}/task/{task}/children", encoding="utf-8") as children:
+                    pids += [int(child) for child in children.read().split()]
+
+        except OSError:
+            continue
+
+    return pids
+
+
+def get_tree_pss(pid: int) -> int:
+    """
+    Get the proportional set size of a process tree.
+
+    Pages shared between the main process and its forked workers are
+    counted once across the tree, unlike with resident set size.
+
+    Args:
+        pid (int): root process id.
+
+    Returns:
+        int: bytes
+    """
+    total: int = 0
+
+    for tree_pid in get_tree_pids(pid):
+        try:
+            with open(f"/proc/{tree_pid}/smaps_rollup", encoding="utf-8") as rollup:
+                for line in rollup:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1]) * 1024
+
+        except OSError:
+            continue
+
+    return total
+
+
+def hold_memory(num_bytes: int, seconds: float) -> int:
+    """
+    Fill some memory and hold it for a while, as a task of the budget test.
+
+    Args:
+        num_bytes (int): bytes to fill.
+        seconds (float): seconds to hold them.
+
+    Returns:
+        int: bytes held
+    """
+    held: bytearray = bytearray(b"x") * num_bytes
+    time.sleep(seconds)
+
+    return len(held)
+
+
+def run_holding_tasks(num_bytes: int, memory_budget: int | None) -> None:
+    """
+    Run NUM_TASKS tasks that each hold some memory, estimated at TASK_BYTES.
+
+    Args:
+        num_bytes (int): bytes each task holds.
+        memory_budget (int | None): budget of the run.
+    """
+    tasks: list = [
+        scheduler.make_task("repo", f"p{i}", "all", 1.0, hold_memory, (num_bytes, TASK_SECONDS), memory=TASK_BYTES)
+        for i in range(NUM_TASKS)
+    ]
+    scheduler.run_tasks(tasks, WORKERS, memory_budget, "quiet")
+
+
+def run_with_peak_memory(num_bytes: int, memory_budget: int | None) -> int:
+    """
+    Run holding tasks in a process of their own and sample its memory until it exits.
+
+    Args:
+        num_bytes (int): bytes each task holds.
+        memory_budget (int | None): budget of the run.
+
+    Returns:
+        int: peak proportional set size of the process tree, in bytes
+    """
+    peak: int = 0
+    code: str = f"from tests import test_memory_budget as t; t.run_holding_tasks({num_bytes}, {memory_budget})"
+
+    with subprocess.Popen([sys.executable, "-c", code], cwd=PACKAGE_DIR) as proc:
+        while proc.poll() is None:
+            peak = max(peak, get_tree_pss(proc.pid))
+            time.sleep(0.05)
+
+        assert proc.returncode == 0
+
+    return peak
+
+
+def test_memory_budget_caps_peak_memory():
+    """
+    The peak of a run under a budget stays within the budget and the run's fixed overhead, and without it does not.
+
+    The fixed overhead is the peak of the same run with tasks that hold
+    nothing: the main process and idle workers.
+    """
+    if not os.path.isfile("/proc/self/smaps_rollup"):
+        pytest.skip("needs /proc/<pid>/smaps_rollup")
+
+    overhead: int = run_with_peak_memory(0, MEMORY_BUDGET)
+    cap: int = overhead + MEMORY_BUDGET
+    budgeted: int = run_with_peak_memory(TASK_BYTES, MEMORY_BUDGET)
+    unbudgeted: int = run_with_peak_memory(TASK_BYTES, None)
+
+    assert budgeted < cap, f"peak memory {budgeted / 2**20:.0f} MiB over cap of {cap / 2**20:.0f} MiB"
+    assert unbudgeted > cap, f"peak memory {unbudgeted / 2**20:.0f} MiB within cap without a budget"
+
+
+def test_next_task_fits_the_budget():
+    """The most expensive task that fits goes first, and an oversized task only starts on an idle pool."""
+    queue: list = [
+        scheduler.make_task("repo", "p1", "all", 1.0, len, (), memory=10),
+        scheduler.make_task("repo", "p2", "all", 2.0, len, (), memory=60),
+        scheduler.make_task("repo", "p3", "all", 3.0, len, (), memory=500),
+    ]
+    running: list = [scheduler.make_task("repo", "p0", "all", 5.0, len, (), memory=50)]
+
+    assert scheduler.get_next_task_index(queue, [], 100) == 2
+    assert scheduler.get_next_task_index(queue, running, 100) == 0
+    assert scheduler.get_next_task_index(queue, running, 50) is None
+    assert scheduler.get_next_task_index(queue, running, None) == 2
+
+
+def test_run_never_exceeds_the_budget(monkeypatch):
+    """Every dispatch keeps the estimated memory in flight within the budget, except an oversized task run alone."""
+    budget: int = 100
+    memories: list = [70, 40, 30, 30, 20, 150, 60, 10, 90, 50]
+    tasks: list = [
+        scheduler.make_task("repo", f"p{i}", "all", float(i % 4), time.sleep, (0.02,), memory=memory)
+        for i, memory in enumerate(memories)
+    ]
+    dispatches: list = []
+    get_next_task_index = scheduler.get_next_task_index
+
+    def record(queue: list, in_flight, memory_budget: int | None) -> int | None:
+        in_flight = list(in_flight)
+        index: int | None = get_next_task_index(queue, in_flight, memory_budget)
+
+        if index is not None:
+            dispatches.append(([task["memory"] for task in in_flight], queue[index]["memory"]))
+
+        return index
+
+    monkeypatch.setattr(scheduler, "get_next_task_index", record)
+    res: dict = scheduler.run_tasks(tasks, workers=4, memory_budget=budget, progress_mode="quiet")
+
+    assert len(res) == len(tasks) == len(dispatches)
+
+    for running, memory in dispatches:
+        if memory > budget:
+            assert not running
+
+        else:
+            assert all(running_memory <= budget for running_memory in running)
+            assert sum(running) + memory <= budget or not running
@@ -0,0 +1,46 @@
+"""Test filtering bots and outliers out of issue conversations."""
+
+import pytest
+from metrics_aggregator import cost_model, ingest, participant_filter
+from metrics_aggregator.improved import per_issue, per_period
+from tests.synthetic import make_issue_data
+
+
+def test_filter_options_apply_in_order():
+    """Excluded users go first, then the per-user cap, then the thread length, never counting the issue's post."""
+    # ids: 0 author, 1 bot, 2 and 3 commenters
+    posters: tuple = (0, 1, 2, 2, 1, 2, 3, 0)
+
+    assert participant_filter.filter_posters(posters, {1}) == (0, 2, 2, 2, 3, 0)
+    assert participant_filter.filter_posters(posters, {1}, max_comments_per_user=1) == (0, 2, 3, 0)
+    assert participant_filter.filter_posters(posters, {1}, max_comments_per_user=2, max_thread_length=3) == (0, 2, 2, 3)
+    assert participant_filter.filter_posters(posters, {0}, max_thread_length=2) == (1, 2)
+    assert participant_filter.filter_posters((1, 1), {1}) == ()
+
+    with pytest.raises(ValueError):
+        participant_filter.get_filter_config({"participant_filter": {"max_thread_length": 0}})
+
+
+def test_filtered_records_report_the_edges_avoided():
+    """Every avoided edge is one the graphs no longer have, and emptied issues still get metrics."""
+    issue_data: dict = make_issue_data(60, 15, mean_comments=5)
+    records: dict = ingest.project_issue_data(issue_data)
+    bot: str = records["userids"][0]
+    issue_nums: list = list(records["posters"])
+    edges_before: int = per_period.make_igraph_period_network_matrix(records["posters"], issue_nums).ecount()
+
+    filter_cfg: dict = participant_filter.get_filter_config(
+        {"participant_filter": {"exclude_patterns": [f"^{bot}$"], "max_thread_length": 3}}
+    )
+    stats: dict = participant_filter.filter_records(records, filter_cfg)
+    graph = per_period.make_igraph_period_network_matrix(records["posters"], issue_nums)
+
+    assert stats["excluded_users"] == 1 and stats["edges_avoided"] > 0
+    assert stats["edges_before"] == edges_before
+    assert stats["edges_after"] == graph.ecount()
+    assert 0 not in graph["userids"]
+    assert all(cost_model.count_issue_edges(posters) <= 6 for posters in records["posters"].values())
+
+    metrics: dict = per_issue.gather_all_issue_comm_metrics({num: (0, records["posters"][num]) for num in issue_nums})
+
+    assert all(metrics[num]["num_comments"] <= 3 for num in issue_nums)
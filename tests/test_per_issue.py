@@ -0,0 +1,28 @@
+"""Test computing the network properties of many issues at once."""
+
+import math
+import random
+from metrics_aggregator.improved import per_issue
+
+
+def test_bulk_network_props_match_igraph():
+    """Edges, vertices, density and diameter equal igraph's, empty and one-poster issues included."""
+    rng = random.Random(0)
+    all_posters: list = [(), (4,), (4, 4, 4), (1, 2), (1, 2, 1), (None, 0, None)]
+
+    for _ in range(300):
+        userids: list = list(range(rng.randint(1, 8))) + [None]
+        all_posters.append(tuple(rng.choice(userids) for _ in range(rng.choice([0, 1, 2, 3, 5, 10, 30]))))
+
+    for posters, props in zip(all_posters, per_issue.get_bulk_network_props(all_posters)):
+        expected: dict = per_issue.get_comm_network_props(posters)
+
+        assert props["edges"] == expected["edges"] and props["vertices"] == expected["vertices"]
+
+        for key in ("density", "diameter"):
+            if math.isnan(expected[key]):
+                assert math.isnan(props[key])
+            else:
+                assert math.isclose(props[key], expected[key]) and type(props[key]) is type(expected[key])
+
+    assert per_issue.get_bulk_network_props([]) == []
@@ -0,0 +1,96 @@
+"""Test progress reporting from worker events."""
+
+import io
+import json
+import queue
+import pytest
+from metrics_aggregator import batch, progress, scheduler
+from tests.synthetic import make_issue_data
+
+
+def test_reporter_counts_periods_phases_and_work():
+    """Periods count once all their tasks finish, and worker phases name the slowest period."""
+    tasks: list = [
+        scheduler.make_task("repo", "p1", "all", 3.0, len, ()),
+        scheduler.make_task("repo", "p2", "igraph", 1.0, len, ()),
+        scheduler.make_task("repo", "p2", "networkx", 4.0, len, ()),
+        scheduler.make_task("repo", "per_issue", 0, 2.0, len, ()),
+    ]
+    work: dict = {("repo", "p1"): {"issues": 5, "edges": 40}, ("repo", "p2"): {"issues": 7, "edges": 60}}
+    stream = io.StringIO()
+    reporter: dict = progress.make_reporter(tasks, "json", work, stream)
+    events: queue.Queue = queue.Queue()
+
+    progress.init_worker(events)
+    progress.run_task(scheduler.get_task_key(tasks[2]), progress.report_phase, ("networkx metrics",))
+    progress.init_worker(None)
+
+    for task in tasks:
+        progress.mark_dispatched(reporter, task)
+
+    progress.drain_events(reporter, events)
+
+    for task in tasks[:2]:
+        progress.mark_done(reporter, task)
+
+    status: dict = progress.get_status(reporter)
+
+    assert (status["periods_done"], status["periods_total"]) == (1, 2)
+    assert (status["tasks_done"], status["tasks_total"]) == (2, 4)
+    assert status["slowest"]["period"] == "p2" and status["slowest"]["phase"] == "networkx metrics"
+    assert status["eta_seconds"] is not None
+
+    for task in tasks[2:]:
+        progress.mark_done(reporter, task)
+
+    progress.finish(reporter)
+    lines: list = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert [line["event"] for line in lines] == ["repo_done", "done"]
+    assert lines[-1]["periods_done"] == 2 and lines[-1]["slowest"] is None
+    assert lines[-1]["issues_per_second"] > 0
+
+
+def test_quiet_mode_writes_nothing():
+    """A quiet reporter is silent."""
+    tasks: list = [scheduler.make_task("repo", "p1", "all", 1.0, len, ())]
+    stream = io.StringIO()
+    reporter: dict = progress.make_reporter(tasks, "quiet", stream=stream)
+
+    progress.mark_dispatched(reporter, tasks[0])
+    progress.mark_done(reporter, tasks[0])
+    progress.show(reporter, force=True)
+    progress.finish(reporter)
+
+    assert stream.getvalue() == ""
+
+
+def test_setup_lines_only_in_live_mode(capsys):
+    """Lines about the setup of a run keep json output parseable and quiet output empty."""
+    for mode in progress.MODES:
+        progress.log(mode, "    repo: partitioning issues into temporal periods...")
+
+    assert capsys.readouterr().out == "    repo: partitioning issues into temporal periods...\n"
+
+
+@pytest.mark.parametrize("mode", ("quiet", "json"))
+def test_old_method_jobs_follow_the_progress_mode(tmp_path, capsys, mode: str):
+    """A batch with an "old" method job prints nothing in quiet mode, and only JSON lines in json mode."""
+    in_path = tmp_path / "issues.json"
+    in_path.write_text(json.dumps(make_issue_data(80, 12)), encoding="UTF-8")
+    jobs: list = [
+        {"processing_method": method, "issue_data": str(in_path), "out_path": str(tmp_path / f"{method}.json")}
+        for method in ("old", "new")
+    ]
+
+    batch.gather_batch_metrics({"workers": 2, "progress": mode, "batch": jobs})
+
+    lines: list = capsys.readouterr().out.splitlines()
+
+    assert (tmp_path / "old.json").exists()
+
+    if mode == "quiet":
+        assert not lines
+
+    else:
+        assert lines and all(json.loads(line) for line in lines)
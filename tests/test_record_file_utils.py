@@ -0,0 +1,38 @@
+"""Test reading issues lazily from a memory-mapped record file."""
+
+import json
+from metrics_aggregator.standard import per_issue as standard_issue, per_period as standard_period
+from metrics_aggregator.utils import record_file_utils as record_file
+from tests.synthetic import make_issue_data
+
+
+def test_lazy_issue_data_reads_like_the_whole_file(tmp_path):
+    """Lookups, order and membership match json.load(), repeated and empty inputs included."""
+    in_path = tmp_path / "issues.json"
+    record_path = str(tmp_path / "issues.records")
+
+    in_path.write_text('{"1": {"body": "\\u00e9 }"}, "2": [1, 2], "1": {"body": null}}', encoding="UTF-8")
+
+    with record_file.open_issue_data(str(in_path), record_path) as lazy_issue_data:
+        assert dict(lazy_issue_data) == json.loads(in_path.read_text(encoding="UTF-8"))
+        assert list(lazy_issue_data) == ["1", "2"] and "3" not in lazy_issue_data
+
+    in_path.write_text("{}", encoding="UTF-8")
+
+    with record_file.open_issue_data(str(in_path), record_path) as lazy_issue_data:
+        assert len(lazy_issue_data) == 0
+
+
+def test_standard_metrics_match_on_lazy_issue_data(tmp_path):
+    """The standard engine gives the same metrics whether its issues are in memory or mapped."""
+    issue_data: dict = make_issue_data(120, 15)
+    in_path = tmp_path / "issues.json"
+    in_path.write_text(json.dumps(issue_data), encoding="UTF-8")
+
+    with record_file.open_issue_data(str(in_path), str(tmp_path / "issues.records")) as lazy_issue_data:
+        assert standard_issue.gather_all_issue_comm_metrics(lazy_issue_data) == (
+            standard_issue.gather_all_issue_comm_metrics(issue_data)
+        )
+        assert json.dumps(standard_period.gather_all_period_comm_metrics(lazy_issue_data)) == json.dumps(
+            standard_period.gather_all_period_comm_metrics(issue_data)
+        )
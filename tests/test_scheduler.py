@@ -0,0 +1,27 @@
+"""Test dispatching tasks of several repositories on one pool."""
+
+import time
+from metrics_aggregator import progress, scheduler
+
+
+def test_tasks_of_all_repos_are_dispatched_longest_first(monkeypatch):
+    """Tasks from every repository share the pool and go out by descending cost, whatever their input order."""
+    costs: dict = {"a": [5.0, 1.0, 8.0], "b": [3.0, 9.0], "c": [2.0, 7.0, 4.0, 6.0]}
+    tasks: list = [
+        scheduler.make_task(repo, f"p{i}", "all", cost, time.sleep, (0.01,))
+        for repo, repo_costs in costs.items()
+        for i, cost in enumerate(repo_costs)
+    ]
+    dispatched: list = []
+    mark_dispatched = progress.mark_dispatched
+
+    def record(reporter: dict, task: dict) -> None:
+        dispatched.append(task)
+        mark_dispatched(reporter, task)
+
+    monkeypatch.setattr(progress, "mark_dispatched", record)
+    res: dict = scheduler.run_tasks(tasks, workers=2, progress_mode="quiet")
+
+    assert set(res) == {scheduler.get_task_key(task) for task in tasks}
+    assert [task["cost"] for task in dispatched] == sorted((task["cost"] for task in tasks), reverse=True)
+    assert [task["repo"] for task in dispatched[:4]] == ["b", "a", "c", "c"]
@@ -0,0 +1,67 @@
+"""Test the sparse adjacency backend against igraph and NetworkX."""
+
+import math
+import pytest
+from metrics_aggregator import ingest
+from metrics_aggregator.improved import per_period
+from tests.synthetic import make_issue_data
+
+
+def assert_same_values(expected: list, actual: list) -> None:
+    """
+    Check that two backends give the same values, of the same type.
+
+    Args:
+        expected (list): values from igraph and NetworkX.
+        actual (list): values from the sparse backend.
+    """
+    assert len(expected) == len(actual)
+
+    for exp, act in zip(expected, actual):
+        assert type(exp) is type(act)
+        assert (math.isnan(exp) and math.isnan(act)) or math.isclose(exp, act, rel_tol=1e-9, abs_tol=1e-12)
+
+
+@pytest.mark.parametrize("semantics", per_period.GRAPH_SEMANTICS)
+def test_backends_agree_on_period_and_weighted_graphs(semantics: str):
+    """Every vertex, or a slice of them, gets the same metrics from both backends."""
+    records: dict = ingest.project_issue_data(make_issue_data(150, 30, mean_comments=3))
+    issue_nums: list = list(records["posters"])
+    graph = per_period.make_igraph_period_network_matrix(records["posters"], issue_nums)
+
+    # a decayed snapshot has one weighted edge per ordered pair
+    weighted = graph.copy()
+    weighted.es["weight"] = [0.5] * weighted.ecount()
+    weighted.simplify(combine_edges={"weight": "sum"})
+
+    for period_graph in (graph, weighted):
+        for vertices in (None, [4, 0, period_graph.vcount() - 1]):
+            for group in ("igraph", "networkx"):
+                expected: dict = per_period.get_node_metric_group(period_graph, group, None, vertices, semantics)
+                actual: dict = per_period.get_node_metric_group(
+                    period_graph, group, None, vertices, semantics, "sparse"
+                )
+
+                assert expected.keys() == actual.keys()
+
+                for metric_name, values in expected.items():
+                    assert_same_values(values, actual[metric_name])
+
+
+def test_sparse_backend_handles_degenerate_graphs():
+    """Isolated vertices, vertices without out-neighbors and empty graphs match NetworkX."""
+    # 2 only receives replies, 3 posts alone
+    issue_posters: dict = {1: (0, 2), 2: (1, 2), 3: (3,)}
+    graph = per_period.make_igraph_period_network_matrix(issue_posters, list(issue_posters))
+    empty = per_period.make_igraph_period_network_matrix({}, [])
+
+    for period_graph in (graph, empty):
+        for group in ("igraph", "networkx"):
+            expected: dict = per_period.get_node_metric_group(period_graph, group)
+            actual: dict = per_period.get_node_metric_group(period_graph, group, backend="sparse")
+
+            for metric_name, values in expected.items():
+                assert_same_values(values, actual[metric_name])
+
+    with pytest.raises(ValueError):
+        per_period.get_metric_backend({"metric_backend": "cuda"})
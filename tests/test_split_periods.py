@@ -0,0 +1,103 @@
+"""Test splitting the work of a period across tasks."""
+
+import json
+import random
+import igraph
+import pytest
+from metrics_aggregator import __betweenness as brandes
+from metrics_aggregator import cost_model, equivalence, ingest
+from metrics_aggregator.improved import per_period
+from tests.synthetic import make_issue_data
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_partial_betweenness_sums_to_igraph(seed: int):
+    """Betweenness summed over a partition of the sources is igraph's, parallel edges and loops included."""
+    rnd = random.Random(seed)
+    num_vertices: int = rnd.randint(2, 40)
+    edges: list = [(rnd.randrange(num_vertices), rnd.randrange(num_vertices)) for _ in range(num_vertices * 3)]
+    edges += rnd.sample(edges, len(edges) // 4)
+    sources: list = list(range(num_vertices))
+    rnd.shuffle(sources)
+    partition: list = [sources[i::3] for i in range(3)]
+
+    partials: list = [brandes.partial_betweenness(num_vertices, edges, part) for part in partition]
+    expected: list = igraph.Graph(n=num_vertices, edges=edges, directed=True).betweenness()
+
+    assert [sum(values) for values in zip(*partials)] == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("developers", (False, True))
+def test_split_period_matches_the_whole_period(developers: bool):
+    """A period split into metric groups and vertex chunks gets the metrics of one computed in one task."""
+    records: dict = ingest.project_issue_data(make_issue_data(300, 25, mean_comments=5))
+    issue_buckets: dict = per_period.create_partitioned_issue_dict(records)
+    period: str = max(issue_buckets, key=lambda key: len(issue_buckets[key]))
+    issue_nums: list = issue_buckets[period]
+    period_costs: dict = per_period.estimate_period_costs(
+        records["posters"], {period: issue_nums}, cost_model.read_coefficients(None)
+    )
+    results: dict = {}
+
+    tasks: list = per_period.make_period_tasks(
+        "repo",
+        records["posters"],
+        {period: issue_nums},
+        period_costs,
+        1e-9,
+        results.__setitem__,
+        {**per_period.PERIOD_OPTIONS, "developers": developers},
+        3,
+    )
+
+    assert len(tasks) == 3 * len(per_period.METRIC_GROUPS)
+
+    for task in tasks:
+        task["on_result"](task["func"](*task["args"]))
+
+    expected: dict = per_period.gather_single_period_comm_metrics(
+        {num: records["posters"][num] for num in issue_nums}, issue_nums, {**per_period.PERIOD_OPTIONS, "developers": developers}
+    )
+    # as written to the output, where interned developer ids are keys
+    report: dict = equivalence.compare_outputs(
+        json.loads(json.dumps({"per_period": {period: expected}})), json.loads(json.dumps({"per_period": results}))
+    )
+
+    assert results[period].keys() == expected.keys()
+    assert equivalence.is_equivalent(report, strict=True)
+
+
+def test_periods_are_split_by_predicted_cost():
+    """Cheap periods get one task, dear ones one per group, and groups dearer than the split cost are chunked."""
+    issue_posters: dict = {"1": ("a", "b"), "2": ("b", "c", "a")}
+    issue_buckets: dict = {"cheap": ["1"], "dear": ["1", "2"]}
+    period_costs: dict = {
+        "cheap": {"seconds": {"period_issue": 1.0, "igraph": 1.5, "networkx": 2.0}, "memory": 10},
+        "dear": {"seconds": {"period_issue": 2.0, "igraph": 9.0, "networkx": 25.0}, "memory": 20},
+    }
+
+    def get_parts(max_chunks: int) -> dict:
+        tasks: list = per_period.make_period_tasks(
+            "repo", issue_posters, issue_buckets, period_costs, 4.0, print, max_chunks=max_chunks
+        )
+
+        assert all(task["memory"] == period_costs[task["period"]]["memory"] for task in tasks)
+        assert all(len(task["args"][0]) == len(issue_buckets[task["period"]]) for task in tasks)
+
+        return {(task["period"], task["part"]): task["cost"] for task in tasks}
+
+    # one task costs the whole period, sharing the graph build of the groups
+    assert get_parts(1) == {
+        ("cheap", "all"): 2.5,
+        ("dear", "period_issue"): 2.0,
+        ("dear", "igraph"): 9.0,
+        ("dear", "networkx"): 25.0,
+    }
+    assert get_parts(4) == {
+        ("cheap", "all"): 2.5,
+        ("dear", "period_issue"): 2.0,
+        ("dear", ("igraph", 0, 3)): 3.0,
+        ("dear", ("igraph", 1, 3)): 3.0,
+        ("dear", ("igraph", 2, 3)): 3.0,
+        **{("dear", ("networkx", chunk, 4)): 6.25 for chunk in range(4)},
+    }
@@ -0,0 +1,83 @@
+"""Test reading a repository's issues a batch at a time."""
+
+import json
+import queue
+import random
+import threading
+import time
+from metrics_aggregator import ingest, scheduler, stream
+from metrics_aggregator.improved import per_period
+from metrics_aggregator.utils import file_io_utils as file_io
+from tests.synthetic import make_issue_data
+
+
+def test_streamed_items_match_whole_file(tmp_path):
+    """Items split across any chunk size come out as json.load() reads them."""
+    data: dict = {"a": {"body": 'braces } { and "quotes" \\', "n": [1, 2.5e3, None, True]}, "b": 1234567, "c": {}}
+    path = tmp_path / "issues.json"
+    path.write_text(json.dumps(data, indent=4), encoding="UTF-8")
+
+    for chunk_size in (1, 3, 7, 1 << 20):
+        assert list(file_io.iter_jsonfile_items(str(path), chunk_size)) == list(data.items())
+
+
+def test_numbers_split_across_chunks_are_read_whole(tmp_path):
+    """A top-level number cut by a chunk boundary at any character is only read once it is complete."""
+    path = tmp_path / "issues.json"
+    path.write_text('{"a": 15000000000.0, "b": 2, "c": -1.5e-3, "d":7E+2,"e":10}', encoding="UTF-8")
+
+    with open(path, encoding="UTF-8") as json_file:
+        expected: list = list(json.load(json_file).items())
+
+    for chunk_size in (1, 2, 3):
+        assert list(file_io.iter_jsonfile_items(str(path), chunk_size)) == expected
+
+
+def test_streamed_periods_match_partitioned_periods(tmp_path):
+    """Sorted input hands out each period once; shuffled input hands late periods out again."""
+    issue_data: dict = make_issue_data(1200, 25, mean_comments=1)
+    nums: list = list(issue_data)
+    nums = nums[:1] + random.Random(0).sample(nums[1:], len(nums) - 1)
+
+    for order in (list(issue_data), nums):
+        path = tmp_path / "issues.json"
+        path.write_text(json.dumps({num: issue_data[num] for num in order}), encoding="UTF-8")
+        expected: dict = per_period.create_partitioned_issue_dict(
+            ingest.project_issue_data(file_io.read_jsonfile_into_dict(str(path)))
+        )
+
+        state: dict = stream.make_stream()
+        handed_out: list = []
+
+        for issue_batch in stream.iter_issue_batches(str(path), batch_size=100):
+            stream.add_issue_batch(state, issue_batch)
+
+            # every period handed out before the end has all of its issues,
+            # unless a later batch hands it out again
+            handed_out += [(period, list(state["buckets"][period])) for period in stream.pop_ready_periods(state)]
+
+        handed_out += [(period, list(state["buckets"][period])) for period in stream.pop_ready_periods(state, final=True)]
+
+        assert state["buckets"] == expected
+        assert dict(handed_out) == expected
+        assert (len(handed_out) > len(expected)) == (state["reordered"] > 0) == (order is nums)
+
+
+def test_scheduler_runs_streamed_tasks_until_streams_close():
+    """Tasks put on the incoming queue while the run goes on all run, and the run ends once every stream has."""
+    incoming: queue.Queue = queue.Queue()
+    results: list = []
+
+    def feed() -> None:
+        for period in range(3):
+            time.sleep(0.1)
+            incoming.put(("repo", [scheduler.make_task("repo", str(period), "all", 1.0, abs, (-period,), results.append)], {}))
+
+        incoming.put(("repo", None, None))
+
+    thread = threading.Thread(target=feed)
+    thread.start()
+    scheduler.run_tasks([], 2, progress_mode="quiet", incoming=incoming, streams=("repo",))
+    thread.join()
+
+    assert sorted(results) == [0, 1, 2]
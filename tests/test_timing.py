@@ -0,0 +1,92 @@
+"""
+Gate the run time of each processing phase against a recorded baseline.
+
+Timings only compare on the machine that recorded them, so the baseline
+is local and not committed, and the gate only runs when asked for with
+METRICS_TIMING_GATES=1.
+"""
+
+import json
+import os
+import time
+import pytest
+from metrics_aggregator import ingest
+from metrics_aggregator.improved import per_period
+from tests.synthetic import make_issue_data
+
+TIMING_BASELINE: str = os.path.join(os.path.dirname(__file__), "timing_baseline.json")
+
+# set to 1 to run the timing gate
+GATES_ENV: str = "METRICS_TIMING_GATES"
+
+# a phase fails once it takes this many times its baseline, or the
+# baseline plus MIN_SLACK_SECONDS for phases too short to time reliably
+TIMING_SLACK: float = float(os.environ.get("METRICS_TIMING_SLACK", 2.0))
+MIN_SLACK_SECONDS: float = 0.05
+REPEATS: int = 3
+
+
+def profile_phases() -> dict:
+    """
+    Time ingestion and each metric phase of one mid-size synthetic period.
+
+    Each phase is timed REPEATS times and its fastest run is kept, which
+    is the least disturbed by whatever else the machine is doing.
+
+    Returns:
+        dict: {phase: seconds}
+    """
+    seconds: dict = {}
+
+    for _ in range(REPEATS):
+        raw_data: dict = make_issue_data(300, 400, mean_comments=4)
+        start: float = time.perf_counter()
+        records: dict = ingest.project_issue_data(raw_data, drop_bodies=True)
+        phases: dict = {"ingest": time.perf_counter() - start}
+
+        phases.update(per_period.profile_period_metrics(records["posters"], list(records["posters"]))["seconds"])
+
+        for phase, elapsed in phases.items():
+            seconds[phase] = min(seconds.get(phase, elapsed), elapsed)
+
+    return seconds
+
+
+def write_timing_baseline() -> dict:
+    """
+    Record the phase timings of this machine as the baseline.
+
+    Returns:
+        dict: {phase: seconds} written
+    """
+    seconds: dict = profile_phases()
+
+    with open(TIMING_BASELINE, "w", encoding="utf-8") as fptr:
+        json.dump(seconds, fptr, indent=4)
+        fptr.write("\n")
+
+    return seconds
+
+
+def test_phases_within_baseline():
+    """No phase is much slower than its baseline."""
+    if os.environ.get(GATES_ENV) != "1":
+        pytest.skip(f"timing gates are off; set {GATES_ENV}=1 to run them")
+
+    if not os.path.isfile(TIMING_BASELINE):
+        pytest.skip("no timing baseline; record one with `python run_tests.py --update-timings`")
+
+    with open(TIMING_BASELINE, encoding="utf-8") as fptr:
+        baseline: dict = json.load(fptr)
+
+    seconds: dict = profile_phases()
+
+    assert set(seconds) == set(baseline), "phases changed; rerun `python run_tests.py --update-timings`"
+
+    slow: dict = {
+        phase: f"{elapsed:.3f}s vs {baseline[phase]:.3f}s"
+        for phase, elapsed in seconds.items()
+        if elapsed > max(baseline[phase] * TIMING_SLACK, baseline[phase] + MIN_SLACK_SECONDS)
+    }
+
+    assert not slow, f"phases over {TIMING_SLACK}x their baseline: {slow}"
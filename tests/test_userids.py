@@ -0,0 +1,85 @@
+"""Test interning userids and mapping them back."""
+
+from metrics_aggregator import ingest, userids
+from metrics_aggregator.improved import per_issue
+from metrics_aggregator.standard import per_issue as standard_issue
+
+
+def test_interned_ids_round_trip():
+    """Ids are dense, in order of first appearance, and map back to userids."""
+    issue_data: dict = {
+        "0": {"userid": "ann", "body": "text", "comments": {"0": {"userid": "bo", "body": ""}}},
+        "1": {"userid": "bo", "comments": {"0": {"userid": None, "body": ""}, "1": {"userid": "cy", "body": ""}}},
+    }
+
+    posters, table = userids.intern_posters(issue_data)
+
+    assert table == ["ann", "bo", "cy"]
+    assert posters == {"0": (0, 1), "1": (1, None, 2)}
+    assert issue_data["0"]["userid"] == "ann"
+
+    metrics: dict = {
+        "per_period_issue": {"1": {"participants": [1, None, 2]}},
+        "developers": {"betweenness": {0: 0.5, 2: 1.0}},
+    }
+
+    userids.restore_period_userids(table, metrics)
+
+    assert metrics["per_period_issue"]["1"]["participants"] == ["bo", None, "cy"]
+    assert metrics["developers"] == {"betweenness": [["ann", 0.5], ["cy", 1.0]]}
+
+
+def test_numeric_userids_are_interned_too():
+    """Int userids get ids like strings do, so none of them is read back as another user's id."""
+    issue_data: dict = {
+        "0": {"userid": 7, "comments": {"0": {"userid": 0, "body": ""}, "1": {"userid": "7", "body": ""}}},
+        "1": {"userid": 1, "comments": {"0": {"userid": None, "body": ""}, "1": {"userid": 7, "body": ""}}},
+    }
+
+    posters, table = userids.intern_posters(issue_data)
+
+    assert table == [7, 0, "7", 1]
+    assert posters == {"0": (0, 1, 2), "1": (3, None, 0)}
+
+    metrics: dict = {
+        "per_period_issue": {num: {"participants": list(posters[num])} for num in posters},
+        "developers": {"betweenness": {0: 0.5, 1: 0.0, 3: 1.0}},
+    }
+
+    userids.restore_period_userids(table, metrics)
+
+    assert metrics["per_period_issue"]["0"]["participants"] == [7, 0, "7"]
+    assert metrics["per_period_issue"]["1"]["participants"] == [1, None, 7]
+    assert metrics["developers"] == {"betweenness": [[7, 0.5], [0, 0.0], [1, 1.0]]}
+
+
+def test_numeric_userids_are_not_discussants():
+    """As in the standard engine, a commenter with a numeric or null userid is no discussant."""
+    issue_data: dict = {
+        "0": {
+            "userid": "ann",
+            "body": "",
+            "closed_at": "2020-01-01T00:00:00Z",
+            "comments": {
+                "0": {"userid": "bo", "body": ""},
+                "1": {"userid": 5, "body": ""},
+                "2": {"userid": None, "body": ""},
+                "3": {"userid": "5", "body": ""},
+            },
+        }
+    }
+    records: dict = ingest.project_issue_data(issue_data)
+    issue_records: dict = ingest.get_issue_records(records, ["0"])
+    non_users: frozenset = userids.get_non_string_ids(records["userids"], records["posters"]["0"])
+
+    assert non_users == {records["userids"].index(5)}
+    assert per_issue.gather_all_issue_comm_metrics(issue_records, non_users)["0"]["num_discussants"] == 3
+    assert standard_issue.gather_all_issue_comm_metrics(issue_data)["0"]["num_discussants"] == 3
+
+
+def test_packed_userids_keep_their_type():
+    """Userids that are not strings come back from NumPy arrays as they went in."""
+    userid_list: list = ["ann", 5, "5", None, "null", 2.5]
+    packed: dict = userids.pack_userids(userid_list)
+
+    assert userids.unpack_userids(packed["userids"], packed["json_userids"]) == userid_list